@@ -1,8 +1,9 @@
 """
 CampusChain Backend — Flask Application Entry Point (Custodial)
 
-No indexer thread needed — spending is aggregated at payment time
-in the /vendor/pay route, not by polling the blockchain.
+Spending is aggregated at payment time in the /vendor/pay and
+/canteen/order routes; the chain follower only reconciles the DB with
+payments it finds on-chain.
 """
 
 from flask import Flask
@@ -10,16 +11,25 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 
 from config import SECRET_KEY, JWT_SECRET_KEY
-from models import init_db
+from models import get_db, init_db, close_db
 from routes.auth import auth_bp
 from routes.student import student_bp
 from routes.parent import parent_bp
 from routes.vendor import vendor_bp
 from routes.admin import admin_bp
 from routes.canteen import canteen_bp
+from routes.txn import txn_bp
+from services.confirmation_tracker import start_tracker
+from services.balance_ledger import start_balance_sync
+from services.chain_follower import start_chain_follower
+from services.key_vault import check_configured, load_admin_key, seal_plaintext_mnemonics
+from services.wallet_pool import start_wallet_pool
 
 
 def create_app():
+    # Refuse to start if wallet keys would be sealed under a public secret
+    check_configured()
+
     app = Flask(__name__)
     app.config["SECRET_KEY"] = SECRET_KEY
     app.config["JWT_SECRET_KEY"] = JWT_SECRET_KEY
@@ -34,9 +44,28 @@ def create_app():
     app.register_blueprint(vendor_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(canteen_bp)
+    app.register_blueprint(txn_bp)
 
-    # Initialize database
+    # Initialize database; each request's connection is closed at teardown
     init_db()
+    app.teardown_appcontext(close_db)
+
+    # Encrypt any legacy plaintext mnemonics, decode the admin key once
+    db = get_db()
+    sealed = seal_plaintext_mnemonics(db)
+    db.close()
+    if sealed:
+        print(f"Key vault: encrypted {sealed} legacy wallet mnemonic(s)")
+    load_admin_key()
+
+    # Settle 'pending' rows from non-blocking (ASYNC_SUBMIT) or unknown-outcome writes
+    start_tracker()
+    # Correct drift between the local balance ledger and algod
+    start_balance_sync()
+    # Keep pre-provisioned wallets ready for instant registration
+    start_wallet_pool()
+    # Follow blocks to pick up payments the DB missed
+    start_chain_follower()
 
     @app.route("/")
     def health():
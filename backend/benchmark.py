@@ -0,0 +1,401 @@
+"""
+CampusChain — Hot-Path Benchmark
+
+Measures latency and throughput of the busiest endpoints against a
+freshly seeded SQLite database and an in-process fake algod
+(fake_algod.py), so runs are repeatable on a laptop or in CI without
+testnet.
+
+Usage:
+  python benchmark.py
+  python benchmark.py --students 5000 --history 50 --requests 2000 --concurrency 16
+  python benchmark.py --out bench.json --baseline last.json --tolerance 0.15
+  python benchmark.py --endpoints vendor_pay,canteen_order --latency-ms 30
+
+Endpoints: vendor_pay, canteen_order, parent_spending, student_summary,
+admin_stats. Each is driven through a real threaded HTTP server for
+--requests requests (after --warmup unrecorded ones) by --concurrency
+client threads, and reported as p50/p95/p99 latency and requests/s.
+
+Results are written as JSON (--out). With --baseline, each endpoint is
+compared to a previous results file and the exit status is 1 if its p95
+got slower, or its requests/s fell, by more than --tolerance.
+
+Backend settings (ASYNC_SUBMIT, PAYMENT_BATCH_*, ...) come from the
+environment / .env as usual; algod, the database, the admin account and
+the wallet pool are always replaced by throwaway benchmark ones.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+from fake_algod import start_fake_algod
+
+ENDPOINTS = ["vendor_pay", "canteen_order", "parent_spending", "student_summary", "admin_stats"]
+CATEGORIES = ["food", "events", "stationery"]
+STUDENT_TOKENS = 10 ** 9
+STUDENTS_PER_PARENT = 2
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def seed(db, ledger, asa_id, students, vendors, history, rng):
+    """
+    Fill an empty database: one admin, students (funded on the fake node),
+    parents linked to STUDENTS_PER_PARENT students each, vendors (the
+    first is the Campus Canteen), and `history` past payments per student
+    spread over the last 90 days.
+    """
+    from algosdk import account
+    from werkzeug.security import generate_password_hash
+    from services.key_vault import seal_key
+    from services.stats_counters import rebuild
+
+    pw_hash = generate_password_hash("benchmark")
+    db.execute(
+        "INSERT INTO users (username, password_hash, role) VALUES ('bench_admin', ?, 'admin')",
+        (pw_hash,),
+    )
+    admin_id = db.execute("SELECT id FROM users WHERE username = 'bench_admin'").fetchone()["id"]
+
+    def add_wallet_users(prefix, role, count, tokens):
+        rows = []
+        for i in range(count):
+            sk, addr = account.generate_account()
+            ledger.fund(addr, microalgos=10 ** 7, asset_id=asa_id, amount=tokens)
+            rows.append((f"{prefix}{i}", pw_hash, role, addr, seal_key(sk)))
+        db.executemany(
+            """INSERT INTO users (username, password_hash, role, algo_address, algo_key_enc)
+               VALUES (?, ?, ?, ?, ?)""",
+            rows,
+        )
+        return [
+            (r["id"], r["algo_address"]) for r in db.execute(
+                "SELECT id, algo_address FROM users WHERE role = ? ORDER BY id", (role,)
+            )
+        ]
+
+    student_rows = add_wallet_users("bench_student", "student", students, STUDENT_TOKENS)
+    vendor_users = add_wallet_users("bench_vendor", "vendor", vendors, 0)
+
+    db.executemany(
+        "INSERT INTO vendors (user_id, name, category, algo_address) VALUES (?, ?, ?, ?)",
+        [
+            (uid, "Campus Canteen" if i == 0 else f"Vendor {i}",
+             "food" if i == 0 else CATEGORIES[i % len(CATEGORIES)], addr)
+            for i, (uid, addr) in enumerate(vendor_users)
+        ],
+    )
+    vendor_rows = db.execute("SELECT id, user_id, category FROM vendors ORDER BY id").fetchall()
+
+    parent_count = math.ceil(students / STUDENTS_PER_PARENT)
+    db.executemany(
+        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, 'parent')",
+        [(f"bench_parent{i}", pw_hash) for i in range(parent_count)],
+    )
+    parent_ids = [r["id"] for r in db.execute("SELECT id FROM users WHERE role = 'parent' ORDER BY id")]
+    links = [
+        (parent_ids[i // STUDENTS_PER_PARENT], sid)
+        for i, (sid, _) in enumerate(student_rows)
+    ]
+    db.executemany("INSERT INTO parent_student (parent_id, student_id) VALUES (?, ?)", links)
+
+    now = datetime.utcnow()
+    parent_of = {sid: pid for pid, sid in links}
+    txns, spend, funding = [], {}, []
+    for sid, _ in student_rows:
+        funding.append((parent_of[sid], sid, STUDENT_TOKENS, (now - timedelta(days=90)).strftime("%Y-%m-%d %H:%M:%S")))
+        for _ in range(history):
+            vendor = rng.choice(vendor_rows)
+            amount = rng.randint(10, 300)
+            at = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            txns.append((sid, vendor["id"], amount, vendor["category"], at.strftime("%Y-%m-%d %H:%M:%S")))
+            key = (sid, vendor["category"], at.strftime("%Y-%m"))
+            spend[key] = spend.get(key, 0) + amount
+    db.executemany(
+        """INSERT INTO transactions (student_id, vendor_id, amount, category, txn_id, created_at)
+           VALUES (?, ?, ?, ?, NULL, ?)""",
+        txns,
+    )
+    db.executemany(
+        "INSERT INTO category_spending (student_id, category, month, amount) VALUES (?, ?, ?, ?)",
+        [(sid, cat, month, amount) for (sid, cat, month), amount in spend.items()],
+    )
+    db.executemany(
+        "INSERT INTO funding_log (parent_id, student_id, amount, created_at) VALUES (?, ?, ?, ?)",
+        funding,
+    )
+    # Seeded with raw inserts, so bring the /admin/stats counters in line
+    rebuild(db)
+
+    menu_ids = [r["id"] for r in db.execute("SELECT id FROM menu_items WHERE available = 1")]
+    return {
+        "admin": admin_id,
+        "students": [sid for sid, _ in student_rows],
+        "vendors": [r["user_id"] for r in vendor_rows],
+        "links": links,
+        "menu": menu_ids,
+    }
+
+
+def build_workloads(app, ids, rng):
+    """Map endpoint name -> function returning (method, path, json_body, headers)."""
+    from flask_jwt_extended import create_access_token
+
+    tokens = {}
+
+    def auth(uid, role):
+        key = (uid, role)
+        if key not in tokens:
+            with app.app_context():
+                tokens[key] = {"Authorization": "Bearer " + create_access_token(
+                    identity=str(uid), additional_claims={"role": role, "username": f"bench{uid}"},
+                )}
+        return tokens[key]
+
+    def vendor_pay():
+        return ("POST", "/api/vendor/pay",
+                {"student_id": rng.choice(ids["students"]), "amount": 1,
+                 "category": rng.choice(CATEGORIES)},
+                auth(rng.choice(ids["vendors"]), "vendor"))
+
+    def canteen_order():
+        items = [{"id": item_id, "qty": rng.randint(1, 2)}
+                 for item_id in rng.sample(ids["menu"], min(3, len(ids["menu"])))]
+        return ("POST", "/api/canteen/order", {"items": items},
+                auth(rng.choice(ids["students"]), "student"))
+
+    def parent_spending():
+        parent_id, student_id = rng.choice(ids["links"])
+        return ("GET", f"/api/parent/spending?student_id={student_id}", None,
+                auth(parent_id, "parent"))
+
+    def student_summary():
+        return ("GET", "/api/student/summary", None, auth(rng.choice(ids["students"]), "student"))
+
+    def admin_stats():
+        return ("GET", "/api/admin/stats", None, auth(ids["admin"], "admin"))
+
+    workloads = {
+        "vendor_pay": vendor_pay,
+        "canteen_order": canteen_order,
+        "parent_spending": parent_spending,
+        "student_summary": student_summary,
+        "admin_stats": admin_stats,
+    }
+    # Pre-mint every token so JWT signing isn't timed
+    for uid in ids["students"]:
+        auth(uid, "student")
+    for uid in ids["vendors"]:
+        auth(uid, "vendor")
+    for parent_id, _ in ids["links"]:
+        auth(parent_id, "parent")
+    auth(ids["admin"], "admin")
+    return workloads
+
+
+def run_endpoint(base_url, make_request, count, concurrency, warmup):
+    """Fire count requests from concurrency threads; returns the stats dict."""
+    local = threading.local()
+    # Requests are built up front: the shared RNG isn't thread-safe
+    planned = [make_request() for _ in range(warmup + count)]
+
+    def call(req):
+        method, path, body, headers = req
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            resp = session.request(method, base_url + path, json=body, headers=headers, timeout=120)
+            error = None if resp.status_code < 400 else f"HTTP {resp.status_code}: {resp.text[:200]}"
+        except requests.RequestException as e:
+            error = str(e)
+        return time.perf_counter() - started, error
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, planned[:warmup]))
+        started = time.perf_counter()
+        outcomes = list(pool.map(call, planned[warmup:]))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms * 1000.0 for ms, _ in outcomes)
+    errors = [e for _, e in outcomes if e]
+    return {
+        "requests": count,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions vs a baseline results file."""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f} → {cur['p95_ms']:.1f} ms")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} → {cur['rps']:.1f}")
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"\n{'endpoint':<18}{'reqs':>7}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          + ("  Δp95" if baseline else ""))
+    for name, r in results.items():
+        line = (f"{name:<18}{r['requests']:>7}{r['errors']:>8}{r['rps']:>10.1f}"
+                f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+        base = (baseline or {}).get("results", {}).get(name)
+        if base and base["p95_ms"]:
+            line += f"  {(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%"
+        print(line)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CampusChain hot paths")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--vendors", type=int, default=20)
+    parser.add_argument("--history", type=int, default=20, help="seeded payments per student")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--block-time", type=float, default=0.0,
+                        help="fake algod seconds per block (0 = confirm on submit)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake algod latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown vs baseline (default 0.2)")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(sorted(unknown))}")
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="campuschain-bench-")
+
+    # Fake node + throwaway admin/ASA, wired in before config is imported
+    from algosdk import account, mnemonic
+    node = start_fake_algod(block_time=args.block_time, latency_ms=args.latency_ms,
+                            jitter_ms=args.jitter_ms, seed=args.seed)
+    admin_sk, admin_addr = account.generate_account()
+    node.ledger.fund(admin_addr, microalgos=10 ** 15)
+    asa_id = node.ledger.create_asset(admin_addr, total=10 ** 15)
+    os.environ.update({
+        "DATABASE_PATH": os.path.join(workdir, "bench.db"),
+        "ALGOD_ADDRESS": node.url,
+        "ADMIN_MNEMONIC": mnemonic.from_private_key(admin_sk),
+        "ASA_ID": str(asa_id),
+        "WALLET_POOL_HIGH": "0",
+        "BALANCE_SYNC_SECONDS": "0",
+        "KEY_VAULT_SECRET": os.environ.get("KEY_VAULT_SECRET") or "benchmark-vault-secret",
+    })
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import create_app
+    from models import get_db
+
+    app = create_app()
+    print(f"Seeding {args.students} students × {args.history} payments, {args.vendors} vendors ...", flush=True)
+    db = get_db()
+    try:
+        ids = seed(db, node.ledger, asa_id, args.students, args.vendors, args.history, rng)
+    finally:
+        db.close()
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    workloads = build_workloads(app, ids, rng)
+    results = {}
+    for name in endpoints:
+        print(f"  {name} ...", flush=True)
+        results[name] = run_endpoint(base_url, workloads[name], args.requests,
+                                     args.concurrency, args.warmup)
+
+    server.shutdown()
+    node.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "async_submit": os.getenv("ASYNC_SUBMIT", "false"),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    for name, r in results.items():
+        if r["first_error"]:
+            print(f"  {name}: {r['errors']} error(s), first: {r['first_error']}")
+    print(f"\nResults written to {args.out}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,119 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# SQLite file (default: backend/campuschain.db)
+DATABASE_PATH = os.getenv("DATABASE_PATH", "")
+# SQLite tuning: seconds a writer waits for the lock, fsync level (NORMAL
+# is safe with WAL), page cache per connection, prepared-statement cache
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "5"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
+DB_CACHE_KB = int(os.getenv("DB_CACHE_KB", "16384"))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+
 # Algorand
 ALGOD_ADDRESS = os.getenv("ALGOD_ADDRESS", "https://testnet-api.algonode.cloud")
 ALGOD_TOKEN = os.getenv("ALGOD_TOKEN", "")
 
+# Optional failover list (comma-separated, same token); defaults to ALGOD_ADDRESS.
+# Reads not answered within ALGOD_HEDGE_MS are also sent to the next node;
+# a node that fails ALGOD_BREAKER_FAILURES times in a row is taken out of
+# rotation for ALGOD_BREAKER_COOLDOWN seconds.
+ALGOD_ADDRESSES = [
+    a.strip() for a in os.getenv("ALGOD_ADDRESSES", "").split(",") if a.strip()
+] or [ALGOD_ADDRESS]
+ALGOD_HEDGE_MS = float(os.getenv("ALGOD_HEDGE_MS", "300"))
+ALGOD_BREAKER_FAILURES = int(os.getenv("ALGOD_BREAKER_FAILURES", "3"))
+ALGOD_BREAKER_COOLDOWN = float(os.getenv("ALGOD_BREAKER_COOLDOWN", "30"))
+
+# algod HTTP connection pool (shared by all worker threads)
+ALGOD_POOL_SIZE = int(os.getenv("ALGOD_POOL_SIZE", "10"))
+ALGOD_CONNECT_TIMEOUT = float(os.getenv("ALGOD_CONNECT_TIMEOUT", "3"))
+ALGOD_READ_TIMEOUT = float(os.getenv("ALGOD_READ_TIMEOUT", "10"))
+
+# Suggested-params cache: refetch fee/genesis data after this many seconds.
+# ALGOD_ROUND_TIME is a conservative (slow) block-time estimate used to
+# slide the cached first/last-valid window forward between fetches.
+PARAMS_TTL_SECONDS = float(os.getenv("PARAMS_TTL_SECONDS", "30"))
+ALGOD_ROUND_TIME = float(os.getenv("ALGOD_ROUND_TIME", "4.0"))
+
 ADMIN_MNEMONIC = os.getenv("ADMIN_MNEMONIC", "")
+
+# Custodial key vault: secret for encrypting wallet keys at rest, and how
+# many decrypted signing keys to keep in the in-memory LRU. Required unless
+# SECRET_KEY is set to a real value (then the vault key derives from it);
+# empty and placeholder values are rejected at startup.
+KEY_VAULT_SECRET = os.getenv("KEY_VAULT_SECRET", "").strip()
+KEY_CACHE_SIZE = int(os.getenv("KEY_CACHE_SIZE", "1024"))
 ASA_ID = int(os.getenv("ASA_ID", "0"))
 
+# CampusVault app (contracts/deploy.py). When set, batch funding pays out
+# from the vault via fund_many instead of from the admin account.
+VAULT_APP_ID = int(os.getenv("VAULT_APP_ID", "0"))
+VAULT_RECIPIENTS_PER_CALL = 4  # accounts-array limit per app call (enforced by fund_many)
+
+# Non-blocking submission: routes return the txid immediately and the
+# confirmation tracker settles pending rows in the background.
+ASYNC_SUBMIT = os.getenv("ASYNC_SUBMIT", "false").lower() in ("1", "true", "yes")
+TRACKER_POLL_SECONDS = float(os.getenv("TRACKER_POLL_SECONDS", "1.0"))
+# Only for txns with no recorded validity window (sent before it was kept):
+# give up on them once algod has forgotten them for this many seconds.
+TXN_PENDING_TIMEOUT = float(os.getenv("TXN_PENDING_TIMEOUT", "120"))
+
+# Idempotency-Key support on /vendor/pay and /canteen/order: how long a
+# stored response is replayed, and how long a concurrent duplicate waits
+# for the in-flight original
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+# Chain follower: reconcile DB with CampusToken payments on-chain.
+# CHAIN_FOLLOW_START is where a fresh DB starts ("latest" or a round number).
+CHAIN_FOLLOWER = os.getenv("CHAIN_FOLLOWER", "true").lower() in ("1", "true", "yes")
+CHAIN_FOLLOW_START = os.getenv("CHAIN_FOLLOW_START", "latest")
+CHAIN_FOLLOW_PREFETCH = int(os.getenv("CHAIN_FOLLOW_PREFETCH", "8"))
+# Rounds to stay behind the tip so routes record their own payments first
+CHAIN_FOLLOW_LAG = int(os.getenv("CHAIN_FOLLOW_LAG", "2"))
+
+# Student → vendor payment micro-batching: payments arriving within the
+# window share atomic groups of up to PAYMENT_BATCH_SIZE (max 16).
+# A window of 0 sends every payment on its own.
+PAYMENT_BATCH_SIZE = int(os.getenv("PAYMENT_BATCH_SIZE", "16"))
+PAYMENT_BATCH_WINDOW_MS = float(os.getenv("PAYMENT_BATCH_WINDOW_MS", "20"))
+PAYMENT_BATCH_WORKERS = int(os.getenv("PAYMENT_BATCH_WORKERS", "4"))
+
+# Shadow balance ledger: every BALANCE_SYNC_SECONDS re-read up to
+# BALANCE_SYNC_BATCH of the stalest balances from algod (0 disables)
+BALANCE_SYNC_SECONDS = float(os.getenv("BALANCE_SYNC_SECONDS", "60"))
+BALANCE_SYNC_BATCH = int(os.getenv("BALANCE_SYNC_BATCH", "50"))
+
+# Wallet pool for instant registration: refill to HIGH when below LOW
+# (HIGH = 0 disables the filler). WALLET_MIN_ALGO is each wallet's
+# microALGO top-up for minimum balance + fees.
+WALLET_POOL_LOW = int(os.getenv("WALLET_POOL_LOW", "5"))
+WALLET_POOL_HIGH = int(os.getenv("WALLET_POOL_HIGH", "20"))
+WALLET_POOL_CHECK_SECONDS = float(os.getenv("WALLET_POOL_CHECK_SECONDS", "30"))
+WALLET_MIN_ALGO = int(os.getenv("WALLET_MIN_ALGO", "500000"))
+
+# Bulk student import: rows per chunk (one DB transaction each) and
+# threads used to hash passwords
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "64"))
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", "8"))
+
+# Largest batch accepted by the batch funding endpoints
+FUND_BATCH_MAX = int(os.getenv("FUND_BATCH_MAX", "5000"))
+
+# Cursor-paginated feeds (student history, canteen orders, vendor orders):
+# largest page a client may ask for with ?limit=
+FEED_MAX_PAGE_SIZE = int(os.getenv("FEED_MAX_PAGE_SIZE", "100"))
+
 # Flask
-SECRET_KEY = os.getenv("SECRET_KEY", "campuschain-dev-secret-key-change-in-prod")
+# The default is public: the key vault refuses to derive its key from it
+DEFAULT_SECRET_KEY = "campuschain-dev-secret-key-change-in-prod"
+# Public values (the default above and the .env.example placeholders) the
+# key vault never accepts as a secret
+PLACEHOLDER_SECRETS = frozenset({
+    DEFAULT_SECRET_KEY,
+    "change-this-in-production",
+    "change-this-vault-secret",
+})
+SECRET_KEY = os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY)
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "campuschain-jwt-secret")
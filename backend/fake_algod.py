@@ -0,0 +1,539 @@
+"""
+CampusChain — Fake algod for Offline Load Testing
+
+A local stand-in for an algod node, so the backend can be exercised and
+benchmarked without testnet. Point the backend at it with
+ALGOD_ADDRESS=http://127.0.0.1:4001 (any ALGOD_TOKEN is accepted).
+
+Usage:
+  python fake_algod.py
+  python fake_algod.py --block-time 1 --latency-ms 20 --jitter-ms 10
+  python fake_algod.py --block-time 0 --reject-rate 0.01 --drop-rate 0.01
+
+Implemented endpoints (what the SDK calls behind account_info,
+suggested_params, send_transaction(s), pending_transaction_info,
+status, status_after_block and block_info):
+  GET  /v2/accounts/{address}
+  GET  /v2/transactions/params
+  POST /v2/transactions
+  GET  /v2/transactions/pending/{txid}
+  GET  /v2/status
+  GET  /v2/status/wait-for-block-after/{round}
+  GET  /v2/blocks/{round}                 (json or msgpack)
+  POST /fake/fund                         {"address", "microalgos", "amount"}
+  POST /fake/faults                       {"error_rate", "reject_rate", "drop_rate", ...}
+
+The ledger is in memory: ALGO balances, ASA holdings (opt-in required),
+ASA / app creation and the CampusVault fund_many call. Groups are applied
+all-or-nothing and confirmed in the next block (every --block-time
+seconds; 0 = confirm on submit). Signatures and fees are not checked.
+
+Fault injection:
+  --latency-ms / --jitter-ms   added to every request
+  --error-rate                 fraction of requests answered with HTTP 503
+  --reject-rate                fraction of submissions rejected with HTTP 400
+  --drop-rate                  fraction of accepted submissions that never
+                               confirm (pool-error set at the next block)
+
+Can also be started in-process (e.g. by a benchmark) with
+start_fake_algod(port=0), which returns a FakeAlgod with .url and .ledger.
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import msgpack
+from algosdk import encoding, logic
+
+GENESIS_ID = "fakenet-v1"
+GENESIS_HASH = base64.b64encode(hashlib.sha256(b"campuschain-fakenet").digest()).decode()
+MIN_FEE = 1000
+# Longest a wait-for-block-after call is held open (real algod: ~1 min)
+MAX_BLOCK_WAIT = 30.0
+
+_MISSING = object()
+
+
+class FakeAlgodError(Exception):
+    """A request algod would answer with a 4xx/5xx."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class FakeLedger:
+    """In-memory accounts, assets, txn pool and blocks."""
+
+    def __init__(self, block_time=2.8, error_rate=0.0, reject_rate=0.0,
+                 drop_rate=0.0, latency_ms=0, jitter_ms=0, seed=None):
+        self.block_time = block_time
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.drop_rate = drop_rate
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+
+        self.round = 1
+        self.last_round_at = time.monotonic()
+        self.accounts = {}
+        self.assets = {}
+        self.next_index = 1000
+        self.pool = []        # [(txid, signed_dict, drop)]
+        self.pending = {}     # txid -> pending_transaction_info response
+        self.blocks = {1: {"ts": int(time.time()), "txns": []}}
+        self.stats = {"submitted": 0, "rejected": 0, "dropped": 0, "confirmed": 0}
+        self._cond = threading.Condition()
+
+    # --- seeding ----------------------------------------------------------
+
+    def _account(self, address, journal=None):
+        acct = self.accounts.get(address)
+        if acct is None:
+            acct = {"amount": 0, "assets": {}}
+            self._set(journal, self.accounts, address, acct)
+        return acct
+
+    def create_asset(self, creator, total, asset_id=None, decimals=0,
+                     unit_name="CAMPUS", asset_name="CampusToken"):
+        """Create an ASA held entirely by creator. Returns its id."""
+        with self._cond:
+            asset_id = asset_id or self._next_index()
+            self.next_index = max(self.next_index, asset_id + 1)
+            self.assets[asset_id] = {
+                "creator": creator, "total": total, "decimals": decimals,
+                "unit-name": unit_name, "name": asset_name,
+            }
+            self._account(creator)["assets"][asset_id] = total
+            return asset_id
+
+    def fund(self, address, microalgos=0, asset_id=None, amount=0):
+        """Credit ALGO and/or an ASA to address out of thin air (opts it in)."""
+        with self._cond:
+            acct = self._account(address)
+            acct["amount"] += microalgos
+            if asset_id:
+                acct["assets"][asset_id] = acct["assets"].get(asset_id, 0) + amount
+
+    def set_faults(self, **faults):
+        with self._cond:
+            for key in ("error_rate", "reject_rate", "drop_rate",
+                        "latency_ms", "jitter_ms", "block_time"):
+                if key in faults:
+                    setattr(self, key, float(faults[key]))
+
+    def _next_index(self):
+        index = self.next_index
+        self.next_index += 1
+        return index
+
+    # --- reads ------------------------------------------------------------
+
+    def account_info(self, address):
+        if not encoding.is_valid_address(address):
+            raise FakeAlgodError("failed to parse the address")
+        with self._cond:
+            acct = self.accounts.get(address, {"amount": 0, "assets": {}})
+            return {
+                "address": address,
+                "amount": acct["amount"],
+                "amount-without-pending-rewards": acct["amount"],
+                "assets": [
+                    {"asset-id": aid, "amount": amt, "is-frozen": False}
+                    for aid, amt in acct["assets"].items()
+                ],
+                "round": self.round,
+                "status": "Offline",
+            }
+
+    def params(self):
+        with self._cond:
+            return {
+                "consensus-version": "future",
+                "fee": 0,
+                "genesis-hash": GENESIS_HASH,
+                "genesis-id": GENESIS_ID,
+                "last-round": self.round,
+                "min-fee": MIN_FEE,
+            }
+
+    def status(self):
+        with self._cond:
+            since = int((time.monotonic() - self.last_round_at) * 1e9)
+            return {
+                "last-round": self.round,
+                "time-since-last-round": since,
+                "catchup-time": 0,
+                "last-version": "future",
+                "next-version": "future",
+                "next-version-round": self.round + 1,
+                "next-version-supported": True,
+                "stopped-at-unsupported-round": False,
+            }
+
+    def wait_for_block_after(self, rnd, timeout=MAX_BLOCK_WAIT):
+        with self._cond:
+            self._cond.wait_for(lambda: self.round > rnd, timeout)
+        return self.status()
+
+    def pending_info(self, txid):
+        with self._cond:
+            info = self.pending.get(txid)
+            if info is None:
+                raise FakeAlgodError("txn does not exist", status=404)
+            return dict(info)
+
+    def block(self, rnd):
+        with self._cond:
+            blk = self.blocks.get(rnd)
+            if blk is None:
+                raise FakeAlgodError(f"failed to retrieve information from the ledger: round {rnd}", 404)
+            return {"block": {
+                "rnd": rnd,
+                "ts": blk["ts"],
+                "gen": GENESIS_ID,
+                "gh": base64.b64decode(GENESIS_HASH),
+                "txns": list(blk["txns"]),
+            }}
+
+    # --- writes -----------------------------------------------------------
+
+    def submit(self, raw):
+        """Apply a msgpack-encoded txn or group. Returns the first txid."""
+        try:
+            dicts = list(msgpack.Unpacker(io.BytesIO(raw), raw=False, strict_map_key=False))
+            signed = [encoding.msgpack_decode(d) for d in dicts]
+        except Exception as e:
+            raise FakeAlgodError(f"failed to decode transaction: {e}")
+        if not signed:
+            raise FakeAlgodError("empty transaction group")
+
+        with self._cond:
+            self.stats["submitted"] += len(signed)
+            if self._random.random() < self.reject_rate:
+                self.stats["rejected"] += len(signed)
+                raise FakeAlgodError("TransactionPool.Remember: injected rejection")
+
+            journal = []
+            infos = []
+            try:
+                for stxn in signed:
+                    infos.append(self._apply(stxn, journal))
+            except FakeAlgodError:
+                self._rollback(journal)
+                self.stats["rejected"] += len(signed)
+                raise
+
+            drop = self._random.random() < self.drop_rate
+            for d, stxn, info in zip(dicts, signed, infos):
+                txid = stxn.get_txid()
+                info.update({"confirmed-round": 0, "pool-error": ""})
+                self.pending[txid] = info
+                self.pool.append((txid, d, drop))
+            if drop:
+                # A dropped group never lands, so its effects are undone now
+                self._rollback(journal)
+
+        if self.block_time <= 0:
+            self.produce_block()
+        return signed[0].get_txid()
+
+    def produce_block(self):
+        with self._cond:
+            self.round += 1
+            self.last_round_at = time.monotonic()
+            txns = []
+            for txid, d, drop in self.pool:
+                if drop:
+                    self.pending[txid]["pool-error"] = "transaction dropped (injected)"
+                    self.stats["dropped"] += 1
+                else:
+                    self.pending[txid]["confirmed-round"] = self.round
+                    self.stats["confirmed"] += 1
+                    txns.append(_in_block(d))
+            self.pool = []
+            self.blocks[self.round] = {"ts": int(time.time()), "txns": txns}
+            self._cond.notify_all()
+
+    def _apply(self, stxn, journal):
+        txn = stxn.transaction
+        txid = stxn.get_txid()
+        next_round = self.round + 1
+        if txid in self.pending:
+            raise FakeAlgodError(f"transaction already in ledger: {txid}")
+        if not txn.first_valid_round <= next_round <= txn.last_valid_round:
+            raise FakeAlgodError(
+                f"txn dead: round {next_round} outside of "
+                f"{txn.first_valid_round}--{txn.last_valid_round}"
+            )
+        if txn.genesis_hash and txn.genesis_hash != GENESIS_HASH:
+            raise FakeAlgodError("transaction genesis hash does not match this network")
+
+        self._move_algo(txn.sender, None, txn.fee, journal)
+        info = {"txn": {"txn": {"type": txn.type, "snd": txn.sender}}}
+
+        if txn.type == "pay":
+            self._move_algo(txn.sender, txn.receiver, txn.amt, journal)
+        elif txn.type == "axfer":
+            if txn.amount == 0 and txn.sender == txn.receiver:
+                if txn.index not in self.assets:
+                    raise FakeAlgodError(f"asset {txn.index} does not exist or has been deleted")
+                holdings = self._account(txn.sender, journal)["assets"]
+                if txn.index not in holdings:
+                    self._set(journal, holdings, txn.index, 0)
+            else:
+                self._move_asset(txn.index, txn.sender, txn.receiver, txn.amount, journal)
+        elif txn.type == "acfg" and not txn.index:
+            asset_id = self._next_index()
+            self._set(journal, self.assets, asset_id, {
+                "creator": txn.sender, "total": txn.total, "decimals": txn.decimals,
+                "unit-name": txn.unit_name, "name": txn.asset_name,
+            })
+            self._set(journal, self._account(txn.sender, journal)["assets"], asset_id, txn.total)
+            info["asset-index"] = asset_id
+        elif txn.type == "appl" and not txn.index:
+            info["application-index"] = self._next_index()
+        elif txn.type == "appl" and txn.app_args and txn.app_args[0] == b"fund_many":
+            # CampusVault.fund_many: pay args[i] tokens to accounts[i] from the app account
+            app_addr = logic.get_application_address(txn.index)
+            asset_id = (txn.foreign_assets or [0])[0]
+            for receiver, arg in zip(txn.accounts or [], txn.app_args[1:]):
+                self._move_asset(asset_id, app_addr, receiver, int.from_bytes(arg, "big"), journal)
+        # Other types/calls are accepted as no-ops
+        return info
+
+    def _move_algo(self, sender, receiver, amount, journal):
+        acct = self._account(sender, journal)
+        if acct["amount"] < amount:
+            raise FakeAlgodError(
+                f"overspend (account {sender}, data {{balance: {acct['amount']}}}, tried to spend {amount})"
+            )
+        self._set(journal, acct, "amount", acct["amount"] - amount)
+        if receiver:
+            dest = self._account(receiver, journal)
+            self._set(journal, dest, "amount", dest["amount"] + amount)
+
+    def _move_asset(self, asset_id, sender, receiver, amount, journal):
+        src = self._account(sender, journal)["assets"]
+        dest = self._account(receiver, journal)["assets"]
+        if asset_id not in src:
+            raise FakeAlgodError(f"asset {asset_id} missing from {sender}")
+        if asset_id not in dest:
+            raise FakeAlgodError(f"asset {asset_id} missing from {receiver}")
+        if src[asset_id] < amount:
+            raise FakeAlgodError(
+                f"underflow on subtracting {amount} from sender amount {src[asset_id]}"
+            )
+        self._set(journal, src, asset_id, src[asset_id] - amount)
+        self._set(journal, dest, asset_id, dest[asset_id] + amount)
+
+    @staticmethod
+    def _set(journal, container, key, value):
+        if journal is not None:
+            journal.append((container, key, container.get(key, _MISSING)))
+        container[key] = value
+
+    @staticmethod
+    def _rollback(journal):
+        for container, key, old in reversed(journal):
+            if old is _MISSING:
+                container.pop(key, None)
+            else:
+                container[key] = old
+        journal.clear()
+
+
+def _in_block(signed_dict):
+    """SignedTxnInBlock form: genesis id/hash stripped and flagged."""
+    d = dict(signed_dict)
+    txn = dict(d["txn"])
+    if txn.pop("gen", None):
+        d["hgi"] = True
+    txn.pop("gh", None)
+    d["hgh"] = True
+    d["txn"] = txn
+    return d
+
+
+def _jsonable(obj):
+    if isinstance(obj, bytes):
+        return base64.b64encode(obj).decode()
+    if isinstance(obj, dict):
+        return {k: _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_jsonable(v) for v in obj]
+    return obj
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like a real node
+    ledger = None
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _dispatch(self, method):
+        ledger = self.ledger
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        delay = ledger.latency_ms + ledger._random.uniform(0, ledger.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        try:
+            if parts == ["health"]:
+                return self._send({})
+            if ledger._random.random() < ledger.error_rate:
+                raise FakeAlgodError("injected failure", status=503)
+
+            if method == "GET" and parts[:2] == ["v2", "accounts"] and len(parts) == 3:
+                return self._send(ledger.account_info(parts[2]))
+            if method == "GET" and parts == ["v2", "transactions", "params"]:
+                return self._send(ledger.params())
+            if method == "POST" and parts == ["v2", "transactions"]:
+                return self._send({"txId": ledger.submit(body)})
+            if method == "GET" and parts[:3] == ["v2", "transactions", "pending"] and len(parts) == 4:
+                return self._send(ledger.pending_info(parts[3]))
+            if method == "GET" and parts == ["v2", "status"]:
+                return self._send(ledger.status())
+            if method == "GET" and parts[:3] == ["v2", "status", "wait-for-block-after"] and len(parts) == 4:
+                return self._send(ledger.wait_for_block_after(int(parts[3])))
+            if method == "GET" and parts[:2] == ["v2", "blocks"] and len(parts) == 3:
+                blk = ledger.block(int(parts[2]))
+                if query.get("format", ["json"])[0] == "msgpack":
+                    return self._send_raw(msgpack.packb(blk, use_bin_type=True), "application/msgpack")
+                return self._send(_jsonable(blk))
+
+            if method == "POST" and parts == ["fake", "fund"]:
+                req = json.loads(body or b"{}")
+                ledger.fund(req["address"], req.get("microalgos", 0),
+                            req.get("asset_id"), req.get("amount", 0))
+                return self._send({})
+            if method == "POST" and parts == ["fake", "faults"]:
+                ledger.set_faults(**json.loads(body or b"{}"))
+                return self._send({})
+            if method == "GET" and parts == ["fake", "stats"]:
+                with ledger._cond:
+                    return self._send(dict(ledger.stats, round=ledger.round))
+
+            raise FakeAlgodError(f"no route for {method} {url.path}", status=404)
+        except FakeAlgodError as e:
+            self._send({"message": str(e)}, e.status)
+        except (ValueError, KeyError) as e:
+            self._send({"message": f"bad request: {e}"}, 400)
+
+    def _send(self, payload, status=200):
+        self._send_raw(json.dumps(payload).encode(), "application/json", status)
+
+    def _send_raw(self, data, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeAlgod:
+    """A running fake node: HTTP server thread + block producer thread."""
+
+    def __init__(self, host="127.0.0.1", port=4001, **ledger_kwargs):
+        self.ledger = FakeLedger(**ledger_kwargs)
+        handler = type("FakeAlgodHandler", (_Handler,), {"ledger": self.ledger})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="fake-algod", daemon=True).start()
+        threading.Thread(target=self._produce_blocks, name="fake-algod-blocks", daemon=True).start()
+        return self
+
+    def _produce_blocks(self):
+        while not self._stop.is_set():
+            block_time = self.ledger.block_time
+            if block_time <= 0:
+                # Blocks are cut on submit; just idle until reconfigured
+                self._stop.wait(0.5)
+                continue
+            if not self._stop.wait(block_time):
+                self.ledger.produce_block()
+
+    def stop(self):
+        self._stop.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_fake_algod(host="127.0.0.1", port=0, **ledger_kwargs):
+    """Start a fake node in this process (port=0 picks a free port)."""
+    return FakeAlgod(host, port, **ledger_kwargs).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake algod node for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4001)
+    parser.add_argument("--block-time", type=float, default=2.8,
+                        help="seconds per block (0 = confirm on submit)")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reject-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, help="random seed for jitter and faults")
+    parser.add_argument("--fund", action="append", default=[], metavar="ADDRESS",
+                        help="extra address to pre-fund with ALGO (repeatable)")
+    args = parser.parse_args()
+
+    from config import ADMIN_MNEMONIC, ASA_ID
+    from algosdk import account, mnemonic
+
+    node = FakeAlgod(
+        args.host, args.port, block_time=args.block_time,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, reject_rate=args.reject_rate,
+        drop_rate=args.drop_rate, seed=args.seed,
+    )
+
+    try:
+        admin_addr = account.address_from_private_key(mnemonic.to_private_key(ADMIN_MNEMONIC))
+    except Exception:
+        admin_addr = None
+        print("Warning: ADMIN_MNEMONIC is not a valid mnemonic — admin account not seeded")
+    if admin_addr:
+        node.ledger.fund(admin_addr, microalgos=10 ** 15)
+        asa_id = node.ledger.create_asset(admin_addr, total=10 ** 12, asset_id=ASA_ID or None)
+        print(f"Admin {admin_addr} funded; CampusToken ASA_ID={asa_id}")
+    for addr in args.fund:
+        node.ledger.fund(addr, microalgos=10 ** 12)
+
+    node.start()
+    print(f"Fake algod listening — set ALGOD_ADDRESS={node.url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        node.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+CampusChain — Bulk Student Import CLI
+
+Usage:
+  python import_students.py students.csv
+  python import_students.py students.ndjson
+  python import_students.py --resume JOB_ID
+
+Input columns / keys: username, password. Progress is printed after
+every chunk; if the import is interrupted, re-run with --resume and the
+job id it printed to continue where it stopped.
+"""
+
+import argparse
+import os
+import sys
+
+from models import get_db, init_db
+from services.bulk_import import InvalidImport, create_job, run_job
+
+
+def print_progress(job):
+    print(
+        f"job {job['id']}: {job['processed']}/{job['total']} rows "
+        f"({job['imported']} imported)",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import students from CSV or NDJSON")
+    parser.add_argument("path", nargs="?", help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"],
+                        help="input format (default: from file extension)")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID",
+                        help="resume an interrupted import job")
+    args = parser.parse_args()
+
+    init_db()
+
+    if args.resume:
+        job_id = args.resume
+    else:
+        if not args.path:
+            parser.error("a file path or --resume JOB_ID is required")
+        fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+        db = get_db()
+        try:
+            job_id = create_job(db, os.path.basename(args.path), fmt, text)
+        except InvalidImport as e:
+            sys.exit(f"Error: {e}")
+        finally:
+            db.close()
+        print(f"Created import job {job_id}")
+
+    try:
+        job = run_job(job_id, progress=print_progress)
+    except Exception as e:
+        sys.exit(f"Import stopped: {e}\nResume with: python import_students.py --resume {job_id}")
+
+    print(f"Done: {job['imported']} students imported, "
+          f"{job['total'] - job['imported']} already existed")
+
+
+if __name__ == "__main__":
+    main()
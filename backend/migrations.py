@@ -0,0 +1,396 @@
+"""
+CampusChain Backend — Schema Migrations
+
+The schema version lives in the database file itself (PRAGMA
+user_version). migrate() applies only the steps above that version, in
+order, bumping user_version after each one. When the database is
+already current it does nothing but read that pragma, so a normal boot
+no longer replays the whole CREATE TABLE script.
+
+To change the schema, append a step to MIGRATIONS; never edit one that
+has shipped. Steps must be safe to re-run (IF NOT EXISTS, add_column),
+because a crash between a step and its version bump re-applies it on
+the next start. New indexes and nullable or defaulted columns can be
+added to a live database this way.
+
+A database created before migrations existed reports version 0. Step 1
+is written to bring it up to date without touching existing data.
+
+Run directly to migrate the configured database:
+    python migrations.py
+"""
+
+SEED_MENU = [
+    ("Samosa", 15, "snacks", "🥟"),
+    ("Vada Pav", 20, "snacks", "🍔"),
+    ("Masala Dosa", 45, "food", "🥞"),
+    ("Paneer Roll", 50, "food", "🌯"),
+    ("Chicken Biryani", 90, "food", "🍛"),
+    ("Veg Thali", 70, "food", "🍱"),
+    ("Chai", 10, "beverages", "☕"),
+    ("Cold Coffee", 40, "beverages", "🧋"),
+    ("Fresh Lime Soda", 25, "beverages", "🍋"),
+    ("Maggi", 30, "snacks", "🍜"),
+    ("French Fries", 35, "snacks", "🍟"),
+    ("Sandwich", 40, "food", "🥪"),
+]
+
+
+def add_column(conn, table, column, decl):
+    """Add a column to an existing table if an older DB doesn't have it yet."""
+    columns = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _base_schema(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL CHECK(role IN ('student', 'parent', 'vendor', 'admin')),
+            algo_address TEXT,
+            algo_mnemonic TEXT,  -- legacy plaintext; sealed into algo_key_enc at startup
+            algo_key_enc TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS parent_student (
+            parent_id INTEGER NOT NULL REFERENCES users(id),
+            student_id INTEGER NOT NULL REFERENCES users(id),
+            PRIMARY KEY (parent_id, student_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS vendors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            name TEXT NOT NULL,
+            category TEXT NOT NULL CHECK(category IN ('food', 'events', 'stationery')),
+            algo_address TEXT NOT NULL
+        );
+
+        -- AGGREGATED spending — no individual txn details for parent view
+        CREATE TABLE IF NOT EXISTS category_spending (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES users(id),
+            category TEXT NOT NULL CHECK(category IN ('food', 'events', 'stationery')),
+            month TEXT NOT NULL,  -- format: YYYY-MM
+            amount INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(student_id, category, month)
+        );
+
+        CREATE TABLE IF NOT EXISTS funding_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            parent_id INTEGER NOT NULL REFERENCES users(id),
+            student_id INTEGER NOT NULL REFERENCES users(id),
+            amount INTEGER NOT NULL,
+            txn_id TEXT,
+            status TEXT NOT NULL DEFAULT 'confirmed',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Individual transactions stored for student view, never exposed to parents
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES users(id),
+            vendor_id INTEGER REFERENCES vendors(id),
+            amount INTEGER NOT NULL,
+            category TEXT NOT NULL CHECK(category IN ('food', 'events', 'stationery')),
+            txn_id TEXT,
+            status TEXT NOT NULL DEFAULT 'confirmed',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Canteen menu items (pre-seeded)
+        CREATE TABLE IF NOT EXISTS menu_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price INTEGER NOT NULL,
+            category TEXT NOT NULL CHECK(category IN ('food', 'beverages', 'snacks')),
+            emoji TEXT NOT NULL DEFAULT '🍽️',
+            available INTEGER NOT NULL DEFAULT 1
+        );
+
+        -- Student orders
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES users(id),
+            vendor_id INTEGER REFERENCES vendors(id),
+            total_amount INTEGER NOT NULL,
+            txn_id TEXT,
+            status TEXT NOT NULL DEFAULT 'completed',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Line items per order
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL REFERENCES orders(id),
+            menu_item_id INTEGER NOT NULL REFERENCES menu_items(id),
+            quantity INTEGER NOT NULL DEFAULT 1,
+            price INTEGER NOT NULL
+        );
+
+        -- Wallets already funded with ALGO and opted into CampusToken,
+        -- claimed by /auth/register
+        CREATE TABLE IF NOT EXISTS wallet_pool (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            algo_address TEXT UNIQUE NOT NULL,
+            algo_key_enc TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Bulk student imports (source kept so an interrupted job can resume)
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_name TEXT,
+            format TEXT NOT NULL CHECK(format IN ('csv', 'ndjson')),
+            source TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            processed INTEGER NOT NULL DEFAULT 0,
+            imported INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Shadow ledger of CampusToken balances (synced with algod periodically)
+        CREATE TABLE IF NOT EXISTS token_balances (
+            address TEXT PRIMARY KEY,
+            balance INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            synced_at TIMESTAMP
+        );
+
+        -- Idempotency-Key replay cache for /vendor/pay and /canteen/order
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            scope TEXT NOT NULL,         -- user:method:path
+            idem_key TEXT NOT NULL,
+            request_hash TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'in_flight' CHECK(status IN ('in_flight', 'done')),
+            response_status INTEGER,
+            response_body TEXT,
+            response_type TEXT,
+            expires_at INTEGER NOT NULL,  -- unix seconds
+            PRIMARY KEY (scope, idem_key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+
+        -- Last round applied by the chain follower
+        CREATE TABLE IF NOT EXISTS chain_checkpoint (
+            name TEXT PRIMARY KEY,
+            round INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # Columns added after the first release (pending/confirmed/failed tracking)
+    add_column(conn, "transactions", "status", "TEXT NOT NULL DEFAULT 'confirmed'")
+    add_column(conn, "funding_log", "status", "TEXT NOT NULL DEFAULT 'confirmed'")
+    add_column(conn, "users", "algo_key_enc", "TEXT")
+
+
+def _txid_indexes(conn):
+    # txid lookups (tracker, chain follower); one transactions row per txid
+    # lets the follower insert payments it finds on-chain idempotently
+    conn.executescript("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_txn_id
+            ON transactions(txn_id) WHERE txn_id IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_orders_txn_id ON orders(txn_id);
+        CREATE INDEX IF NOT EXISTS idx_funding_log_txn_id ON funding_log(txn_id);
+    """)
+
+
+def _history_indexes(conn):
+    # Per-student / per-vendor history in time order (summaries, order lists)
+    # and the joins behind them, so none of them scan the whole table
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_student_created
+            ON transactions(student_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_funding_log_student_created
+            ON funding_log(student_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_orders_student_created ON orders(student_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_orders_vendor_created ON orders(vendor_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id);
+        CREATE INDEX IF NOT EXISTS idx_vendors_user ON vendors(user_id);
+    """)
+
+
+def _seed_menu(conn):
+    # Older databases were seeded at startup already; leave their menu alone
+    if conn.execute("SELECT 1 FROM menu_items LIMIT 1").fetchone() is None:
+        conn.executemany(
+            "INSERT INTO menu_items (name, price, category, emoji) VALUES (?, ?, ?, ?)",
+            SEED_MENU,
+        )
+
+
+def _stats_counters(conn):
+    from services.stats_counters import rebuild
+
+    conn.executescript("""
+        -- Single-row running totals behind /admin/stats
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            students INTEGER NOT NULL DEFAULT 0,
+            parents INTEGER NOT NULL DEFAULT 0,
+            vendors INTEGER NOT NULL DEFAULT 0,
+            total_funded INTEGER NOT NULL DEFAULT 0,
+            total_transactions INTEGER NOT NULL DEFAULT 0,
+            spent_food INTEGER NOT NULL DEFAULT 0,
+            spent_events INTEGER NOT NULL DEFAULT 0,
+            spent_stationery INTEGER NOT NULL DEFAULT 0,
+            rebuilt_at TIMESTAMP
+        );
+    """)
+    rebuild(conn)
+
+
+def _daily_rollups(conn):
+    conn.executescript("""
+        -- Per-day totals behind /admin/analytics (services/rollups.py)
+        CREATE TABLE IF NOT EXISTS daily_category_spend (
+            day TEXT NOT NULL,  -- YYYY-MM-DD (UTC)
+            category TEXT NOT NULL,
+            amount INTEGER NOT NULL DEFAULT 0,
+            txns INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, category)
+        );
+        CREATE TABLE IF NOT EXISTS daily_vendor_sales (
+            day TEXT NOT NULL,
+            vendor_id INTEGER NOT NULL REFERENCES vendors(id),
+            amount INTEGER NOT NULL DEFAULT 0,
+            txns INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, vendor_id)
+        );
+        CREATE TABLE IF NOT EXISTS daily_funding (
+            day TEXT PRIMARY KEY,
+            amount INTEGER NOT NULL DEFAULT 0,
+            fundings INTEGER NOT NULL DEFAULT 0
+        );
+
+        -- Backfill from history; failed payments/fundings never count
+        DELETE FROM daily_category_spend;
+        INSERT INTO daily_category_spend (day, category, amount, txns)
+            SELECT date(created_at), category, SUM(amount), COUNT(*) FROM transactions
+            WHERE status != 'failed' GROUP BY date(created_at), category;
+        DELETE FROM daily_vendor_sales;
+        INSERT INTO daily_vendor_sales (day, vendor_id, amount, txns)
+            SELECT date(created_at), vendor_id, SUM(amount), COUNT(*) FROM transactions
+            WHERE status != 'failed' AND vendor_id IS NOT NULL GROUP BY date(created_at), vendor_id;
+        DELETE FROM daily_funding;
+        INSERT INTO daily_funding (day, amount, fundings)
+            SELECT date(created_at), SUM(amount), COUNT(*) FROM funding_log
+            WHERE status != 'failed' GROUP BY date(created_at);
+    """)
+
+
+def _menu_version(conn):
+    conn.executescript("""
+        -- Bumped on every menu write; invalidates the in-process menu cache
+        CREATE TABLE IF NOT EXISTS menu_version (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            version INTEGER NOT NULL DEFAULT 1
+        );
+        INSERT OR IGNORE INTO menu_version (id) VALUES (1);
+    """)
+
+
+def _txn_validity(conn):
+    conn.executescript("""
+        -- Validity window of every txn sent; lets the tracker decide failure by round
+        CREATE TABLE IF NOT EXISTS txn_validity (
+            txn_id TEXT PRIMARY KEY,
+            first_valid INTEGER NOT NULL,
+            last_valid INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def _hashed_import_sources(conn):
+    # import_jobs.source used to hold the uploaded text, plaintext
+    # passwords included; new jobs store password hashes instead
+    add_column(conn, "import_jobs", "hashed", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute("UPDATE import_jobs SET source = '' WHERE status = 'completed'")
+
+
+def _pending_indexes(conn):
+    # The confirmation tracker and txn_validity.purge_old look up pending
+    # txids every poll; these stay as small as the pending set
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_pending
+            ON transactions(txn_id, created_at) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS idx_orders_pending
+            ON orders(txn_id, created_at) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS idx_funding_log_pending
+            ON funding_log(txn_id, created_at) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS idx_txn_validity_created ON txn_validity(created_at);
+    """)
+
+
+def _balance_sync_indexes(conn):
+    # The balance sync reads the stalest ledger entries, skipping addresses
+    # with pending transactions
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_token_balances_synced ON token_balances(synced_at);
+        CREATE INDEX IF NOT EXISTS idx_transactions_pending_parties
+            ON transactions(student_id, vendor_id) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS idx_funding_log_pending_student
+            ON funding_log(student_id) WHERE status = 'pending';
+    """)
+
+
+# (version, description, step) — append only
+MIGRATIONS = [
+    (1, "base schema", _base_schema),
+    (2, "txid indexes", _txid_indexes),
+    (3, "history indexes", _history_indexes),
+    (4, "seed canteen menu", _seed_menu),
+    (5, "stats counters", _stats_counters),
+    (6, "daily rollups", _daily_rollups),
+    (7, "menu version", _menu_version),
+    (8, "txn validity windows", _txn_validity),
+    (9, "hashed import sources", _hashed_import_sources),
+    (10, "pending status indexes", _pending_indexes),
+    (11, "balance sync indexes", _balance_sync_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations. Returns the list of versions applied."""
+    current = schema_version(conn)
+    if current >= LATEST_VERSION:
+        return []
+
+    # Persistent for the database file: readers no longer block on writers
+    conn.execute("PRAGMA journal_mode = WAL")
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        step(conn)
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+        print(f"Migration {version} applied: {description}")
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from models import DB_PATH, connect
+    db = connect()
+    try:
+        before = schema_version(db)
+        migrate(db)
+        print(f"{DB_PATH}: schema version {before} -> {schema_version(db)}")
+    finally:
+        db.close()
@@ -1,138 +1,74 @@
 """
 CampusChain Backend — Database Models (SQLite)
 
-CUSTODIAL MODEL: The backend stores wallet mnemonics and signs all
+CUSTODIAL MODEL: The backend stores wallet keys (encrypted) and signs all
 transactions on behalf of users. No user ever needs crypto or wallet software.
 """
 
 import sqlite3
 import os
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "campuschain.db")
+from flask import g, has_app_context
 
+from config import (
+    DATABASE_PATH, DB_BUSY_TIMEOUT, DB_SYNCHRONOUS, DB_CACHE_KB, DB_STATEMENT_CACHE,
+)
+from migrations import migrate
 
-def get_db():
-    """Get a database connection."""
-    conn = sqlite3.connect(DB_PATH)
+DB_PATH = DATABASE_PATH or os.path.join(os.path.dirname(__file__), "campuschain.db")
+
+
+def connect():
+    """
+    Open a new tuned connection. WAL (set once in init_db) lets readers
+    run alongside the pay path's writes; writers wait up to
+    DB_BUSY_TIMEOUT for the lock instead of failing.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT,
+                           cached_statements=DB_STATEMENT_CACHE)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(f"""
+        PRAGMA foreign_keys = ON;
+        PRAGMA synchronous = {DB_SYNCHRONOUS};
+        PRAGMA cache_size = -{DB_CACHE_KB};
+        PRAGMA temp_store = MEMORY;
+    """)
     return conn
 
 
-def init_db():
-    """Initialize the database schema."""
-    conn = get_db()
-    conn.executescript("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL CHECK(role IN ('student', 'parent', 'vendor', 'admin')),
-            algo_address TEXT,
-            algo_mnemonic TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS parent_student (
-            parent_id INTEGER NOT NULL REFERENCES users(id),
-            student_id INTEGER NOT NULL REFERENCES users(id),
-            PRIMARY KEY (parent_id, student_id)
-        );
-
-        CREATE TABLE IF NOT EXISTS vendors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL REFERENCES users(id),
-            name TEXT NOT NULL,
-            category TEXT NOT NULL CHECK(category IN ('food', 'events', 'stationery')),
-            algo_address TEXT NOT NULL
-        );
-
-        -- AGGREGATED spending — no individual txn details for parent view
-        CREATE TABLE IF NOT EXISTS category_spending (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_id INTEGER NOT NULL REFERENCES users(id),
-            category TEXT NOT NULL CHECK(category IN ('food', 'events', 'stationery')),
-            month TEXT NOT NULL,  -- format: YYYY-MM
-            amount INTEGER NOT NULL DEFAULT 0,
-            UNIQUE(student_id, category, month)
-        );
-
-        CREATE TABLE IF NOT EXISTS funding_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            parent_id INTEGER NOT NULL REFERENCES users(id),
-            student_id INTEGER NOT NULL REFERENCES users(id),
-            amount INTEGER NOT NULL,
-            txn_id TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Individual transactions stored for student view, never exposed to parents
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_id INTEGER NOT NULL REFERENCES users(id),
-            vendor_id INTEGER REFERENCES vendors(id),
-            amount INTEGER NOT NULL,
-            category TEXT NOT NULL CHECK(category IN ('food', 'events', 'stationery')),
-            txn_id TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Canteen menu items (pre-seeded)
-        CREATE TABLE IF NOT EXISTS menu_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            price INTEGER NOT NULL,
-            category TEXT NOT NULL CHECK(category IN ('food', 'beverages', 'snacks')),
-            emoji TEXT NOT NULL DEFAULT '🍽️',
-            available INTEGER NOT NULL DEFAULT 1
-        );
-
-        -- Student orders
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_id INTEGER NOT NULL REFERENCES users(id),
-            vendor_id INTEGER REFERENCES vendors(id),
-            total_amount INTEGER NOT NULL,
-            txn_id TEXT,
-            status TEXT NOT NULL DEFAULT 'completed',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Line items per order
-        CREATE TABLE IF NOT EXISTS order_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER NOT NULL REFERENCES orders(id),
-            menu_item_id INTEGER NOT NULL REFERENCES menu_items(id),
-            quantity INTEGER NOT NULL DEFAULT 1,
-            price INTEGER NOT NULL
-        );
-    """)
+def get_db():
+    """
+    Get a database connection.
+
+    Inside a Flask request (app context) this is one connection per
+    request, closed by close_db() at teardown; routes don't close it.
+    Elsewhere (background threads, CLIs) it is a new connection that the
+    caller closes.
+    """
+    if has_app_context():
+        if "db" not in g:
+            g.db = connect()
+        return g.db
+    return connect()
+
+
+def close_db(exc=None):
+    """App-context teardown: close the request's connection, if one was opened."""
+    db = g.pop("db", None)
+    if db is not None:
+        # Anything a failed request left uncommitted is discarded
+        db.rollback()
+        db.close()
 
-    # Seed canteen menu items (only if table is empty)
-    existing = conn.execute("SELECT COUNT(*) as c FROM menu_items").fetchone()
-    if existing["c"] == 0:
-        menu_items = [
-            ("Samosa", 15, "snacks", "🥟"),
-            ("Vada Pav", 20, "snacks", "🍔"),
-            ("Masala Dosa", 45, "food", "🥞"),
-            ("Paneer Roll", 50, "food", "🌯"),
-            ("Chicken Biryani", 90, "food", "🍛"),
-            ("Veg Thali", 70, "food", "🍱"),
-            ("Chai", 10, "beverages", "☕"),
-            ("Cold Coffee", 40, "beverages", "🧋"),
-            ("Fresh Lime Soda", 25, "beverages", "🍋"),
-            ("Maggi", 30, "snacks", "🍜"),
-            ("French Fries", 35, "snacks", "🍟"),
-            ("Sandwich", 40, "food", "🥪"),
-        ]
-        conn.executemany(
-            "INSERT INTO menu_items (name, price, category, emoji) VALUES (?, ?, ?, ?)",
-            menu_items,
-        )
-
-    conn.commit()
-    conn.close()
-    print("Database initialized.")
+
+def init_db():
+    """Bring the database schema up to date (no-op when already current)."""
+    conn = connect()
+    try:
+        if migrate(conn):
+            print("Database initialized.")
+    finally:
+        conn.close()
 
 
 if __name__ == "__main__":
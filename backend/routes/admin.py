@@ -1,13 +1,25 @@
 """
-Admin Routes — System overview
+Admin Routes — System overview, analytics over time, canteen menu,
+bulk student onboarding, batch funding, algod node health
 """
 
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt
+import threading
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from config import WALLET_POOL_LOW, WALLET_POOL_HIGH
 from models import get_db
+from services.algod_client import node_stats
+from services.batch_funding import InvalidBatch, fund_batch, parse_items, summarize
+from services.bulk_import import InvalidImport, claim_job, create_job, get_job, run_job
+from services.menu import InvalidMenuItem, create_item, list_items, set_available, update_item
+from services.rollups import funding_series, spending_series, vendor_totals
+from services.stats_counters import CATEGORIES, read as read_counters
+from services.wallet_pool import pool_depth
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
@@ -22,31 +34,259 @@ def stats():
 
     db = get_db()
 
-    total_students = db.execute("SELECT COUNT(*) as c FROM users WHERE role = 'student'").fetchone()["c"]
-    total_parents = db.execute("SELECT COUNT(*) as c FROM users WHERE role = 'parent'").fetchone()["c"]
-    total_vendors = db.execute("SELECT COUNT(*) as c FROM vendors").fetchone()["c"]
-    total_funded = db.execute("SELECT COALESCE(SUM(amount), 0) as t FROM funding_log").fetchone()["t"]
-    total_spent = db.execute("SELECT COALESCE(SUM(amount), 0) as t FROM category_spending").fetchone()["t"]
-    total_txns = db.execute("SELECT COUNT(*) as c FROM transactions").fetchone()["c"]
-
-    # Spending by category (all-time)
-    rows = db.execute(
-        "SELECT category, SUM(amount) as total FROM category_spending GROUP BY category"
-    ).fetchall()
-    db.close()
-
-    by_category = {r["category"]: r["total"] for r in rows}
+    # Running totals kept by the write paths (services/stats_counters.py)
+    counters = read_counters(db)
+    by_category = {c: counters[f"spent_{c}"] for c in CATEGORIES}
+    wallet_pool_ready = pool_depth(db)
 
     return jsonify({
         "users": {
-            "students": total_students,
-            "parents": total_parents,
-            "vendors": total_vendors,
+            "students": counters["students"],
+            "parents": counters["parents"],
+            "vendors": counters["vendors"],
         },
         "financials": {
-            "total_funded": total_funded,
-            "total_spent": total_spent,
-            "total_transactions": total_txns,
+            "total_funded": counters["total_funded"],
+            "total_spent": sum(by_category.values()),
+            "total_transactions": counters["total_transactions"],
         },
         "spending_by_category": by_category,
+        "wallet_pool": {
+            "ready": wallet_pool_ready,
+            "low_watermark": WALLET_POOL_LOW,
+            "high_watermark": WALLET_POOL_HIGH,
+        },
+    })
+
+
+@admin_bp.route("/analytics", methods=["GET"])
+@jwt_required()
+def analytics():
+    """
+    Spending, funding and top vendors over a date range, from the daily
+    rollups (services/rollups.py).
+    Query params: from, to (YYYY-MM-DD, inclusive; default the last 30
+    days), granularity (day | month).
+    """
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    today = datetime.utcnow().date()
+    granularity = request.args.get("granularity", "day")
+    if granularity not in ("day", "month"):
+        return jsonify({"error": "granularity must be day or month"}), 400
+    try:
+        end = datetime.strptime(request.args["to"], "%Y-%m-%d").date() if "to" in request.args else today
+        start = (datetime.strptime(request.args["from"], "%Y-%m-%d").date()
+                 if "from" in request.args else end - timedelta(days=29))
+    except ValueError:
+        return jsonify({"error": "from and to must be YYYY-MM-DD"}), 400
+    if start > end:
+        return jsonify({"error": "from must not be after to"}), 400
+
+    db = get_db()
+    start, end = start.isoformat(), end.isoformat()
+
+    return jsonify({
+        "from": start,
+        "to": end,
+        "granularity": granularity,
+        "spending": spending_series(db, start, end, granularity),
+        "funding": funding_series(db, start, end, granularity),
+        "top_vendors": vendor_totals(db, start, end),
     })
+
+
+@admin_bp.route("/menu", methods=["GET"])
+@jwt_required()
+def admin_menu():
+    """All canteen menu items, including unavailable ones."""
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    return jsonify({"items": list_items(get_db())})
+
+
+@admin_bp.route("/menu", methods=["POST"])
+@jwt_required()
+def create_menu_item():
+    """
+    Add a canteen menu item.
+    Body: { name, price, category (food | beverages | snacks), emoji? }
+    """
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    try:
+        item = create_item(get_db(), request.get_json())
+    except InvalidMenuItem as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"item": item}), 201
+
+
+@admin_bp.route("/menu/<int:item_id>", methods=["PATCH"])
+@jwt_required()
+def update_menu_item(item_id):
+    """Change a menu item. Body: any of { name, price, category, emoji }"""
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    try:
+        item = update_item(get_db(), item_id, request.get_json())
+    except InvalidMenuItem as e:
+        return jsonify({"error": str(e)}), 400
+    if not item:
+        return jsonify({"error": "Menu item not found"}), 404
+    return jsonify({"item": item})
+
+
+@admin_bp.route("/menu/<int:item_id>/toggle", methods=["POST"])
+@jwt_required()
+def toggle_menu_item(item_id):
+    """
+    Take a menu item off (or back on) the menu.
+    Body (optional): { available: true | false }; without it the flag flips.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    try:
+        item = set_available(get_db(), item_id, data.get("available"))
+    except InvalidMenuItem as e:
+        return jsonify({"error": str(e)}), 400
+    if not item:
+        return jsonify({"error": "Menu item not found"}), 404
+    return jsonify({"item": item})
+
+
+def _run_in_background(job_id):
+    """Run a job the caller has claimed with claim_job()."""
+    def target():
+        try:
+            run_job(job_id, claimed=True)
+        except Exception as e:
+            print(f"Warning: import job {job_id} stopped: {e}")
+
+    threading.Thread(target=target, name=f"import-{job_id}", daemon=True).start()
+
+
+@admin_bp.route("/students/import", methods=["POST"])
+@jwt_required()
+def import_students():
+    """
+    Bulk-onboard students from CSV (text/csv) or NDJSON
+    (application/x-ndjson) sent as the request body.
+    Columns / keys: username, password.
+
+    Passwords are hashed before the job is stored; the import itself runs
+    in the background; poll GET /admin/imports/<id> for progress.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    content_type = request.mimetype
+    if content_type == "text/csv":
+        fmt = "csv"
+    elif content_type in ("application/x-ndjson", "application/ndjson"):
+        fmt = "ndjson"
+    else:
+        return jsonify({"error": "Send text/csv or application/x-ndjson"}), 415
+
+    db = get_db()
+    try:
+        job_id = create_job(db, request.args.get("name"), fmt, request.get_data(as_text=True))
+    except InvalidImport as e:
+        return jsonify({"error": str(e)}), 400
+    claim_job(db, job_id)
+    job = get_job(db, job_id)
+
+    _run_in_background(job_id)
+    return jsonify({"job": job}), 202
+
+
+@admin_bp.route("/imports/<int:job_id>", methods=["GET"])
+@jwt_required()
+def import_status(job_id):
+    """Progress of a bulk import job."""
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    db = get_db()
+    job = get_job(db, job_id)
+
+    if not job:
+        return jsonify({"error": "Import job not found"}), 404
+    return jsonify({"job": job})
+
+
+@admin_bp.route("/imports/<int:job_id>/resume", methods=["POST"])
+@jwt_required()
+def resume_import(job_id):
+    """Resume an interrupted or failed import from its last completed chunk."""
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    db = get_db()
+    job = get_job(db, job_id)
+
+    if not job:
+        return jsonify({"error": "Import job not found"}), 404
+    if job["status"] == "completed":
+        return jsonify({"job": job})
+    if not claim_job(db, job_id):
+        return jsonify({"error": "Import job is already running", "job": job}), 409
+
+    _run_in_background(job_id)
+    return jsonify({"job": get_job(db, job_id)}), 202
+
+
+@admin_bp.route("/fund/batch", methods=["POST"])
+@jwt_required()
+def admin_fund_batch():
+    """
+    Credit many students from the admin reserve (scholarships, stipends).
+    Body: { items: [{ student_id, amount }, ...] }
+
+    Returns a summary plus one result per recipient.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    data = request.get_json()
+    try:
+        items = parse_items(data.get("items"))
+    except InvalidBatch as e:
+        return jsonify({"error": str(e)}), 400
+
+    db = get_db()
+    try:
+        results = fund_batch(db, get_jwt_identity(), items)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({"summary": summarize(results), "results": results})
+
+
+@admin_bp.route("/algod", methods=["GET"])
+@jwt_required()
+def algod_nodes():
+    """Health, circuit-breaker state and latency of each configured algod node."""
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Admin access only"}), 403
+
+    return jsonify({"nodes": node_stats()})
@@ -1,7 +1,7 @@
 """
 Auth Routes — Register & Login (Custodial)
 
-Wallets are created server-side and mnemonics stored in DB.
+Wallets are created server-side and keys stored encrypted in DB.
 No user ever needs to know about Algorand or wallets.
 """
 
@@ -12,7 +12,8 @@ from werkzeug.security import generate_password_hash, check_password_hash
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from models import get_db
-from services.algorand_service import create_wallet, opt_in_asa, fund_account_with_algo
+from services.stats_counters import count_user
+from services.wallet_pool import claim_wallet, provision_wallets, return_wallet, filler
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -23,8 +24,10 @@ def register():
     Register a new user.
     Body: { username, password, role: 'student'|'parent'|'vendor' }
 
-    For students and vendors: a custodial Algorand wallet is created,
-    funded with ALGO, and opted into CampusToken — all silently.
+    For students and vendors: a custodial Algorand wallet that is already
+    funded with ALGO and opted into CampusToken is claimed from the
+    wallet pool — all silently. If the pool is empty, one is provisioned
+    inline (top-up + opt-in in a single atomic group).
     Parents do NOT get wallets.
     """
     data = request.get_json()
@@ -40,26 +43,38 @@ def register():
         return jsonify({"error": "Invalid role"}), 400
 
     algo_address = None
-    algo_mnemonic = None
+    algo_key_enc = None
+    wallet = None
+    provisioned = False
+
+    # Hashing is slow (scrypt): do it before claim_wallet takes the write lock
+    password_hash = generate_password_hash(password)
+
+    db = get_db()
+
+    if db.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+        return jsonify({"error": "Username already taken"}), 409
 
     # Only students and vendors get custodial wallets
     if role in ("student", "vendor"):
-        algo_address, algo_mnemonic = create_wallet()
-        try:
-            # Seed with ALGO for minimum balance + ASA opt-in fees
-            fund_account_with_algo(algo_address)
-            # Auto opt-in to CampusToken ASA
-            opt_in_asa(algo_mnemonic)
-        except Exception as e:
-            # Non-fatal for MVP — can retry later
-            print(f"Warning: wallet setup incomplete for {username}: {e}")
+        wallet = claim_wallet(db)
+        filler.nudge()
+        if not wallet:
+            db.rollback()  # don't hold the write lock while provisioning
+            try:
+                wallet = provision_wallets(1)[0]
+            except Exception as e:
+                print(f"Warning: wallet setup failed for {username}: {e}")
+                return jsonify({"error": "Wallet setup failed, please try again"}), 503
+            provisioned = True
+        algo_address, algo_key_enc = wallet
 
-    db = get_db()
     try:
         db.execute(
-            "INSERT INTO users (username, password_hash, role, algo_address, algo_mnemonic) VALUES (?, ?, ?, ?, ?)",
-            (username, generate_password_hash(password), role, algo_address, algo_mnemonic),
+            "INSERT INTO users (username, password_hash, role, algo_address, algo_key_enc) VALUES (?, ?, ?, ?, ?)",
+            (username, password_hash, role, algo_address, algo_key_enc),
         )
+        count_user(db, role)
         db.commit()
 
         user = db.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
@@ -72,21 +87,23 @@ def register():
             )
             db.commit()
 
-        db.close()
-
         response = {
             "message": "Registered successfully",
             "user_id": user["id"],
             "role": role,
         }
-        # Only show address for students/vendors (never mnemonic to user)
+        # Only show address for students/vendors (never the key to user)
         if algo_address:
             response["algo_address"] = algo_address
 
         return jsonify(response), 201
 
     except Exception:
-        db.close()
+        # Rolls back the pool claim too, so the wallet stays available
+        db.rollback()
+        if provisioned:
+            # Taken by a concurrent registration: keep the funded wallet
+            return_wallet(db, wallet)
         return jsonify({"error": "Username already taken"}), 409
 
 
@@ -102,7 +119,6 @@ def login():
 
     db = get_db()
     user = db.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
-    db.close()
 
     if not user or not check_password_hash(user["password_hash"], password):
         return jsonify({"error": "Invalid credentials"}), 401
@@ -134,10 +150,8 @@ def link_student():
     student = db.execute("SELECT role FROM users WHERE id = ?", (student_id,)).fetchone()
 
     if not parent or parent["role"] != "parent":
-        db.close()
         return jsonify({"error": "Invalid parent"}), 400
     if not student or student["role"] != "student":
-        db.close()
         return jsonify({"error": "Invalid student"}), 400
 
     db.execute(
@@ -145,6 +159,5 @@ def link_student():
         (parent_id, student_id),
     )
     db.commit()
-    db.close()
 
     return jsonify({"message": "Linked successfully"})
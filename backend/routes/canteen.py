@@ -6,79 +6,61 @@ The backend signs the ASA transfer (student → canteen vendor) and
 generates a soft bill/receipt.
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from datetime import datetime
 
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from config import ASYNC_SUBMIT
 from models import get_db
-from services.algorand_service import transfer_student_to_vendor, get_token_balance
+from services.algorand_service import transfer_student_to_vendor
+from services.balance_ledger import get_balance, apply_transfer
+from services.canteen_vendor import get_canteen_vendor
+from services.confirmation_tracker import track
+from services.idempotency import idempotent, record_txid
+from services.menu import get_snapshot
+from services.orders import load_order_items
+from services.pagination import InvalidPage, page_args, paginate
+from services.params_cache import TxnOutcomeUnknown
+from services.reservations import InsufficientBalance, reservations
+from services.rollups import add_spend
+from services.spending import record_spend
+from services.stats_counters import bump
 
 canteen_bp = Blueprint("canteen", __name__, url_prefix="/api/canteen")
 
 
-# ---------- helpers ----------
-
-def _get_or_create_canteen_vendor(db):
-    """
-    Get (or auto-create) the built-in 'Campus Canteen' vendor.
-    This vendor receives all canteen order payments.
-    """
-    vendor = db.execute(
-        "SELECT id, algo_address FROM vendors WHERE name = 'Campus Canteen' LIMIT 1"
-    ).fetchone()
-
-    if vendor:
-        return vendor["id"], vendor["algo_address"]
-
-    # If no canteen vendor exists, use the first registered food vendor
-    vendor = db.execute(
-        "SELECT id, algo_address FROM vendors WHERE category = 'food' LIMIT 1"
-    ).fetchone()
-
-    if vendor:
-        return vendor["id"], vendor["algo_address"]
-
-    return None, None
-
-
 # ---------- routes ----------
 
 @canteen_bp.route("/menu", methods=["GET"])
 @jwt_required()
 def get_menu():
-    """Get all available canteen menu items."""
+    """
+    Get all available canteen menu items.
+    Served from the cached menu snapshot with an ETag; send it back in
+    If-None-Match to get a 304 while the menu is unchanged.
+    """
     claims = get_jwt()
     if claims.get("role") != "student":
         return jsonify({"error": "Student access only"}), 403
 
-    db = get_db()
-    items = db.execute(
-        "SELECT id, name, price, category, emoji FROM menu_items WHERE available = 1 ORDER BY category, name"
-    ).fetchall()
-    db.close()
-
-    return jsonify({
-        "items": [
-            {
-                "id": item["id"],
-                "name": item["name"],
-                "price": item["price"],
-                "category": item["category"],
-                "emoji": item["emoji"],
-            }
-            for item in items
-        ]
-    })
+    snapshot = get_snapshot(get_db())
+    resp = Response(snapshot.body, mimetype="application/json")
+    resp.set_etag(snapshot.etag)
+    # Per-user (JWT) response: clients may keep it but must revalidate
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp.make_conditional(request)
 
 
 @canteen_bp.route("/order", methods=["POST"])
 @jwt_required()
+@idempotent
 def place_order():
     """
     Place a canteen order (Custodial).
     Body: { items: [{ id: number, qty: number }, ...] }
+    Optional header: Idempotency-Key (retries replay the first response)
 
     The backend:
     1. Validates items and computes total
@@ -99,26 +81,28 @@ def place_order():
     if not cart_items:
         return jsonify({"error": "Cart is empty"}), 400
 
+    cart = []
+    for ci in cart_items:
+        try:
+            item_id = int(ci.get("id"))
+            qty = int(ci.get("qty", 1))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid item in cart"}), 400
+        if item_id < 1 or qty < 1:
+            return jsonify({"error": "Invalid item in cart"}), 400
+        cart.append((item_id, qty))
+
     db = get_db()
 
+    # Resolve the whole cart against the cached menu (available items only)
+    menu = get_snapshot(db).items
+
     # Validate items and compute total
     order_lines = []
     total = 0
-    for ci in cart_items:
-        item_id = ci.get("id")
-        qty = ci.get("qty", 1)
-
-        if not item_id or qty < 1:
-            db.close()
-            return jsonify({"error": "Invalid item in cart"}), 400
-
-        menu_item = db.execute(
-            "SELECT id, name, price, emoji FROM menu_items WHERE id = ? AND available = 1",
-            (item_id,),
-        ).fetchone()
-
+    for item_id, qty in cart:
+        menu_item = menu.get(item_id)
         if not menu_item:
-            db.close()
             return jsonify({"error": f"Menu item {item_id} not found or unavailable"}), 404
 
         line_total = menu_item["price"] * qty
@@ -134,135 +118,149 @@ def place_order():
 
     # Get student wallet
     student = db.execute(
-        "SELECT algo_address, algo_mnemonic FROM users WHERE id = ? AND role = 'student'",
+        "SELECT algo_address, algo_key_enc FROM users WHERE id = ? AND role = 'student'",
         (student_id,),
     ).fetchone()
 
-    if not student or not student["algo_mnemonic"]:
-        db.close()
+    if not student or not student["algo_key_enc"]:
         return jsonify({"error": "Student wallet not set up"}), 404
 
-    # Check balance
-    balance = get_token_balance(student["algo_address"])
-    if balance < total:
-        db.close()
-        return jsonify({
-            "error": f"Insufficient balance. Have ₹{balance}, need ₹{total}"
-        }), 400
-
     # Get canteen vendor
-    vendor_id, vendor_addr = _get_or_create_canteen_vendor(db)
+    vendor_id, vendor_addr = get_canteen_vendor(db)
     if not vendor_addr:
-        db.close()
         return jsonify({
             "error": "No canteen vendor registered. An admin must register a food vendor first."
         }), 404
 
+    # Check balance and hold the total so a concurrent spend can't use it too
+    try:
+        reservation = reservations.reserve(db, student["algo_address"], total)
+    except InsufficientBalance as e:
+        return jsonify({
+            "error": f"Insufficient balance. Have ₹{e.available}, need ₹{total}"
+        }), 400
+
     try:
         # Sign and submit the ASA transfer on Algorand
-        tx_id = transfer_student_to_vendor(
-            student["algo_mnemonic"],
-            vendor_addr,
-            total,
-            "food",  # canteen orders are always food category
-        )
+        try:
+            tx_id = transfer_student_to_vendor(
+                student["algo_address"],
+                student["algo_key_enc"],
+                vendor_addr,
+                total,
+                "food",  # canteen orders are always food category
+                wait=not ASYNC_SUBMIT,
+            )
+            pending = ASYNC_SUBMIT
+        except TxnOutcomeUnknown as e:
+            # Sent, but not known to have landed: record it pending for the tracker
+            tx_id, pending = e.txid, True
+        record_txid(tx_id)
+        txn_status = "pending" if pending else "confirmed"
 
         now = datetime.utcnow()
         month = now.strftime("%Y-%m")
 
+        # Record in transactions table (visible to student). The chain
+        # follower may have recorded this txid first; it has then counted
+        # the payment already, as confirmed.
+        inserted = db.execute(
+            """INSERT INTO transactions (student_id, vendor_id, amount, category, txn_id, status)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(txn_id) WHERE txn_id IS NOT NULL DO NOTHING
+               RETURNING id""",
+            (student_id, vendor_id, total, "food", tx_id, txn_status),
+        ).fetchone()
+        if inserted:
+            bump(db, total_transactions=1)
+            add_spend(db, "food", vendor_id, total)
+            # Update aggregated spending (visible to parent)
+            record_spend(db, student_id, "food", total, month)
+        else:
+            txn_status = "confirmed"
+        order_status = "pending" if txn_status == "pending" else "completed"
+
         # Create the order
         cursor = db.execute(
-            "INSERT INTO orders (student_id, vendor_id, total_amount, txn_id) VALUES (?, ?, ?, ?)",
-            (student_id, vendor_id, total, tx_id),
+            "INSERT INTO orders (student_id, vendor_id, total_amount, txn_id, status) VALUES (?, ?, ?, ?, ?)",
+            (student_id, vendor_id, total, tx_id, order_status),
         )
         order_id = cursor.lastrowid
 
         # Create order line items
-        for line in order_lines:
-            db.execute(
-                "INSERT INTO order_items (order_id, menu_item_id, quantity, price) VALUES (?, ?, ?, ?)",
-                (order_id, line["menu_item_id"], line["qty"], line["price"]),
-            )
-
-        # Record in transactions table (visible to student)
-        db.execute(
-            "INSERT INTO transactions (student_id, vendor_id, amount, category, txn_id) VALUES (?, ?, ?, ?, ?)",
-            (student_id, vendor_id, total, "food", tx_id),
+        db.executemany(
+            "INSERT INTO order_items (order_id, menu_item_id, quantity, price) VALUES (?, ?, ?, ?)",
+            [(order_id, line["menu_item_id"], line["qty"], line["price"]) for line in order_lines],
         )
 
-        # Update aggregated spending (visible to parent)
-        db.execute("""
-            INSERT INTO category_spending (student_id, category, month, amount)
-            VALUES (?, 'food', ?, ?)
-            ON CONFLICT(student_id, category, month)
-            DO UPDATE SET amount = amount + ?
-        """, (student_id, month, total, total))
+        apply_transfer(db, student["algo_address"], vendor_addr, total)
 
         db.commit()
+        new_balance = get_balance(db, student["algo_address"])
 
         # Build the bill
         bill = _build_bill(order_id, student_id, order_lines, total, tx_id, now)
 
-        db.close()
+        pending = order_status == "pending"
+        if pending:
+            track(tx_id)
         return jsonify({
-            "message": "Order placed successfully!",
+            "message": "Order submitted" if pending else "Order placed successfully!",
             "order_id": order_id,
             "txn_id": tx_id,
+            "status": order_status,
+            "balance": new_balance,
             "bill": bill,
-        }), 201
+        }), 202 if pending else 201
 
     except Exception as e:
-        db.close()
+        # Drop the half-written rows now, so the write lock isn't held until teardown
+        db.rollback()
         return jsonify({"error": str(e)}), 500
+    finally:
+        reservation.release()
 
 
 @canteen_bp.route("/orders", methods=["GET"])
 @jwt_required()
 def get_orders():
-    """Get past canteen orders for the logged-in student."""
+    """
+    Get past canteen orders for the logged-in student, newest first.
+    Query params: cursor / limit (page further via next_cursor)
+    """
     claims = get_jwt()
     if claims.get("role") != "student":
         return jsonify({"error": "Student access only"}), 403
 
+    try:
+        (before_at, before_id), limit = page_args(request.args, 20)
+    except InvalidPage as e:
+        return jsonify({"error": str(e)}), 400
+
     student_id = get_jwt_identity()
     db = get_db()
 
-    orders = db.execute(
+    orders, next_cursor = paginate(db.execute(
         """SELECT id, total_amount, txn_id, status, created_at
-           FROM orders WHERE student_id = ?
-           ORDER BY created_at DESC LIMIT 20""",
-        (student_id,),
-    ).fetchall()
-
-    result = []
-    for o in orders:
-        items = db.execute(
-            """SELECT oi.quantity, oi.price, mi.name, mi.emoji
-               FROM order_items oi
-               JOIN menu_items mi ON oi.menu_item_id = mi.id
-               WHERE oi.order_id = ?""",
-            (o["id"],),
-        ).fetchall()
-
-        result.append({
+           FROM orders WHERE student_id = ? AND (created_at, id) < (?, ?)
+           ORDER BY created_at DESC, id DESC LIMIT ?""",
+        (student_id, before_at, before_id, limit + 1),
+    ).fetchall(), limit)
+
+    items = load_order_items(db, [o["id"] for o in orders])
+    result = [
+        {
             "id": o["id"],
             "total": o["total_amount"],
             "txn_id": o["txn_id"],
             "status": o["status"],
             "time": o["created_at"],
-            "items": [
-                {
-                    "name": i["name"],
-                    "emoji": i["emoji"],
-                    "qty": i["quantity"],
-                    "price": i["price"],
-                }
-                for i in items
-            ],
-        })
+            "items": items[o["id"]],
+        }
+        for o in orders
+    ]
 
-    db.close()
-    return jsonify({"orders": result})
+    return jsonify({"orders": result, "next_cursor": next_cursor})
 
 
 @canteen_bp.route("/orders/<int:order_id>/bill", methods=["GET"])
@@ -282,28 +280,11 @@ def get_bill(order_id):
     ).fetchone()
 
     if not order:
-        db.close()
         return jsonify({"error": "Order not found"}), 404
 
-    items = db.execute(
-        """SELECT oi.quantity, oi.price, mi.name, mi.emoji
-           FROM order_items oi
-           JOIN menu_items mi ON oi.menu_item_id = mi.id
-           WHERE oi.order_id = ?""",
-        (order_id,),
-    ).fetchall()
-
-    db.close()
-
     lines = [
-        {
-            "name": i["name"],
-            "emoji": i["emoji"],
-            "qty": i["quantity"],
-            "price": i["price"],
-            "line_total": i["quantity"] * i["price"],
-        }
-        for i in items
+        dict(item, line_total=item["qty"] * item["price"])
+        for item in load_order_items(db, [order_id])[order_id]
     ]
 
     bill = _build_bill(
@@ -12,8 +12,16 @@ from datetime import datetime
 
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from config import ASYNC_SUBMIT
 from models import get_db
-from services.algorand_service import fund_student, get_token_balance
+from services.algorand_service import fund_student
+from services.balance_ledger import get_balance, apply_transfer
+from services.batch_funding import InvalidBatch, fund_batch, parse_items, summarize
+from services.confirmation_tracker import track
+from services.params_cache import TxnOutcomeUnknown
+from services.rollups import add_funding
+from services.spending import month_range
+from services.stats_counters import bump
 
 parent_bp = Blueprint("parent", __name__, url_prefix="/api/parent")
 
@@ -28,7 +36,7 @@ def fund():
     The parent clicks a button. The backend:
     1. Simulates UPI success
     2. Signs an ASA transfer from admin → student using admin mnemonic
-    3. Logs the funding
+    3. Logs the funding (as 'pending' when ASYNC_SUBMIT is on)
     NO wallet connection required from the parent.
     """
     claims = get_jwt()
@@ -51,7 +59,6 @@ def fund():
         (parent_id, student_id),
     ).fetchone()
     if not relation:
-        db.close()
         return jsonify({"error": "Student not linked to this parent"}), 403
 
     student = db.execute(
@@ -59,27 +66,83 @@ def fund():
         (student_id,),
     ).fetchone()
     if not student or not student["algo_address"]:
-        db.close()
         return jsonify({"error": "Student wallet not found"}), 404
 
     try:
-        tx_id = fund_student(student["algo_address"], amount)
+        try:
+            tx_id = fund_student(student["algo_address"], amount, wait=not ASYNC_SUBMIT)
+            status = "pending" if ASYNC_SUBMIT else "confirmed"
+        except TxnOutcomeUnknown as e:
+            # Sent, but not known to have landed: log it pending for the tracker
+            tx_id, status = e.txid, "pending"
 
         db.execute(
-            "INSERT INTO funding_log (parent_id, student_id, amount, txn_id) VALUES (?, ?, ?, ?)",
-            (parent_id, student_id, amount, tx_id),
+            "INSERT INTO funding_log (parent_id, student_id, amount, txn_id, status) VALUES (?, ?, ?, ?, ?)",
+            (parent_id, student_id, amount, tx_id, status),
         )
+        bump(db, total_funded=amount)
+        add_funding(db, amount)
+        apply_transfer(db, None, student["algo_address"], amount)
         db.commit()
-        db.close()
+
+        if status == "pending":
+            track(tx_id)
+            return jsonify({
+                "message": f"Funding of ₹{amount} submitted",
+                "tokens_sent": amount,
+                "txn_id": tx_id,
+                "status": status,
+            }), 202
 
         return jsonify({
             "message": f"Successfully funded ₹{amount}",
             "tokens_sent": amount,
+            "txn_id": tx_id,
+            "status": status,
         })
     except Exception as e:
-        db.close()
+        db.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@parent_bp.route("/fund/batch", methods=["POST"])
+@jwt_required()
+def fund_batch_route():
+    """
+    Fund several linked students in one request.
+    Body: { items: [{ student_id, amount }, ...] }
+
+    Every student must be linked to this parent. Returns one result per
+    item (confirmed / pending / failed).
+    """
+    claims = get_jwt()
+    if claims.get("role") != "parent":
+        return jsonify({"error": "Parent access only"}), 403
+
+    parent_id = get_jwt_identity()
+    data = request.get_json()
+    try:
+        items = parse_items(data.get("items"))
+    except InvalidBatch as e:
+        return jsonify({"error": str(e)}), 400
+
+    db = get_db()
+    linked = {
+        r["student_id"] for r in db.execute(
+            "SELECT student_id FROM parent_student WHERE parent_id = ?", (parent_id,)
+        )
+    }
+    unlinked = sorted({sid for sid, _ in items if sid not in linked})
+    if unlinked:
+        return jsonify({"error": f"Students not linked to this parent: {unlinked}"}), 403
+
+    try:
+        results = fund_batch(db, parent_id, items)
+    except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    return jsonify({"summary": summarize(results), "results": results})
+
 
 @parent_bp.route("/spending", methods=["GET"])
 @jwt_required()
@@ -98,6 +161,11 @@ def spending():
     parent_id = get_jwt_identity()
     student_id = request.args.get("student_id")
     month = request.args.get("month", datetime.utcnow().strftime("%Y-%m"))
+    try:
+        start, end = month_range(month)
+        month = start[:7]
+    except ValueError:
+        return jsonify({"error": "month must be YYYY-MM"}), 400
 
     db = get_db()
 
@@ -106,14 +174,12 @@ def spending():
         (parent_id, student_id),
     ).fetchone()
     if not relation:
-        db.close()
         return jsonify({"error": "Student not linked to this parent"}), 403
 
     student = db.execute(
         "SELECT username, algo_address FROM users WHERE id = ?", (student_id,)
     ).fetchone()
     if not student:
-        db.close()
         return jsonify({"error": "Student not found"}), 404
 
     # Aggregated spending from DB (written at payment time)
@@ -124,10 +190,11 @@ def spending():
 
     funded = db.execute(
         """SELECT COALESCE(SUM(amount), 0) as total FROM funding_log
-           WHERE student_id = ? AND strftime('%Y-%m', created_at) = ?""",
-        (student_id, month),
+           WHERE student_id = ? AND created_at >= ? AND created_at < ?""",
+        (student_id, start, end),
     ).fetchone()
-    db.close()
+
+    balance = get_balance(db, student["algo_address"]) if student["algo_address"] else 0
 
     breakdown = {"food": 0, "events": 0, "stationery": 0}
     total_spent = 0
@@ -135,8 +202,6 @@ def spending():
         breakdown[row["category"]] = row["amount"]
         total_spent += row["amount"]
 
-    balance = get_token_balance(student["algo_address"]) if student["algo_address"] else 0
-
     return jsonify({
         "student_name": student["username"],
         "month": month,
@@ -164,7 +229,6 @@ def get_students():
            WHERE ps.parent_id = ?""",
         (parent_id,),
     ).fetchall()
-    db.close()
 
     return jsonify({
         "students": [{"id": r["id"], "name": r["username"]} for r in rows]
@@ -12,7 +12,9 @@ from datetime import datetime
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from models import get_db
-from services.algorand_service import get_token_balance
+from services.balance_ledger import get_balance
+from services.pagination import InvalidPage, page_args, paginate
+from services.spending import month_range
 
 student_bp = Blueprint("student", __name__, url_prefix="/api/student")
 
@@ -28,12 +30,11 @@ def balance():
     user_id = get_jwt_identity()
     db = get_db()
     user = db.execute("SELECT algo_address FROM users WHERE id = ?", (user_id,)).fetchone()
-    db.close()
 
     if not user or not user["algo_address"]:
         return jsonify({"error": "No wallet found"}), 404
 
-    bal = get_token_balance(user["algo_address"])
+    bal = get_balance(db, user["algo_address"])
     return jsonify({"balance": bal})
 
 
@@ -42,7 +43,8 @@ def balance():
 def summary():
     """
     Get student's own spending summary.
-    Query params: month (YYYY-MM, optional — defaults to current)
+    Query params: month (YYYY-MM, optional — defaults to current),
+    cursor / limit (page through recent_transactions via next_cursor)
 
     Returns:
       - total monthly spending
@@ -56,12 +58,20 @@ def summary():
 
     user_id = get_jwt_identity()
     month = request.args.get("month", datetime.utcnow().strftime("%Y-%m"))
+    try:
+        start, end = month_range(month)
+        month = start[:7]
+    except ValueError:
+        return jsonify({"error": "month must be YYYY-MM"}), 400
+    try:
+        (before_at, before_id), limit = page_args(request.args, 20)
+    except InvalidPage as e:
+        return jsonify({"error": str(e)}), 400
 
     db = get_db()
     user = db.execute("SELECT username, algo_address FROM users WHERE id = ?", (user_id,)).fetchone()
 
     if not user:
-        db.close()
         return jsonify({"error": "User not found"}), 404
 
     # Aggregated spending
@@ -71,16 +81,17 @@ def summary():
     ).fetchall()
 
     # Recent transactions (student can see their own)
-    recent = db.execute(
-        """SELECT t.amount, t.category, t.created_at, v.name as vendor_name
+    recent, next_cursor = paginate(db.execute(
+        """SELECT t.id, t.amount, t.category, t.created_at, v.name as vendor_name
            FROM transactions t
            LEFT JOIN vendors v ON t.vendor_id = v.id
-           WHERE t.student_id = ? AND strftime('%Y-%m', t.created_at) = ?
-           ORDER BY t.created_at DESC LIMIT 20""",
-        (user_id, month),
-    ).fetchall()
+           WHERE t.student_id = ? AND t.created_at >= ? AND t.created_at < ?
+             AND (t.created_at, t.id) < (?, ?)
+           ORDER BY t.created_at DESC, t.id DESC LIMIT ?""",
+        (user_id, start, end, before_at, before_id, limit + 1),
+    ).fetchall(), limit)
 
-    db.close()
+    balance = get_balance(db, user["algo_address"]) if user["algo_address"] else 0
 
     breakdown = {"food": 0, "events": 0, "stationery": 0}
     total_spent = 0
@@ -88,8 +99,6 @@ def summary():
         breakdown[row["category"]] = row["amount"]
         total_spent += row["amount"]
 
-    balance = get_token_balance(user["algo_address"]) if user["algo_address"] else 0
-
     return jsonify({
         "user_id": int(user_id),
         "username": user["username"],
@@ -106,4 +115,5 @@ def summary():
             }
             for r in recent
         ],
+        "next_cursor": next_cursor,
     })
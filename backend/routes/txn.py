@@ -0,0 +1,66 @@
+"""
+Transaction Status Routes — poll pending submissions
+
+GET /txn/<txn_id>/status → pending | confirmed | failed
+
+Used by clients after an ASYNC_SUBMIT fund, payment or order returns
+202 with a txid. Each role can only look up txids it is a party to.
+"""
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models import get_db
+
+txn_bp = Blueprint("txn", __name__, url_prefix="/api/txn")
+
+# Orders use 'completed' for a confirmed payment
+_STATUS_NAMES = {"completed": "confirmed"}
+
+
+@txn_bp.route("/<txn_id>/status", methods=["GET"])
+@jwt_required()
+def txn_status(txn_id):
+    """Get the confirmation status of a submitted transaction."""
+    role = get_jwt().get("role")
+    user_id = get_jwt_identity()
+
+    db = get_db()
+    if role == "student":
+        row = db.execute(
+            """SELECT status FROM transactions WHERE txn_id = ? AND student_id = ?
+               UNION ALL
+               SELECT status FROM orders WHERE txn_id = ? AND student_id = ?""",
+            (txn_id, user_id, txn_id, user_id),
+        ).fetchone()
+    elif role == "parent":
+        row = db.execute(
+            "SELECT status FROM funding_log WHERE txn_id = ? AND parent_id = ?",
+            (txn_id, user_id),
+        ).fetchone()
+    elif role == "vendor":
+        row = db.execute(
+            """SELECT t.status FROM transactions t
+               JOIN vendors v ON t.vendor_id = v.id
+               WHERE t.txn_id = ? AND v.user_id = ?""",
+            (txn_id, user_id),
+        ).fetchone()
+    elif role == "admin":
+        row = db.execute(
+            """SELECT status FROM transactions WHERE txn_id = ?
+               UNION ALL
+               SELECT status FROM funding_log WHERE txn_id = ?""",
+            (txn_id, txn_id),
+        ).fetchone()
+    else:
+        row = None
+
+    if not row:
+        return jsonify({"error": "Transaction not found"}), 404
+
+    return jsonify({
+        "txn_id": txn_id,
+        "status": _STATUS_NAMES.get(row["status"], row["status"]),
+    })
@@ -13,8 +13,20 @@ import json
 
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from config import ASYNC_SUBMIT
 from models import get_db
-from services.algorand_service import transfer_student_to_vendor, get_token_balance
+from services.algorand_service import transfer_student_to_vendor
+from services.balance_ledger import get_balance, apply_transfer
+from services import canteen_vendor
+from services.confirmation_tracker import track
+from services.idempotency import idempotent, record_txid
+from services.orders import load_order_items
+from services.pagination import InvalidPage, page_args, paginate
+from services.params_cache import TxnOutcomeUnknown
+from services.reservations import InsufficientBalance, reservations
+from services.rollups import add_spend
+from services.spending import record_spend
+from services.stats_counters import bump
 
 vendor_bp = Blueprint("vendor", __name__, url_prefix="/api/vendor")
 
@@ -42,15 +54,16 @@ def register_vendor():
     user = db.execute("SELECT algo_address FROM users WHERE id = ?", (user_id,)).fetchone()
 
     if not user or not user["algo_address"]:
-        db.close()
         return jsonify({"error": "No wallet found"}), 404
 
     db.execute(
         "INSERT INTO vendors (user_id, name, category, algo_address) VALUES (?, ?, ?, ?)",
         (user_id, name, category, user["algo_address"]),
     )
+    bump(db, vendors=1)
     db.commit()
-    db.close()
+    # The canteen pays the first food vendor when there is no Campus Canteen
+    canteen_vendor.invalidate()
 
     return jsonify({
         "message": "Vendor registered",
@@ -61,13 +74,15 @@ def register_vendor():
 
 @vendor_bp.route("/pay", methods=["POST"])
 @jwt_required()
+@idempotent
 def pay():
     """
     Accept payment from a student (Custodial).
     Body: { student_id, amount, category }
+    Optional header: Idempotency-Key (retries replay the first response)
 
     The backend:
-    1. Looks up student's custodial mnemonic from DB
+    1. Looks up student's custodial (encrypted) key from DB
     2. Looks up vendor's Algorand address from DB
     3. Signs and submits the ASA transfer
     4. Records the transaction in DB
@@ -93,13 +108,12 @@ def pay():
 
     db = get_db()
 
-    # Get student's custodial mnemonic
+    # Get student's custodial key
     student = db.execute(
-        "SELECT algo_address, algo_mnemonic FROM users WHERE id = ? AND role = 'student'",
+        "SELECT algo_address, algo_key_enc FROM users WHERE id = ? AND role = 'student'",
         (student_id,),
     ).fetchone()
-    if not student or not student["algo_mnemonic"]:
-        db.close()
+    if not student or not student["algo_key_enc"]:
         return jsonify({"error": "Student not found or wallet not set up"}), 404
 
     # Get vendor info
@@ -108,51 +122,80 @@ def pay():
         (vendor_user_id,),
     ).fetchone()
     if not vendor:
-        db.close()
         return jsonify({"error": "Vendor not registered. Call /vendor/register first."}), 404
 
-    # Check student balance
-    balance = get_token_balance(student["algo_address"])
-    if balance < amount:
-        db.close()
-        return jsonify({"error": f"Insufficient balance. Has {balance}, needs {amount}"}), 400
+    # Hold the amount so a concurrent payment can't spend it too
+    try:
+        reservation = reservations.reserve(db, student["algo_address"], amount)
+    except InsufficientBalance as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        # Backend signs the transaction using student's custodial mnemonic
-        tx_id = transfer_student_to_vendor(
-            student["algo_mnemonic"],
-            vendor["algo_address"],
-            amount,
-            category,
-        )
+        # Backend signs the transaction using student's custodial key
+        try:
+            tx_id = transfer_student_to_vendor(
+                student["algo_address"],
+                student["algo_key_enc"],
+                vendor["algo_address"],
+                amount,
+                category,
+                wait=not ASYNC_SUBMIT,
+            )
+            status = "pending" if ASYNC_SUBMIT else "confirmed"
+        except TxnOutcomeUnknown as e:
+            # Sent, but not known to have landed: record it pending for the tracker
+            tx_id, status = e.txid, "pending"
+        record_txid(tx_id)
 
         month = datetime.utcnow().strftime("%Y-%m")
 
-        # Record individual transaction (visible to student, NOT to parent)
-        db.execute(
-            "INSERT INTO transactions (student_id, vendor_id, amount, category, txn_id) VALUES (?, ?, ?, ?, ?)",
-            (student_id, vendor["id"], amount, category, tx_id),
-        )
-
-        # Update aggregated spending (THIS is what the parent sees)
-        db.execute("""
-            INSERT INTO category_spending (student_id, category, month, amount)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(student_id, category, month)
-            DO UPDATE SET amount = amount + ?
-        """, (student_id, category, month, amount, amount))
+        # Record individual transaction (visible to student, NOT to parent).
+        # The chain follower may have recorded this txid first; it has then
+        # counted the payment already, as confirmed.
+        inserted = db.execute(
+            """INSERT INTO transactions (student_id, vendor_id, amount, category, txn_id, status)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(txn_id) WHERE txn_id IS NOT NULL DO NOTHING
+               RETURNING id""",
+            (student_id, vendor["id"], amount, category, tx_id, status),
+        ).fetchone()
+        if inserted:
+            bump(db, total_transactions=1)
+            add_spend(db, category, vendor["id"], amount)
+            # Update aggregated spending (THIS is what the parent sees)
+            record_spend(db, student_id, category, amount, month)
+        else:
+            status = "confirmed"
+        apply_transfer(db, student["algo_address"], vendor["algo_address"], amount)
 
         db.commit()
-        db.close()
+        new_balance = get_balance(db, student["algo_address"])
+
+        if status == "pending":
+            track(tx_id)
+            return jsonify({
+                "message": "Payment submitted",
+                "amount": amount,
+                "category": category,
+                "txn_id": tx_id,
+                "status": status,
+                "student_balance": new_balance,
+            }), 202
 
         return jsonify({
             "message": "Payment successful",
             "amount": amount,
             "category": category,
+            "txn_id": tx_id,
+            "status": status,
+            "student_balance": new_balance,
         })
     except Exception as e:
-        db.close()
+        # Drop the half-written rows now, so the write lock isn't held until teardown
+        db.rollback()
         return jsonify({"error": str(e)}), 500
+    finally:
+        reservation.release()
 
 
 @vendor_bp.route("/qr", methods=["GET"])
@@ -167,7 +210,6 @@ def get_qr_data():
         "SELECT name, category FROM vendors WHERE user_id = ?",
         (user_id,),
     ).fetchone()
-    db.close()
 
     if not vendor:
         return jsonify({"error": "Vendor not found"}), 404
@@ -199,12 +241,11 @@ def vendor_balance():
     user_id = get_jwt_identity()
     db = get_db()
     user = db.execute("SELECT algo_address FROM users WHERE id = ?", (user_id,)).fetchone()
-    db.close()
 
     if not user or not user["algo_address"]:
         return jsonify({"error": "No wallet found"}), 404
 
-    bal = get_token_balance(user["algo_address"])
+    bal = get_balance(db, user["algo_address"])
     return jsonify({"balance": bal})
 
 
@@ -215,11 +256,17 @@ def vendor_orders():
     Get incoming orders for this vendor (canteen feed).
     Vendors see WHO ordered WHAT so they can prepare the food.
     No acceptance needed — orders are auto-processed.
+    Query params: cursor / limit (page further via next_cursor)
     """
     claims = get_jwt()
     if claims.get("role") != "vendor":
         return jsonify({"error": "Vendor access only"}), 403
 
+    try:
+        (before_at, before_id), limit = page_args(request.args, 50)
+    except InvalidPage as e:
+        return jsonify({"error": str(e)}), 400
+
     user_id = get_jwt_identity()
     db = get_db()
 
@@ -227,41 +274,30 @@ def vendor_orders():
         "SELECT id FROM vendors WHERE user_id = ?", (user_id,)
     ).fetchone()
     if not vendor:
-        db.close()
         return jsonify({"error": "Vendor not registered"}), 404
 
-    orders = db.execute(
+    orders, next_cursor = paginate(db.execute(
         """SELECT o.id, o.total_amount, o.txn_id, o.status, o.created_at,
                   u.username as student_name
            FROM orders o
            JOIN users u ON o.student_id = u.id
-           WHERE o.vendor_id = ?
-           ORDER BY o.created_at DESC LIMIT 50""",
-        (vendor["id"],),
-    ).fetchall()
-
-    result = []
-    for o in orders:
-        items = db.execute(
-            """SELECT oi.quantity, oi.price, mi.name, mi.emoji
-               FROM order_items oi
-               JOIN menu_items mi ON oi.menu_item_id = mi.id
-               WHERE oi.order_id = ?""",
-            (o["id"],),
-        ).fetchall()
-
-        result.append({
+           WHERE o.vendor_id = ? AND (o.created_at, o.id) < (?, ?)
+           ORDER BY o.created_at DESC, o.id DESC LIMIT ?""",
+        (vendor["id"], before_at, before_id, limit + 1),
+    ).fetchall(), limit)
+
+    items = load_order_items(db, [o["id"] for o in orders])
+    result = [
+        {
             "id": o["id"],
             "student": o["student_name"],
             "total": o["total_amount"],
             "txn_id": o["txn_id"],
             "status": o["status"],
             "time": o["created_at"],
-            "items": [
-                {"name": i["name"], "emoji": i["emoji"], "qty": i["quantity"], "price": i["price"]}
-                for i in items
-            ],
-        })
+            "items": items[o["id"]],
+        }
+        for o in orders
+    ]
 
-    db.close()
-    return jsonify({"orders": result})
+    return jsonify({"orders": result, "next_cursor": next_cursor})
@@ -0,0 +1,358 @@
+"""
+CampusChain Backend — Shared algod Client
+
+One process-wide AlgodClient whose HTTP calls go through a pooled
+requests.Session, so balance checks, opt-ins, funding and payments
+reuse keep-alive connections to the node instead of paying a fresh
+TCP/TLS handshake on every call.
+
+The session's connection pool is thread-safe, so the same client is
+shared by every worker thread of a multi-threaded WSGI server.
+
+Several nodes can be configured (ALGOD_ADDRESSES) so one slow or dead
+node doesn't stall every route:
+  - Nodes are tried healthiest first (lowest recent latency).
+  - Reads (GET) are hedged: if the first node hasn't answered within
+    ALGOD_HEDGE_MS, the same read is also sent to the next node and the
+    first answer wins.
+  - Submissions and long polls fail over to the next node when a node
+    errors (connection failure, timeout or 5xx). A 4xx is algod's
+    answer (e.g. a rejected txn) and is never retried elsewhere. (A
+    submit that timed out may still have landed; resending it elsewhere
+    is harmless, as the same signed txn has the same txid. Such a
+    failover resend answered "already in ledger / in pool" counts as
+    success, but only for a single txn whose txid the error names: for
+    a group, one duplicate member rejects the whole group.)
+  - A pending-txn lookup answered 404 by one node is asked of the
+    others: a node that never saw the txn is not an answer. Only a 404
+    from every node is returned.
+  - A node that fails ALGOD_BREAKER_FAILURES times in a row is taken
+    out of rotation for ALGOD_BREAKER_COOLDOWN seconds, then given one
+    trial request.
+Per-node stats are exposed via node_stats() (GET /api/admin/algod).
+"""
+
+import io
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib import parse
+
+import msgpack
+import requests
+from requests.adapters import HTTPAdapter
+from algosdk import constants, encoding, error
+from algosdk.v2client import algod
+
+from config import (
+    ALGOD_ADDRESSES, ALGOD_TOKEN,
+    ALGOD_POOL_SIZE, ALGOD_CONNECT_TIMEOUT, ALGOD_READ_TIMEOUT,
+    ALGOD_HEDGE_MS, ALGOD_BREAKER_FAILURES, ALGOD_BREAKER_COOLDOWN,
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+# Recent latencies kept per node for the stats percentiles
+LATENCY_WINDOW = 256
+# Weight of the newest sample in the latency moving average
+EWMA_ALPHA = 0.2
+
+
+class _NodeFailure(Exception):
+    """A node-level failure (unreachable, timed out or 5xx) or a pending-txn 404: try another node."""
+
+    def __init__(self, node, exc):
+        super().__init__(str(exc))
+        self.node = node
+        self.exc = exc
+
+
+class AlgodNode:
+    """One algod endpoint with its health score and circuit breaker."""
+
+    def __init__(self, address, breaker_failures=ALGOD_BREAKER_FAILURES,
+                 breaker_cooldown=ALGOD_BREAKER_COOLDOWN):
+        self.address = address.rstrip("/")
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.failed_at = 0.0
+        self.latency_ewma = None
+        self.last_error = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def available(self, now=None):
+        """False while the breaker is open."""
+        return (now or time.monotonic()) >= self.open_until
+
+    def score(self, now=None):
+        """
+        Lower is better: recent latency, penalised per consecutive failure
+        for one cooldown period so a flaky node is tried again later.
+        """
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.0
+        if (now or time.monotonic()) - self.failed_at < self.breaker_cooldown:
+            latency += 1000.0 * self.consecutive_failures
+        return latency
+
+    def record_success(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            ms = seconds * 1000.0
+            self._latencies.append(ms)
+            self.latency_ewma = ms if self.latency_ewma is None else (
+                EWMA_ALPHA * ms + (1 - EWMA_ALPHA) * self.latency_ewma
+            )
+
+    def record_failure(self, exc):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.consecutive_failures += 1
+            self.failed_at = time.monotonic()
+            self.last_error = str(exc)[:200]
+            if self.consecutive_failures >= self.breaker_failures:
+                self.open_until = time.monotonic() + self.breaker_cooldown
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            now = time.monotonic()
+            if self.available(now):
+                state = "half-open" if self.consecutive_failures >= self.breaker_failures else "closed"
+            else:
+                state = "open"
+
+            def pct(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p / 100.0 * len(latencies)))], 2)
+
+            return {
+                "address": self.address,
+                "state": state,
+                "requests": self.requests,
+                "errors": self.errors,
+                "hedged": self.hedges,
+                "consecutive_failures": self.consecutive_failures,
+                "latency_ms_avg": round(self.latency_ewma, 2) if self.latency_ewma is not None else None,
+                "latency_ms_p50": pct(50),
+                "latency_ms_p95": pct(95),
+                "last_error": self.last_error,
+            }
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """
+    AlgodClient that sends every request over a shared keep-alive pool,
+    spread over one or more nodes.
+
+    Behaves exactly like the SDK client (same auth header, /v2 prefix and
+    AlgodHTTPError on non-2xx), only the transport is swapped.
+    """
+
+    def __init__(self, algod_token, algod_address, headers=None,
+                 pool_size=ALGOD_POOL_SIZE,
+                 connect_timeout=ALGOD_CONNECT_TIMEOUT,
+                 read_timeout=ALGOD_READ_TIMEOUT,
+                 hedge_ms=ALGOD_HEDGE_MS):
+        addresses = [algod_address] if isinstance(algod_address, str) else list(algod_address)
+        super().__init__(algod_token, addresses[0].rstrip("/"), headers)
+        self.nodes = [AlgodNode(a) for a in addresses]
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.hedge_delay = hedge_ms / 1000.0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.nodes), pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._hedge_pool = None
+        if len(self.nodes) > 1:
+            self._hedge_pool = ThreadPoolExecutor(
+                max_workers=pool_size * len(self.nodes), thread_name_prefix="algod-hedge"
+            )
+
+    def algod_request(self, method, requrl, params=None, data=None,
+                      headers=None, response_format="json", timeout=None):
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        if requrl not in constants.unversioned_paths:
+            requrl = algod.api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        # The SDK passes its own long-poll timeout for wait-for-block calls
+        read_timeout = max(timeout or 0, self.read_timeout)
+
+        failed_nodes = []
+
+        def call(node):
+            started = time.perf_counter()
+            try:
+                resp = self.session.request(
+                    method,
+                    node.address + requrl,
+                    headers=header,
+                    data=data,
+                    timeout=(self.connect_timeout, read_timeout),
+                )
+            except requests.RequestException as e:
+                node.record_failure(e)
+                failed_nodes.append(node)
+                raise _NodeFailure(node, error.AlgodRequestError(f"algod request failed: {e}"))
+            if resp.status_code >= 500:
+                exc = _http_error(resp)
+                node.record_failure(exc)
+                failed_nodes.append(node)
+                raise _NodeFailure(node, exc)
+            node.record_success(time.perf_counter() - started)
+            if resp.status_code == 404 and pending_lookup:
+                # This node may just not have seen the txn; ask the others
+                raise _NodeFailure(node, _http_error(resp))
+            return resp
+
+        nodes = self._ordered_nodes()
+        pending_lookup = "/transactions/pending/" in requrl
+        long_poll = "/status/wait-for-block-after/" in requrl
+        try:
+            if method == "GET" and not long_poll and len(nodes) > 1:
+                resp = self._hedged(nodes, call)
+            else:
+                resp = self._failover(nodes, call)
+        except _NodeFailure as e:
+            raise e.exc from None
+
+        if resp.status_code >= 400:
+            exc = _http_error(resp)
+            if method == "POST" and requrl.endswith("/transactions") and failed_nodes:
+                # A failover resend (after a timed-out submit) of a txn that got in
+                tx_id = _resent_txid(data, exc)
+                if tx_id is not None:
+                    return {"txId": tx_id} if response_format == "json" else resp.content
+            raise exc
+
+        if response_format == "json":
+            if not resp.content:
+                # Some algod responses are a 200 OK with an empty body
+                return {}
+            try:
+                return resp.json()
+            except ValueError as e:
+                raise error.AlgodResponseError(
+                    "Failed to parse JSON response from algod"
+                ) from e
+        return resp.content
+
+    def _ordered_nodes(self):
+        """Healthy nodes by score; nodes with an open breaker only as a last resort."""
+        now = time.monotonic()
+        healthy = sorted((n for n in self.nodes if n.available(now)), key=lambda n: n.score(now))
+        tripped = sorted((n for n in self.nodes if not n.available(now)), key=lambda n: n.open_until)
+        return healthy + tripped
+
+    def _failover(self, nodes, call):
+        failure = None
+        for node in nodes:
+            try:
+                return call(node)
+            except _NodeFailure as e:
+                failure = e
+        raise failure
+
+    def _hedged(self, nodes, call):
+        """Start on the best node; add the next one each time hedge_delay passes or a node fails."""
+        remaining = list(nodes)
+        in_flight = {self._hedge_pool.submit(call, remaining.pop(0))}
+        failure = None
+        while in_flight:
+            timeout = self.hedge_delay if remaining else None
+            done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except _NodeFailure as e:
+                    failure = e
+            if remaining:
+                node = remaining.pop(0)
+                if not done:
+                    node.hedges += 1
+                in_flight.add(self._hedge_pool.submit(call, node))
+        raise failure
+
+    def node_stats(self):
+        return [node.stats() for node in self.nodes]
+
+    def close(self):
+        self.session.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+
+
+def _http_error(resp):
+    message = resp.text
+    body = {}
+    try:
+        body = resp.json()
+        message = body.get("message", message)
+    except ValueError:
+        pass
+    return error.AlgodHTTPError(message, resp.status_code, body.get("data"))
+
+
+def _resent_txid(data, exc):
+    """
+    Txid of the single signed txn in a raw POST /v2/transactions body if
+    algod rejected it as already in the ledger / pool, naming that txid;
+    None otherwise (groups, other errors, or a different txid).
+    """
+    message = str(exc)
+    if "already in ledger" not in message and "already in pool" not in message:
+        return None
+    try:
+        signed = list(msgpack.Unpacker(io.BytesIO(data), raw=False, strict_map_key=False))
+    except (TypeError, ValueError, msgpack.UnpackException):
+        return None
+    if len(signed) != 1:
+        return None
+    tx_id = encoding.msgpack_decode(signed[0]).get_txid()
+    return tx_id if tx_id in message else None
+
+
+def get_algod_client():
+    """Return the process-wide pooled algod client (created on first use)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PooledAlgodClient(ALGOD_TOKEN, ALGOD_ADDRESSES)
+    return _client
+
+
+def node_stats():
+    """Per-node health and latency for the shared client."""
+    return get_algod_client().node_stats()
+
+
+def reset_algod_client():
+    """Drop the shared client (e.g. after changing ALGOD_ADDRESS in tests)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
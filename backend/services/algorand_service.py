@@ -2,130 +2,212 @@
 CampusChain Backend — Algorand Service (Custodial)
 
 CUSTODIAL MODEL: All transactions are signed by the backend using
-mnemonics stored in the database. No user ever touches a wallet.
+keys stored encrypted in the database (see services.key_vault).
+No user ever touches a wallet.
 
 Functions:
   - create_wallet()         → generate new Algorand account
   - get_token_balance()     → query ASA balance
   - opt_in_asa()            → opt an account into CampusToken
   - fund_student()          → admin → student ASA transfer
+  - fund_students()         → admin → many students, in atomic groups
+  - fund_students_via_vault() → CampusVault fund_many → many students
   - transfer_student_to_vendor() → student → vendor ASA transfer (backend-signed)
 """
 
-from algosdk import account, mnemonic, transaction
-from algosdk.v2client import algod
+from algosdk import account, constants, error, transaction
 import json
 
-from config import ALGOD_ADDRESS, ALGOD_TOKEN, ADMIN_MNEMONIC, ASA_ID
-
-
-def get_algod_client():
-    return algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
+from config import ASA_ID, PAYMENT_BATCH_WINDOW_MS, VAULT_APP_ID, VAULT_RECIPIENTS_PER_CALL
+from services.algod_client import get_algod_client
+from services.key_vault import admin_keys, seal_key, signing_key
+from services.params_cache import TxnOutcomeUnknown, submit_with_params, unique
+from services.payment_batcher import batcher
+from services.txn_groups import submit_in_groups
 
 
 def get_admin_keys():
-    """Return (private_key, address) for the admin account."""
-    sk = mnemonic.to_private_key(ADMIN_MNEMONIC)
-    addr = account.address_from_private_key(sk)
-    return sk, addr
+    """Return (private_key, address) for the admin account (decoded once)."""
+    return admin_keys()
 
 
 def create_wallet():
     """
     Generate a new Algorand account for custodial use.
-    Returns (address, mnemonic_phrase).
+    Returns (address, sealed_key) — the key encrypted for storage.
     """
     sk, addr = account.generate_account()
-    mn = mnemonic.from_private_key(sk)
-    return addr, mn
+    return addr, seal_key(sk)
+
+
+def fetch_token_balance(address):
+    """Get the CampusToken balance for an address from algod (raises on error)."""
+    client = get_algod_client()
+    account_info = client.account_info(address)
+    for asset in account_info.get("assets", []):
+        if asset["asset-id"] == ASA_ID:
+            return asset["amount"]
+    return 0
 
 
 def get_token_balance(address):
     """Get the CampusToken balance for an address."""
     try:
-        client = get_algod_client()
-        account_info = client.account_info(address)
-        for asset in account_info.get("assets", []):
-            if asset["asset-id"] == ASA_ID:
-                return asset["amount"]
+        return fetch_token_balance(address)
     except Exception:
-        pass
-    return 0
+        return 0
 
 
-def opt_in_asa(user_mnemonic):
+def opt_in_asa(addr, sealed_key):
     """
     Opt an account into CampusToken ASA.
-    Backend signs using the stored mnemonic — user doesn't need to do anything.
+    Backend signs using the stored key — user doesn't need to do anything.
     """
     client = get_algod_client()
-    sk = mnemonic.to_private_key(user_mnemonic)
-    addr = account.address_from_private_key(sk)
-    params = client.suggested_params()
-
-    txn = transaction.AssetTransferTxn(
-        sender=addr,
-        sp=params,
-        receiver=addr,
-        amt=0,
-        index=ASA_ID,
-    )
-
-    signed_txn = txn.sign(sk)
-    tx_id = client.send_transaction(signed_txn)
+    sk = signing_key(addr, sealed_key)
+
+    def build(params):
+        return unique(transaction.AssetTransferTxn(
+            sender=addr,
+            sp=params,
+            receiver=addr,
+            amt=0,
+            index=ASA_ID,
+        )).sign(sk)
+
+    tx_id = submit_with_params(client, build)
     transaction.wait_for_confirmation(client, tx_id, 4)
     return tx_id
 
 
-def fund_student(student_addr, amount):
+def _wait_sent(client, tx_id):
+    """Wait for a sent txn; a failure other than algod rejecting it leaves the outcome unknown."""
+    try:
+        transaction.wait_for_confirmation(client, tx_id, 4)
+    except error.TransactionRejectedError:
+        raise
+    except Exception as e:
+        raise TxnOutcomeUnknown(tx_id, e) from e
+
+
+def fund_student(student_addr, amount, wait=True):
     """
     Transfer CampusTokens from admin reserve → student wallet.
     Called when a parent "funds" the student via simulated UPI.
     Backend signs with admin key — parent never touches crypto.
+    With wait=False the txid is returned as soon as algod accepts it.
     """
     client = get_algod_client()
     admin_sk, admin_addr = get_admin_keys()
-    params = client.suggested_params()
-
-    txn = transaction.AssetTransferTxn(
-        sender=admin_addr,
-        sp=params,
-        receiver=student_addr,
-        amt=amount,
-        index=ASA_ID,
-    )
-
-    signed_txn = txn.sign(admin_sk)
-    tx_id = client.send_transaction(signed_txn)
-    transaction.wait_for_confirmation(client, tx_id, 4)
+
+    def build(params):
+        return unique(transaction.AssetTransferTxn(
+            sender=admin_addr,
+            sp=params,
+            receiver=student_addr,
+            amt=amount,
+            index=ASA_ID,
+        )).sign(admin_sk)
+
+    tx_id = submit_with_params(client, build)
+    if wait:
+        _wait_sent(client, tx_id)
     return tx_id
 
 
-def transfer_student_to_vendor(student_mnemonic, vendor_addr, amount, category):
+def fund_students(transfers, wait=True):
+    """
+    Transfer CampusTokens from admin reserve → many student wallets.
+    transfers: [(student_addr, amount)]. Sent as atomic groups of up to
+    16 with one confirmation wait per group.
+    Returns [(txid, None) | (None, error)] aligned with transfers.
+    """
+    admin_sk, admin_addr = get_admin_keys()
+    entries = [
+        (
+            lambda sp, addr=addr, amount=amount: transaction.AssetTransferTxn(
+                sender=admin_addr, sp=sp, receiver=addr, amt=amount, index=ASA_ID,
+            ),
+            admin_sk,
+        )
+        for addr, amount in transfers
+    ]
+    return submit_in_groups(get_algod_client(), entries, wait=wait)
+
+
+def fund_students_via_vault(transfers, wait=True):
+    """
+    Disburse CampusTokens from the CampusVault app → many students using
+    its fund_many method: up to VAULT_RECIPIENTS_PER_CALL recipients per
+    app call (accounts-array limit), 16 calls per atomic group, with the
+    inner-transaction fees pooled onto each outer call.
+    transfers: [(student_addr, amount)].
+    Returns [(txid, None) | (None, error)] aligned with transfers, where
+    txid is the app call that paid that student.
+    """
+    if not VAULT_APP_ID:
+        raise RuntimeError("VAULT_APP_ID is not configured")
+
+    admin_sk, admin_addr = get_admin_keys()
+    calls = [
+        transfers[start:start + VAULT_RECIPIENTS_PER_CALL]
+        for start in range(0, len(transfers), VAULT_RECIPIENTS_PER_CALL)
+    ]
+
+    def make_call(sp, chunk):
+        sp.flat_fee = True
+        sp.fee = (1 + len(chunk)) * max(sp.min_fee or 0, constants.MIN_TXN_FEE)
+        return transaction.ApplicationNoOpTxn(
+            sender=admin_addr,
+            sp=sp,
+            index=VAULT_APP_ID,
+            app_args=["fund_many"] + [amount for _, amount in chunk],
+            accounts=[addr for addr, _ in chunk],
+            foreign_assets=[ASA_ID],
+        )
+
+    entries = [(lambda sp, chunk=chunk: make_call(sp, chunk), admin_sk) for chunk in calls]
+    outcomes = submit_in_groups(get_algod_client(), entries, wait=wait)
+
+    results = []
+    for chunk, outcome in zip(calls, outcomes):
+        results.extend([outcome] * len(chunk))
+    return results
+
+
+def transfer_student_to_vendor(student_addr, student_key_enc, vendor_addr, amount, category, wait=True):
     """
     Transfer CampusTokens from student → vendor.
-    Backend signs using the student's custodial mnemonic.
+    Backend signs using the student's custodial key from the vault.
     Attaches category in the note field for on-chain traceability.
+    With wait=False the txid is returned as soon as algod accepts it.
+    Raises TxnOutcomeUnknown (with the txid) if it was sent but it is not
+    known whether it landed.
+
+    When PAYMENT_BATCH_WINDOW_MS > 0 the transfer goes through the
+    micro-batcher and may share an atomic group with concurrent payments.
     """
-    client = get_algod_client()
-    sk = mnemonic.to_private_key(student_mnemonic)
-    student_addr = account.address_from_private_key(sk)
-    params = client.suggested_params()
+    sk = signing_key(student_addr, student_key_enc)
 
     note = json.dumps({"cat": category}).encode()
 
-    txn = transaction.AssetTransferTxn(
-        sender=student_addr,
-        sp=params,
-        receiver=vendor_addr,
-        amt=amount,
-        index=ASA_ID,
-        note=note,
-    )
-
-    signed_txn = txn.sign(sk)
-    tx_id = client.send_transaction(signed_txn)
-    transaction.wait_for_confirmation(client, tx_id, 4)
+    def make_txn(params):
+        return transaction.AssetTransferTxn(
+            sender=student_addr,
+            sp=params,
+            receiver=vendor_addr,
+            amt=amount,
+            index=ASA_ID,
+            note=note,
+        )
+
+    if PAYMENT_BATCH_WINDOW_MS > 0:
+        return batcher.submit(make_txn, sk, wait=wait).result()
+
+    client = get_algod_client()
+    tx_id = submit_with_params(client, lambda params: unique(make_txn(params)).sign(sk))
+    if wait:
+        _wait_sent(client, tx_id)
     return tx_id
 
 
@@ -136,16 +218,15 @@ def fund_account_with_algo(target_addr, microalgos=500_000):
     """
     client = get_algod_client()
     admin_sk, admin_addr = get_admin_keys()
-    params = client.suggested_params()
 
-    txn = transaction.PaymentTxn(
-        sender=admin_addr,
-        sp=params,
-        receiver=target_addr,
-        amt=microalgos,
-    )
+    def build(params):
+        return unique(transaction.PaymentTxn(
+            sender=admin_addr,
+            sp=params,
+            receiver=target_addr,
+            amt=microalgos,
+        )).sign(admin_sk)
 
-    signed_txn = txn.sign(admin_sk)
-    tx_id = client.send_transaction(signed_txn)
+    tx_id = submit_with_params(client, build)
     transaction.wait_for_confirmation(client, tx_id, 4)
     return tx_id
@@ -0,0 +1,152 @@
+"""
+CampusChain Backend — Shadow Ledger of CampusToken Balances
+
+Balance reads (/student/balance, /vendor/balance, /student/summary,
+/parent/spending) and the pre-payment checks in /vendor/pay and
+/canteen/order are served from the local token_balances table instead
+of an algod account_info call each time.
+
+  - An address is loaded from algod the first time it is read.
+  - Every fund and payment adjusts the table in the same DB transaction
+    that records it, so the next read already reflects the write.
+    Pending payments that later fail are reversed by the tracker.
+  - A background sync re-reads the stalest addresses from algod to
+    correct any drift. Addresses with pending transactions are skipped
+    until those settle.
+"""
+
+import threading
+
+from config import BALANCE_SYNC_SECONDS, BALANCE_SYNC_BATCH
+from models import connect
+from services.algorand_service import fetch_token_balance
+
+# Addresses with pending transactions are collected once (from the partial
+# status = 'pending' indexes), then token_balances is read in synced_at order
+STALE_ADDRESSES_SQL = """
+    SELECT address, version FROM token_balances
+    WHERE address NOT IN (
+        SELECT address FROM (
+            SELECT u.algo_address AS address FROM transactions t
+            JOIN users u ON t.student_id = u.id WHERE t.status = 'pending'
+            UNION
+            SELECT v.algo_address FROM transactions t
+            JOIN vendors v ON t.vendor_id = v.id WHERE t.status = 'pending'
+            UNION
+            SELECT u.algo_address FROM funding_log f
+            JOIN users u ON f.student_id = u.id WHERE f.status = 'pending'
+        ) WHERE address IS NOT NULL
+    )
+    ORDER BY synced_at ASC
+    LIMIT ?
+"""
+
+
+def get_balance(db, address):
+    """CampusToken balance for an address, from the shadow ledger."""
+    row = db.execute(
+        "SELECT balance FROM token_balances WHERE address = ?", (address,)
+    ).fetchone()
+    if row:
+        return row["balance"]
+
+    try:
+        balance = fetch_token_balance(address)
+    except Exception:
+        # Don't cache a guess: report 0 and try algod again next time
+        return 0
+
+    _load_entry(address, balance)
+    return balance
+
+
+def _load_entry(address, balance):
+    """
+    Add a first ledger entry on a short connection of its own, so the
+    caller's open transaction is neither committed nor held open. If
+    the write can't be made now, the next read loads it again.
+    """
+    try:
+        conn = connect()
+        try:
+            conn.execute(
+                """INSERT OR IGNORE INTO token_balances (address, balance, synced_at)
+                   VALUES (?, ?, CURRENT_TIMESTAMP)""",
+                (address, balance),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Warning: could not cache balance for {address}: {e}")
+
+
+def apply_transfer(db, sender, receiver, amount):
+    """
+    Move amount between two ledger entries (either side may be None, e.g.
+    the admin reserve). Addresses not yet in the ledger are left alone —
+    they'll be loaded from algod on first read. No commit here.
+    """
+    if sender:
+        db.execute(
+            "UPDATE token_balances SET balance = balance - ?, version = version + 1 WHERE address = ?",
+            (amount, sender),
+        )
+    if receiver:
+        db.execute(
+            "UPDATE token_balances SET balance = balance + ?, version = version + 1 WHERE address = ?",
+            (amount, receiver),
+        )
+
+
+def sync_stale(limit=BALANCE_SYNC_BATCH):
+    """Re-read the stalest ledger entries from algod. Returns how many changed."""
+    db = connect()
+    try:
+        rows = db.execute(STALE_ADDRESSES_SQL, (limit,)).fetchall()
+        corrected = 0
+        for row in rows:
+            try:
+                balance = fetch_token_balance(row["address"])
+            except Exception:
+                continue
+            # Only overwrite if no local write landed while we were asking algod
+            cur = db.execute(
+                """UPDATE token_balances
+                   SET balance = ?, synced_at = CURRENT_TIMESTAMP, version = version + 1
+                   WHERE address = ? AND version = ? AND balance != ?""",
+                (balance, row["address"], row["version"], balance),
+            )
+            corrected += cur.rowcount
+            db.execute(
+                "UPDATE token_balances SET synced_at = CURRENT_TIMESTAMP WHERE address = ? AND version = ?",
+                (row["address"], row["version"]),
+            )
+            db.commit()
+        return corrected
+    finally:
+        db.close()
+
+
+_sync_thread = None
+_sync_lock = threading.Lock()
+
+
+def _sync_loop():
+    stop = threading.Event()
+    while not stop.wait(BALANCE_SYNC_SECONDS):
+        try:
+            corrected = sync_stale()
+            if corrected:
+                print(f"Balance sync corrected {corrected} drifted balance(s)")
+        except Exception as e:
+            print(f"Warning: balance sync failed: {e}")
+
+
+def start_balance_sync():
+    """Start the periodic drift-correction thread (once per process)."""
+    global _sync_thread
+    with _sync_lock:
+        if _sync_thread is None and BALANCE_SYNC_SECONDS > 0:
+            _sync_thread = threading.Thread(target=_sync_loop, name="balance-sync", daemon=True)
+            _sync_thread.start()
@@ -0,0 +1,108 @@
+"""
+CampusChain Backend — Batch Funding
+
+Credits many students in one request (scholarships, hostel stipends,
+parents with several children). Transfers from the admin reserve go out
+as atomic groups of up to 16 — or, when VAULT_APP_ID is set, as
+CampusVault fund_many calls — the funding_log rows are written with one
+executemany, and the caller gets a result per recipient.
+"""
+
+from config import ASYNC_SUBMIT, FUND_BATCH_MAX, VAULT_APP_ID
+from services.algorand_service import fund_students, fund_students_via_vault
+from services.balance_ledger import apply_transfer
+from services.confirmation_tracker import track
+from services.params_cache import TxnOutcomeUnknown
+from services.rollups import add_funding
+from services.stats_counters import bump
+
+
+class InvalidBatch(ValueError):
+    """Raised when a batch funding request is malformed."""
+
+
+def parse_items(items):
+    """Validate [{student_id, amount}] and return [(student_id, amount)]."""
+    if not isinstance(items, list) or not items:
+        raise InvalidBatch("items must be a non-empty list")
+    if len(items) > FUND_BATCH_MAX:
+        raise InvalidBatch(f"At most {FUND_BATCH_MAX} recipients per batch")
+
+    parsed = []
+    for n, item in enumerate(items, start=1):
+        student_id = item.get("student_id") if isinstance(item, dict) else None
+        amount = item.get("amount", 0) if isinstance(item, dict) else 0
+        if not isinstance(student_id, int) or not isinstance(amount, int) or amount <= 0:
+            raise InvalidBatch(f"Item {n}: student_id and a positive integer amount required")
+        parsed.append((student_id, amount))
+    return parsed
+
+
+def fund_batch(db, funder_id, items):
+    """
+    Fund every (student_id, amount) in items on behalf of funder_id
+    (parent or admin user). Authorisation is the caller's job.
+    Returns a result dict per item, in order.
+    """
+    ids = sorted({student_id for student_id, _ in items})
+    addresses = {}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        rows = db.execute(
+            "SELECT id, algo_address FROM users WHERE role = 'student' AND id IN ({})".format(
+                ",".join("?" * len(chunk))
+            ),
+            chunk,
+        ).fetchall()
+        addresses.update({r["id"]: r["algo_address"] for r in rows if r["algo_address"]})
+
+    results = [{"student_id": sid, "amount": amount} for sid, amount in items]
+    sendable = [i for i, (sid, _) in enumerate(items) if sid in addresses]
+    for i, (sid, _) in enumerate(items):
+        if sid not in addresses:
+            results[i].update(status="failed", error="Student wallet not found")
+
+    send = fund_students_via_vault if VAULT_APP_ID else fund_students
+    outcomes = send(
+        [(addresses[items[i][0]], items[i][1]) for i in sendable],
+        wait=not ASYNC_SUBMIT,
+    )
+
+    log_rows = []
+    for i, (tx_id, exc) in zip(sendable, outcomes):
+        sid, amount = items[i]
+        status = "pending" if ASYNC_SUBMIT else "confirmed"
+        if isinstance(exc, TxnOutcomeUnknown):
+            # Sent but not known to have landed: the tracker settles it
+            tx_id, status = exc.txid, "pending"
+        elif exc is not None:
+            results[i].update(status="failed", error=str(exc))
+            continue
+        results[i].update(status=status, txn_id=tx_id)
+        log_rows.append((funder_id, sid, amount, tx_id, status))
+        apply_transfer(db, None, addresses[sid], amount)
+
+    db.executemany(
+        "INSERT INTO funding_log (parent_id, student_id, amount, txn_id, status) VALUES (?, ?, ?, ?, ?)",
+        log_rows,
+    )
+    funded = sum(row[2] for row in log_rows)
+    bump(db, total_funded=funded)
+    if log_rows:
+        add_funding(db, funded, count=len(log_rows))
+    db.commit()
+
+    pending = [row[3] for row in log_rows if row[4] == "pending"]
+    if pending:
+        track(pending[0])
+    return results
+
+
+def summarize(results):
+    funded = [r for r in results if r["status"] != "failed"]
+    return {
+        "recipients": len(results),
+        "funded": len(funded),
+        "failed": len(results) - len(funded),
+        "tokens_sent": sum(r["amount"] for r in funded),
+    }
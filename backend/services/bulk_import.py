@@ -0,0 +1,231 @@
+"""
+CampusChain Backend — Bulk Student Onboarding
+
+Start-of-term import of thousands of students from CSV or NDJSON
+(columns / keys: username, password), used by
+POST /api/admin/students/import and the import_students.py CLI.
+
+Passwords are hashed in parallel (IMPORT_HASH_WORKERS threads) when the
+job is created: import_jobs keeps only usernames and password hashes,
+never the uploaded text, and even those are cleared once the job
+completes.
+
+Rows are then processed in chunks of IMPORT_CHUNK_SIZE:
+  1. usernames that already exist are skipped (makes resume idempotent)
+  2. wallets are provisioned with ALGO top-up + ASA opt-in in atomic
+     groups of 16
+  3. users are inserted with their wallets with executemany, and the
+     job's progress is advanced, all in one DB transaction
+
+An interrupted import resumes from the last completed chunk.
+claim_job() makes sure only one worker runs a job at a time.
+"""
+
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from config import IMPORT_CHUNK_SIZE, IMPORT_HASH_WORKERS
+from models import connect
+from services.stats_counters import count_user
+from services.wallet_pool import provision_wallets
+
+
+# A 'running' job not updated for this long is taken to have died with its
+# process (every chunk updates it) and may be resumed
+STALE_RUNNING_SECONDS = 600
+
+
+class InvalidImport(ValueError):
+    """Raised for malformed import input."""
+
+
+class ImportInProgress(RuntimeError):
+    """Raised when resuming a job another worker is still running."""
+
+
+def parse_rows(text, fmt):
+    """
+    Parse CSV or NDJSON text into [{"username", "password"}].
+    A username repeated later in the file is ignored (first one wins).
+    """
+    if fmt == "csv":
+        records = list(csv.DictReader(io.StringIO(text)))
+    elif fmt == "ndjson":
+        try:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise InvalidImport(f"Invalid NDJSON: {e}")
+    else:
+        raise InvalidImport("Format must be csv or ndjson")
+
+    rows = []
+    seen = set()
+    for n, rec in enumerate(records, start=1):
+        username = (rec.get("username") or "").strip()
+        password = rec.get("password") or ""
+        if not username or not password:
+            raise InvalidImport(f"Row {n}: username and password required")
+        if username in seen:
+            continue
+        seen.add(username)
+        rows.append({"username": username, "password": password})
+    return rows
+
+
+def hash_rows(rows):
+    """[{"username", "password"}] -> [{"username", "password_hash"}], hashed in parallel."""
+    with ThreadPoolExecutor(max_workers=IMPORT_HASH_WORKERS) as hashers:
+        hashes = list(hashers.map(generate_password_hash, [r["password"] for r in rows]))
+    return [{"username": r["username"], "password_hash": h} for r, h in zip(rows, hashes)]
+
+
+def create_job(db, source_name, fmt, text):
+    """
+    Validate the input, hash its passwords and record a new import job.
+    Returns its id. The plaintext is never written to the database.
+    """
+    rows = hash_rows(parse_rows(text, fmt))
+    cur = db.execute(
+        """INSERT INTO import_jobs (source_name, format, source, total, hashed)
+           VALUES (?, ?, ?, ?, 1)""",
+        (source_name, fmt, "\n".join(json.dumps(r) for r in rows), len(rows)),
+    )
+    db.commit()
+    return cur.lastrowid
+
+
+def _job_rows(db, job):
+    """
+    The job's rows with password hashes. A job created before passwords
+    were hashed up front still holds the uploaded text: it is hashed and
+    overwritten now.
+    """
+    if job["hashed"]:
+        return [json.loads(line) for line in job["source"].splitlines()]
+    rows = hash_rows(parse_rows(job["source"], job["format"]))
+    db.execute(
+        "UPDATE import_jobs SET source = ?, hashed = 1 WHERE id = ?",
+        ("\n".join(json.dumps(r) for r in rows), job["id"]),
+    )
+    db.commit()
+    return rows
+
+
+def get_job(db, job_id):
+    row = db.execute(
+        """SELECT id, source_name, total, processed, imported, status, error,
+                  created_at, updated_at
+           FROM import_jobs WHERE id = ?""",
+        (job_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def claim_job(db, job_id):
+    """
+    Atomically mark a job 'running' for this worker. False if it is
+    completed or another worker is running it (and isn't stale).
+    """
+    cur = db.execute(
+        """UPDATE import_jobs SET status = 'running', error = NULL, updated_at = CURRENT_TIMESTAMP
+           WHERE id = ? AND (status NOT IN ('running', 'completed')
+                             OR (status = 'running' AND updated_at < datetime('now', ?)))""",
+        (job_id, f"-{STALE_RUNNING_SECONDS} seconds"),
+    )
+    db.commit()
+    return cur.rowcount == 1
+
+
+def run_job(job_id, progress=None, claimed=False):
+    """
+    Run (or resume) an import job to completion.
+    progress(job_dict) is called after every chunk. Pass claimed=True if
+    the caller already claimed the job with claim_job().
+    """
+    db = connect()
+    try:
+        job = db.execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+        if not job:
+            raise InvalidImport(f"Import job {job_id} not found")
+        if job["status"] == "completed":
+            return get_job(db, job_id)
+        if not claimed and not claim_job(db, job_id):
+            raise ImportInProgress(f"Import job {job_id} is already running")
+
+        rows = _job_rows(db, job)
+
+        for start in range(job["processed"], len(rows), IMPORT_CHUNK_SIZE):
+            _import_chunk(db, job_id, rows[start:start + IMPORT_CHUNK_SIZE])
+            if progress:
+                progress(get_job(db, job_id))
+
+        # Nothing left to resume from: drop the usernames and hashes too
+        db.execute(
+            """UPDATE import_jobs SET status = 'completed', source = '', updated_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (job_id,),
+        )
+        db.commit()
+        return get_job(db, job_id)
+
+    except Exception as e:
+        db.rollback()
+        db.execute(
+            "UPDATE import_jobs SET status = 'failed', error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (str(e), job_id),
+        )
+        db.commit()
+        raise
+    finally:
+        db.close()
+
+
+def _import_chunk(db, job_id, chunk):
+    names = [r["username"] for r in chunk]
+    placeholders = ",".join("?" * len(names))
+    existing = {
+        r["username"] for r in db.execute(
+            f"SELECT username FROM users WHERE username IN ({placeholders})", names
+        )
+    }
+    new_rows = [r for r in chunk if r["username"] not in existing]
+
+    if new_rows:
+        wallets = provision_wallets(len(new_rows))
+        if len(wallets) < len(new_rows):
+            # Park what did get set up; the chunk is retried on resume
+            _park(db, wallets)
+            raise RuntimeError(
+                f"Only {len(wallets)} of {len(new_rows)} wallets could be provisioned"
+            )
+
+        # Wallets go straight onto the users, never via the shared pool,
+        # where a concurrent registration could claim one
+        db.executemany(
+            """INSERT INTO users (username, password_hash, role, algo_address, algo_key_enc)
+               VALUES (?, ?, 'student', ?, ?)""",
+            [
+                (r["username"], r["password_hash"], addr, sealed)
+                for r, (addr, sealed) in zip(new_rows, wallets)
+            ],
+        )
+        count_user(db, "student", len(new_rows))
+
+    db.execute(
+        """UPDATE import_jobs
+           SET processed = processed + ?, imported = imported + ?, updated_at = CURRENT_TIMESTAMP
+           WHERE id = ?""",
+        (len(chunk), len(new_rows), job_id),
+    )
+    db.commit()
+
+
+def _park(db, wallets):
+    db.executemany(
+        "INSERT INTO wallet_pool (algo_address, algo_key_enc) VALUES (?, ?)", wallets
+    )
+    db.commit()
@@ -0,0 +1,56 @@
+"""
+CampusChain Backend — Canteen Vendor Lookup
+
+Every canteen order pays the built-in 'Campus Canteen' vendor, or the
+first registered food vendor if there is none. That only changes when a
+vendor registers, so the answer is cached in-process and /vendor/register
+calls invalidate() after its commit, instead of place_order() running up
+to two vendor lookups per order.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_cached = None
+# Bumped by invalidate(), so a lookup that raced a registration isn't cached
+_generation = 0
+
+
+def _lookup(db):
+    vendor = db.execute(
+        "SELECT id, algo_address FROM vendors WHERE name = 'Campus Canteen' LIMIT 1"
+    ).fetchone()
+    if vendor:
+        return vendor["id"], vendor["algo_address"]
+
+    # If no canteen vendor exists, use the first registered food vendor
+    vendor = db.execute(
+        "SELECT id, algo_address FROM vendors WHERE category = 'food' LIMIT 1"
+    ).fetchone()
+    if vendor:
+        return vendor["id"], vendor["algo_address"]
+
+    return None, None
+
+
+def get_canteen_vendor(db):
+    """(vendor_id, algo_address) receiving canteen payments, or (None, None)."""
+    global _cached
+    cached, generation = _cached, _generation
+    if cached is not None:
+        return cached
+
+    vendor = _lookup(db)
+    if vendor[0] is not None:
+        with _lock:
+            if generation == _generation:
+                _cached = vendor
+    return vendor
+
+
+def invalidate():
+    """Forget the cached vendor (call after a vendor registers)."""
+    global _cached, _generation
+    with _lock:
+        _cached = None
+        _generation += 1
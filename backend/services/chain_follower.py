@@ -0,0 +1,268 @@
+"""
+CampusChain Backend — Chain Follower
+
+Reconciles the DB with the chain. A background thread follows algod
+block by block from a checkpointed round and picks out CampusToken
+transfers carrying a {"cat": ...} note (every student → vendor payment
+the backend signs):
+
+  - A payment already recorded by /vendor/pay or /canteen/order is just
+    marked confirmed if it was still pending. One the tracker had given
+    up on as failed is restored (status, spending and balance ledger).
+  - A payment the DB never recorded (e.g. the process died between
+    submit and commit) is inserted into transactions and added to
+    category_spending. The unique txn_id index makes this idempotent.
+    The shadow balance ledger is left to the periodic balance sync.
+
+The last processed round is stored in chain_checkpoint in the same DB
+transaction as the block's writes, so a restart resumes from the next
+round without re-scanning history. A fresh database starts at the
+current round (CHAIN_FOLLOW_START=latest) or at a given round.
+
+The follower stays CHAIN_FOLLOW_LAG rounds behind the tip, so a payment
+route that has just seen its txn confirm usually gets to record it first.
+If the follower wins anyway, the route's insert (ON CONFLICT(txn_id) DO
+NOTHING) keeps the follower's row and skips counting the payment again. While
+caught up it long-polls algod for the next block. When behind, it fetches
+up to CHAIN_FOLLOW_PREFETCH blocks concurrently and applies them in order.
+
+process_block() takes a decoded block, so recorded block fixtures can be
+replayed without a node (tests/test_chain_follower.py); fake_algod.py
+serves /v2/blocks for end-to-end runs.
+"""
+
+import base64
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import msgpack
+from algosdk import encoding
+
+from config import (
+    ASA_ID, CHAIN_FOLLOWER, CHAIN_FOLLOW_START, CHAIN_FOLLOW_PREFETCH, CHAIN_FOLLOW_LAG,
+)
+from models import connect
+from services.algod_client import get_algod_client
+from services.balance_ledger import apply_transfer
+from services.confirmation_tracker import settle_txn
+from services.rollups import add_spend
+from services.spending import record_spend
+from services.stats_counters import bump
+
+CHECKPOINT = "blocks"
+CATEGORIES = ("food", "events", "stationery")
+# Back-off after an algod error before trying the same round again
+RETRY_SECONDS = 5.0
+
+
+def _canonical(obj):
+    """Sort map keys recursively (Algorand's canonical msgpack)."""
+    if isinstance(obj, dict):
+        return {k: _canonical(obj[k]) for k in sorted(obj)}
+    if isinstance(obj, list):
+        return [_canonical(v) for v in obj]
+    return obj
+
+
+def txid_of(txn):
+    """Transaction id of a decoded msgpack txn dict."""
+    packed = msgpack.packb(_canonical(txn), use_bin_type=True)
+    return base64.b32encode(encoding.checksum(b"TX" + packed)).decode().strip("=")
+
+
+def _full_txn(stib, header):
+    """The signed txn as sent: genesis id/hash are stripped inside a block."""
+    full = dict(stib.get("txn") or {})
+    if stib.get("hgi"):
+        full["gen"] = header.get("gen")
+    if stib.get("hgh"):
+        full["gh"] = header.get("gh")
+    return full
+
+
+def block_txids(block):
+    """Set of the ids of every top-level transaction in a decoded block."""
+    header = block["block"] if "block" in block else block
+    return {txid_of(_full_txn(stib, header)) for stib in header.get("txns") or []}
+
+
+def campus_payments(block, asa_id=ASA_ID):
+    """
+    Yield (txid, sender, receiver, amount, category, timestamp) for every
+    CampusToken transfer with a category note in a decoded block.
+    """
+    header = block["block"] if "block" in block else block
+    for stib in header.get("txns") or []:
+        txn = stib.get("txn") or {}
+        if txn.get("type") != "axfer" or txn.get("xaid") != asa_id or not txn.get("aamt"):
+            continue
+        try:
+            category = json.loads(txn.get("note") or b"").get("cat")
+        except (ValueError, AttributeError):
+            continue
+        if category not in CATEGORIES:
+            continue
+
+        yield (
+            txid_of(_full_txn(stib, header)),
+            encoding.encode_address(txn["snd"]),
+            encoding.encode_address(txn["arcv"]),
+            txn["aamt"],
+            category,
+            header.get("ts", 0),
+        )
+
+
+def get_checkpoint(db):
+    row = db.execute("SELECT round FROM chain_checkpoint WHERE name = ?", (CHECKPOINT,)).fetchone()
+    return row["round"] if row else None
+
+
+def process_block(db, rnd, block, asa_id=ASA_ID):
+    """
+    Apply one decoded block and advance the checkpoint to rnd, in one DB
+    transaction. Returns the number of payments newly inserted.
+    """
+    payments = list(campus_payments(block, asa_id))
+    inserted = 0
+    if payments:
+        addresses = {p[1] for p in payments} | {p[2] for p in payments}
+        marks = ",".join("?" * len(addresses))
+        students = {
+            r["algo_address"]: r["id"] for r in db.execute(
+                f"SELECT id, algo_address FROM users WHERE role = 'student' AND algo_address IN ({marks})",
+                list(addresses),
+            )
+        }
+        vendors = {
+            r["algo_address"]: r["id"] for r in db.execute(
+                f"SELECT id, algo_address FROM vendors WHERE algo_address IN ({marks})",
+                list(addresses),
+            )
+        }
+
+        for txid, sender, receiver, amount, category, ts in payments:
+            student_id = students.get(sender)
+            if student_id is None:
+                continue  # not one of our custodial students
+            at = datetime.utcfromtimestamp(ts)
+            existing = db.execute(
+                "SELECT status, vendor_id, created_at FROM transactions WHERE txn_id = ?", (txid,)
+            ).fetchone()
+            if existing and existing["status"] == "failed":
+                # Given up on by the tracker but it did land: redo what settle_txn undid
+                db.execute("UPDATE transactions SET status = 'confirmed' WHERE txn_id = ?", (txid,))
+                db.execute("UPDATE orders SET status = 'completed' WHERE txn_id = ? AND status = 'failed'", (txid,))
+                record_spend(db, student_id, category, amount, existing["created_at"][:7])
+                bump(db, total_transactions=1)
+                add_spend(db, category, existing["vendor_id"], amount, day=existing["created_at"][:10])
+                apply_transfer(db, sender, receiver, amount)
+                continue
+            if existing:
+                if existing["status"] == "pending":
+                    settle_txn(db, txid, True)
+                continue
+
+            cur = db.execute(
+                """INSERT OR IGNORE INTO transactions
+                   (student_id, vendor_id, amount, category, txn_id, status, created_at)
+                   VALUES (?, ?, ?, ?, ?, 'confirmed', ?)""",
+                (student_id, vendors.get(receiver), amount, category, txid,
+                 at.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            if cur.rowcount:
+                record_spend(db, student_id, category, amount, at.strftime("%Y-%m"))
+                bump(db, total_transactions=1)
+                add_spend(db, category, vendors.get(receiver), amount, day=at.strftime("%Y-%m-%d"))
+                inserted += 1
+
+    db.execute(
+        """INSERT INTO chain_checkpoint (name, round, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+           ON CONFLICT(name) DO UPDATE SET round = excluded.round, updated_at = CURRENT_TIMESTAMP""",
+        (CHECKPOINT, rnd),
+    )
+    db.commit()
+    return inserted
+
+
+def fetch_block(client, rnd):
+    raw = client.block_info(rnd, response_format="msgpack")
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+class ChainFollower:
+    """Background thread applying blocks from the checkpoint onwards."""
+
+    def __init__(self, start=CHAIN_FOLLOW_START, prefetch=CHAIN_FOLLOW_PREFETCH, lag=CHAIN_FOLLOW_LAG,
+                 asa_id=ASA_ID):
+        self.start_at = start
+        self.asa_id = asa_id
+        self.lag = max(0, lag)
+        self.prefetch = max(1, prefetch)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._fetcher = ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix="chain-fetch")
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chain-follower", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.follow()
+            except Exception as e:
+                print(f"Warning: chain follower stopped at an error, retrying: {e}")
+                time.sleep(RETRY_SECONDS)
+
+    def _first_round(self, db, client):
+        checkpoint = get_checkpoint(db)
+        if checkpoint is not None:
+            return checkpoint + 1
+        if str(self.start_at).lower() == "latest":
+            return client.status()["last-round"]
+        return int(self.start_at)
+
+    def follow(self, until=None):
+        """
+        Apply blocks until round `until` (forever if None).
+        Returns the next round to process.
+        """
+        client = get_algod_client()
+        db = connect()
+        try:
+            next_round = self._first_round(db, client)
+            last_round = client.status()["last-round"]
+            while until is None or next_round <= until:
+                ready = last_round - self.lag
+                if next_round > ready:
+                    # Caught up: long-poll until the next block is lag rounds deep
+                    last_round = client.status_after_block(max(last_round, next_round + self.lag - 1))["last-round"]
+                    continue
+
+                end = min(ready, next_round + self.prefetch - 1)
+                if until is not None:
+                    end = min(end, until)
+                rounds = list(range(next_round, end + 1))
+                blocks = self._fetcher.map(lambda r: fetch_block(client, r), rounds)
+                for rnd, block in zip(rounds, blocks):
+                    inserted = process_block(db, rnd, block, self.asa_id)
+                    if inserted:
+                        print(f"Chain follower: recorded {inserted} payment(s) missing from the DB in round {rnd}")
+                next_round = end + 1
+            return next_round
+        finally:
+            db.close()
+
+
+follower = ChainFollower()
+
+
+def start_chain_follower():
+    if CHAIN_FOLLOWER:
+        follower.start()
@@ -0,0 +1,233 @@
+"""
+CampusChain Backend — Confirmation Tracker
+
+With ASYNC_SUBMIT enabled, /parent/fund, /vendor/pay and /canteen/order
+return as soon as algod accepts the transaction and store their rows as
+'pending'. This background thread polls algod for every pending txid
+found in the DB and flips the rows in transactions, orders and
+funding_log to confirmed (orders: 'completed') or failed.
+
+The DB is the source of truth for what is pending, so rows left pending
+by a restart are picked up again on the next poll. The thread only runs
+when there can be something to settle: it starts at boot with
+ASYNC_SUBMIT on or rows left pending, otherwise on the first track()
+(e.g. a synchronous send whose outcome was unknown). The pending lookups
+use partial indexes on status = 'pending', so an idle poll reads nothing.
+
+algod also answers 404 for a txn confirmed long enough ago to have left
+its pending cache, so a 404 alone never fails a txn. The tracker then
+searches the blocks of the txn's validity window (see txn_validity): found
+means confirmed; failed only once the chain is past last-valid without it.
+"""
+
+import threading
+from datetime import datetime
+
+from algosdk import error
+
+from config import ASYNC_SUBMIT, TRACKER_POLL_SECONDS, TXN_PENDING_TIMEOUT
+from models import connect
+from services.algod_client import get_algod_client
+from services.balance_ledger import apply_transfer
+from services.rollups import add_funding, add_spend
+from services.spending import reverse_spend
+from services.stats_counters import bump
+from services import txn_validity
+
+PENDING_TXIDS_SQL = """
+    SELECT txn_id, MIN(created_at) AS created_at FROM (
+        SELECT txn_id, created_at FROM transactions WHERE status = 'pending'
+        UNION ALL
+        SELECT txn_id, created_at FROM orders WHERE status = 'pending'
+        UNION ALL
+        SELECT txn_id, created_at FROM funding_log WHERE status = 'pending'
+    ) WHERE txn_id IS NOT NULL
+    GROUP BY txn_id
+"""
+
+
+def settle_txn(db, txn_id, confirmed):
+    """
+    Mark every pending row for txn_id as confirmed or failed.
+    A failed payment or funding is also taken back out of category_spending,
+    the stats counters, the daily rollups and the shadow balance ledger.
+    Runs inside the caller's DB transaction.
+    """
+    if confirmed:
+        db.execute("UPDATE transactions SET status = 'confirmed' WHERE txn_id = ? AND status = 'pending'", (txn_id,))
+        db.execute("UPDATE funding_log SET status = 'confirmed' WHERE txn_id = ? AND status = 'pending'", (txn_id,))
+        db.execute("UPDATE orders SET status = 'completed' WHERE txn_id = ? AND status = 'pending'", (txn_id,))
+        return
+
+    failed = db.execute(
+        """SELECT t.student_id, t.vendor_id, t.category, t.amount, t.created_at,
+                  u.algo_address AS student_addr, v.algo_address AS vendor_addr
+           FROM transactions t
+           JOIN users u ON t.student_id = u.id
+           LEFT JOIN vendors v ON t.vendor_id = v.id
+           WHERE t.txn_id = ? AND t.status = 'pending'""",
+        (txn_id,),
+    ).fetchall()
+    for row in failed:
+        reverse_spend(db, row["student_id"], row["category"], row["amount"], row["created_at"][:7])
+        add_spend(db, row["category"], row["vendor_id"], -row["amount"], day=row["created_at"][:10], count=-1)
+        apply_transfer(db, row["vendor_addr"], row["student_addr"], row["amount"])
+    bump(db, total_transactions=-len(failed))
+
+    failed_funding = db.execute(
+        """SELECT f.amount, f.created_at, u.algo_address AS student_addr FROM funding_log f
+           JOIN users u ON f.student_id = u.id
+           WHERE f.txn_id = ? AND f.status = 'pending'""",
+        (txn_id,),
+    ).fetchall()
+    for row in failed_funding:
+        add_funding(db, -row["amount"], day=row["created_at"][:10], count=-1)
+        apply_transfer(db, row["student_addr"], None, row["amount"])
+    bump(db, total_funded=-sum(row["amount"] for row in failed_funding))
+
+    db.execute("UPDATE transactions SET status = 'failed' WHERE txn_id = ? AND status = 'pending'", (txn_id,))
+    db.execute("UPDATE funding_log SET status = 'failed' WHERE txn_id = ? AND status = 'pending'", (txn_id,))
+    db.execute("UPDATE orders SET status = 'failed' WHERE txn_id = ? AND status = 'pending'", (txn_id,))
+
+
+class ConfirmationTracker:
+    """Background poller that settles pending transactions."""
+
+    def __init__(self, poll_interval=TRACKER_POLL_SECONDS, pending_timeout=TXN_PENDING_TIMEOUT):
+        self.poll_interval = poll_interval
+        self.pending_timeout = pending_timeout
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        # txid -> last round searched for it (see _search_blocks)
+        self._scanned = {}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="confirmation-tracker", daemon=True
+                )
+                self._thread.start()
+
+    def track(self, txn_id):
+        """Nudge the tracker (starting it if needed) after a new pending submit."""
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Warning: confirmation tracker pass failed: {e}")
+
+    def poll_once(self):
+        """Check every pending txid once. Returns the number settled."""
+        db = connect()
+        try:
+            pending = db.execute(PENDING_TXIDS_SQL).fetchall()
+            txn_validity.purge_old(db)
+            db.commit()
+            still_pending = {row["txn_id"] for row in pending}
+            self._scanned = {t: r for t, r in self._scanned.items() if t in still_pending}
+            if not pending:
+                return 0
+
+            client = get_algod_client()
+            scan = _BlockScan(client)
+            settled = 0
+            for row in pending:
+                outcome = self._check(client, db, scan, row["txn_id"], row["created_at"])
+                if outcome is None:
+                    continue
+                settle_txn(db, row["txn_id"], outcome)
+                db.commit()
+                self._scanned.pop(row["txn_id"], None)
+                settled += 1
+            return settled
+        finally:
+            db.close()
+
+    def _check(self, client, db, scan, txn_id, created_at):
+        """True = confirmed, False = failed, None = still pending."""
+        try:
+            info = client.pending_transaction_info(txn_id)
+        except error.AlgodHTTPError as e:
+            if e.code != 404:
+                return None
+            # Neither in the pool nor in the node's recently-confirmed cache:
+            # it may have been dropped, or confirmed a while ago
+            window = txn_validity.lookup(db, txn_id)
+            if window is None:
+                age = (datetime.utcnow() - datetime.fromisoformat(created_at)).total_seconds()
+                return False if age > self.pending_timeout else None
+            try:
+                return self._search_blocks(scan, txn_id, *window)
+            except Exception as e:
+                print(f"Warning: block search for {txn_id} failed: {e}")
+                return None
+
+        if info.get("confirmed-round", 0) > 0:
+            return True
+        if info.get("pool-error"):
+            return False
+        return None
+
+    def _search_blocks(self, scan, txn_id, first_valid, last_valid):
+        """
+        Look for txn_id in the blocks of its validity window. Failed only
+        once the chain is past last_valid and no block in the window has it.
+        Rounds already searched on earlier passes are skipped.
+        """
+        start = max(first_valid, self._scanned.get(txn_id, first_valid - 1) + 1)
+        end = min(scan.tip(), last_valid)
+        for rnd in range(start, end + 1):
+            if txn_id in scan.txids(rnd):
+                return True
+            self._scanned[txn_id] = rnd
+        return False if scan.tip() > last_valid else None
+
+
+class _BlockScan:
+    """Block txids fetched during one tracker pass, shared by every txid."""
+
+    def __init__(self, client):
+        self.client = client
+        self._tip = None
+        self._blocks = {}
+
+    def tip(self):
+        if self._tip is None:
+            self._tip = self.client.status()["last-round"]
+        return self._tip
+
+    def txids(self, rnd):
+        if rnd not in self._blocks:
+            # Imported here: chain_follower itself imports settle_txn
+            from services.chain_follower import block_txids, fetch_block
+            self._blocks[rnd] = block_txids(fetch_block(self.client, rnd))
+        return self._blocks[rnd]
+
+
+tracker = ConfirmationTracker()
+
+
+def start_tracker():
+    """Start polling at boot if async submits are on or rows were left pending."""
+    if ASYNC_SUBMIT:
+        tracker.start()
+        return
+    db = connect()
+    try:
+        left_pending = db.execute(PENDING_TXIDS_SQL + " LIMIT 1").fetchone()
+    finally:
+        db.close()
+    if left_pending:
+        tracker.start()
+
+
+def track(txn_id):
+    tracker.track(txn_id)
@@ -0,0 +1,211 @@
+"""
+CampusChain Backend — Idempotency Keys for Payments and Orders
+
+A vendor terminal that times out on /vendor/pay and retries used to
+charge the student twice (same for /canteen/order). Clients may now send
+an Idempotency-Key header with these requests:
+
+  - The first request with a key claims it in idempotency_keys and runs.
+    Its response (2xx or 4xx) is stored for IDEMPOTENCY_TTL_SECONDS.
+  - A retry with the same key gets the stored response back (marked
+    Idempotent-Replayed: true) without touching algod again.
+  - A duplicate arriving while the first is still in flight waits for it
+    (up to IDEMPOTENCY_WAIT_SECONDS) and then replays its response,
+    or gets 409 if it is still running.
+  - If the first request failed with a 5xx before sending anything,
+    nothing was charged, so the key is released and a retry runs normally.
+  - Once the view has sent a txn it calls record_txid(). From then on
+    the key is never released: a later 5xx or exception (confirmation
+    timeout, DB error) is stored and answered as 202 with the txid and
+    status 'pending', since the payment may well have gone through.
+
+Keys are scoped to the calling user and endpoint. Reusing a key with a
+different request body is rejected with 422.
+"""
+
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from flask import Response, g, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from config import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_WAIT_SECONDS
+from models import connect
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# How often a duplicate re-checks a key held by another process
+POLL_SECONDS = 0.05
+PURGE_EVERY_SECONDS = 60
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def _claim(db, scope, key, request_hash):
+    """Insert the key as in flight. Returns True if this request owns it."""
+    now = int(time.time())
+    _purge_expired(db, now)
+    cur = db.execute(
+        """INSERT OR IGNORE INTO idempotency_keys (scope, idem_key, request_hash, expires_at)
+           VALUES (?, ?, ?, ?)""",
+        (scope, key, request_hash, now + IDEMPOTENCY_TTL_SECONDS),
+    )
+    db.commit()
+    return cur.rowcount == 1
+
+
+def _purge_expired(db, now):
+    global _last_purge
+    if now - _last_purge >= PURGE_EVERY_SECONDS:
+        _last_purge = now
+        db.execute("DELETE FROM idempotency_keys WHERE expires_at < ?", (now,))
+
+
+def _lookup(db, scope, key):
+    return db.execute(
+        """SELECT request_hash, status, response_status, response_body, response_type, expires_at
+           FROM idempotency_keys WHERE scope = ? AND idem_key = ?""",
+        (scope, key),
+    ).fetchone()
+
+
+def _replay(row):
+    resp = Response(row["response_body"], status=row["response_status"],
+                    mimetype=row["response_type"] or "application/json")
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def _wait_for_result(scope, key):
+    """Block until the in-flight request for this key finishes (or times out)."""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    with _in_flight_lock:
+        done = _in_flight.get((scope, key))
+    if done is not None:
+        # Same process: wake up as soon as the first request finishes
+        done.wait(IDEMPOTENCY_WAIT_SECONDS)
+
+    db = connect()
+    try:
+        while True:
+            row = _lookup(db, scope, key)
+            if row is None or row["status"] == "done" or time.monotonic() >= deadline:
+                return row
+            time.sleep(POLL_SECONDS)
+    finally:
+        db.close()
+
+
+def idempotent(view):
+    """
+    Route decorator (inside @jwt_required) adding Idempotency-Key support.
+    Requests without the header are passed straight through.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        scope = f"{get_jwt_identity()}:{request.method}:{request.path}"
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        db = connect()
+        try:
+            while not _claim(db, scope, key, request_hash):
+                row = _lookup(db, scope, key)
+                if row is None:
+                    continue  # released between our insert and lookup; try again
+                if row["expires_at"] < time.time():
+                    db.execute(
+                        "DELETE FROM idempotency_keys WHERE scope = ? AND idem_key = ? AND expires_at = ?",
+                        (scope, key, row["expires_at"]),
+                    )
+                    db.commit()
+                    continue
+                if row["request_hash"] != request_hash:
+                    return jsonify({"error": f"{HEADER} was already used for a different request"}), 422
+                if row["status"] != "done":
+                    row = _wait_for_result(scope, key)
+                    if row is None:
+                        continue  # first attempt failed and released the key
+                    if row["status"] != "done":
+                        return jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409
+                return _replay(row)
+        finally:
+            db.close()
+
+        done = threading.Event()
+        with _in_flight_lock:
+            _in_flight[(scope, key)] = done
+        g.idempotency_txid = None
+        try:
+            try:
+                resp = make_response(view(*args, **kwargs))
+            except Exception as e:
+                if g.idempotency_txid is None:
+                    _release(scope, key)
+                    raise
+                print(f"Warning: request failed after sending {g.idempotency_txid}: {e}")
+                resp = _outcome_pending(g.idempotency_txid)
+            return _finish(scope, key, resp)
+        finally:
+            with _in_flight_lock:
+                _in_flight.pop((scope, key), None)
+            done.set()
+
+    return wrapper
+
+
+def record_txid(txid):
+    """
+    Called by an idempotent view right after its txn was sent: the key is
+    then kept (never released), whatever happens next.
+    """
+    if HEADER in request.headers:
+        g.idempotency_txid = txid
+
+
+def _outcome_pending(txid):
+    return make_response(jsonify({
+        "message": "Submitted; the outcome is not known yet",
+        "txn_id": txid,
+        "status": "pending",
+    }), 202)
+
+
+def _finish(scope, key, resp):
+    """Store the response for replay (or release the key). Returns the response to send."""
+    if resp.status_code >= 500:
+        if g.idempotency_txid is None:
+            _release(scope, key)
+            return resp
+        resp = _outcome_pending(g.idempotency_txid)
+    db = connect()
+    try:
+        db.execute(
+            """UPDATE idempotency_keys
+               SET status = 'done', response_status = ?, response_body = ?, response_type = ?
+               WHERE scope = ? AND idem_key = ?""",
+            (resp.status_code, resp.get_data(as_text=True), resp.mimetype, scope, key),
+        )
+        db.commit()
+    finally:
+        db.close()
+    return resp
+
+
+def _release(scope, key):
+    db = connect()
+    try:
+        db.execute("DELETE FROM idempotency_keys WHERE scope = ? AND idem_key = ?", (scope, key))
+        db.commit()
+    finally:
+        db.close()
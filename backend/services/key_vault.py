@@ -0,0 +1,151 @@
+"""
+CampusChain Backend — Custodial Key Vault
+
+Custodial signing keys are stored encrypted at rest (users.algo_key_enc,
+NaCl SecretBox under KEY_VAULT_SECRET) instead of as plaintext mnemonics.
+
+  - The admin key is decoded once at startup and kept for the process.
+  - Student/vendor keys are decrypted on demand into a size-limited LRU
+    (KEY_CACHE_SIZE) so the pay path skips repeated decode work without
+    holding every student's key in memory.
+  - Keys live in bytearrays and are zeroed when evicted. Signing still
+    needs a transient base64 str for the SDK, so the wipe is best-effort.
+"""
+
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+
+import nacl.secret
+import nacl.utils
+from algosdk import account, mnemonic
+
+from config import KEY_VAULT_SECRET, SECRET_KEY, PLACEHOLDER_SECRETS, ADMIN_MNEMONIC, KEY_CACHE_SIZE
+
+if KEY_VAULT_SECRET:
+    # A placeholder copied from .env.example is public: never fall back past it
+    _vault_secret = KEY_VAULT_SECRET if KEY_VAULT_SECRET not in PLACEHOLDER_SECRETS else None
+elif SECRET_KEY.strip() and SECRET_KEY not in PLACEHOLDER_SECRETS:
+    print("Warning: KEY_VAULT_SECRET not set — deriving the vault key from SECRET_KEY")
+    _vault_secret = SECRET_KEY
+else:
+    # The default / example SECRET_KEY is public; keys sealed under it are not secret
+    _vault_secret = None
+
+_box = nacl.secret.SecretBox(hashlib.sha256(_vault_secret.encode()).digest()) if _vault_secret else None
+
+
+def check_configured():
+    """Raise unless the vault has a real secret; called at startup."""
+    if _box is None:
+        raise RuntimeError(
+            "KEY_VAULT_SECRET is empty or a placeholder (and SECRET_KEY is not a real secret)"
+        )
+
+
+def _wipe(buf):
+    for i in range(len(buf)):
+        buf[i] = 0
+
+
+def seal_key(private_key):
+    """Encrypt a base64 SDK private key for storage. Returns ASCII text."""
+    check_configured()
+    raw = bytearray(base64.b64decode(private_key))
+    try:
+        sealed = _box.encrypt(bytes(raw), nacl.utils.random(nacl.secret.SecretBox.NONCE_SIZE))
+    finally:
+        _wipe(raw)
+    return base64.b64encode(sealed).decode()
+
+
+def seal_mnemonic(phrase):
+    """Encrypt the key behind a 25-word mnemonic for storage."""
+    return seal_key(mnemonic.to_private_key(phrase))
+
+
+def _open(sealed):
+    check_configured()
+    return bytearray(_box.decrypt(base64.b64decode(sealed)))
+
+
+class KeyCache:
+    """Thread-safe LRU of decrypted signing keys, wiped on eviction."""
+
+    def __init__(self, max_size=KEY_CACHE_SIZE):
+        self.max_size = max_size
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, address, sealed):
+        """Return the SDK (base64 str) private key for address."""
+        with self._lock:
+            raw = self._keys.get(address)
+            if raw is not None:
+                self._keys.move_to_end(address)
+                return base64.b64encode(bytes(raw)).decode()
+
+        raw = _open(sealed)
+        with self._lock:
+            if address not in self._keys:
+                self._keys[address] = raw
+                while len(self._keys) > self.max_size:
+                    _, evicted = self._keys.popitem(last=False)
+                    _wipe(evicted)
+            else:
+                _wipe(raw)
+                raw = self._keys[address]
+            return base64.b64encode(bytes(raw)).decode()
+
+    def clear(self):
+        with self._lock:
+            for raw in self._keys.values():
+                _wipe(raw)
+            self._keys.clear()
+
+
+_cache = KeyCache()
+_admin = None
+_admin_lock = threading.Lock()
+
+
+def signing_key(address, sealed):
+    """Decrypted signing key for a custodial wallet (via the LRU)."""
+    return _cache.get(address, sealed)
+
+
+def load_admin_key():
+    """Decode ADMIN_MNEMONIC once; called at startup."""
+    global _admin
+    with _admin_lock:
+        if _admin is None and ADMIN_MNEMONIC:
+            sk = mnemonic.to_private_key(ADMIN_MNEMONIC)
+            _admin = (bytearray(base64.b64decode(sk)), account.address_from_private_key(sk))
+
+
+def admin_keys():
+    """Return (private_key, address) for the admin account."""
+    if _admin is None:
+        load_admin_key()
+    if _admin is None:
+        raise RuntimeError("ADMIN_MNEMONIC is not configured")
+    raw, addr = _admin
+    return base64.b64encode(bytes(raw)).decode(), addr
+
+
+def seal_plaintext_mnemonics(db):
+    """
+    One-time upgrade for databases created before the vault: encrypt any
+    plaintext users.algo_mnemonic into algo_key_enc and clear the mnemonic.
+    """
+    rows = db.execute(
+        "SELECT id, algo_mnemonic FROM users WHERE algo_mnemonic IS NOT NULL AND algo_key_enc IS NULL"
+    ).fetchall()
+    for row in rows:
+        db.execute(
+            "UPDATE users SET algo_key_enc = ?, algo_mnemonic = NULL WHERE id = ?",
+            (seal_mnemonic(row["algo_mnemonic"]), row["id"]),
+        )
+    db.commit()
+    return len(rows)
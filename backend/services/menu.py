@@ -0,0 +1,150 @@
+"""
+CampusChain Backend — Canteen Menu and its Cache
+
+The menu rarely changes but is fetched by every student and resolved on
+every order. Every write (admin create / update / toggle) bumps
+menu_version.version in the same DB transaction. Readers check that one
+row and rebuild their in-process snapshot only when it moved, so menu
+changes show up at once in every backend process sharing the database.
+
+The snapshot holds the available items (for /canteen/order) and the
+serialized /canteen/menu body. Its version is the response's ETag, so a
+polling client revalidates with If-None-Match and gets a 304.
+"""
+
+import json
+import threading
+
+CATEGORIES = ("food", "beverages", "snacks")
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class InvalidMenuItem(ValueError):
+    """Raised for a create/update body that isn't a valid menu item."""
+
+
+class MenuSnapshot:
+    """One version of the available menu, ready to serve."""
+
+    def __init__(self, version, items):
+        self.version = version
+        self.items = {item["id"]: item for item in items}
+        self.etag = f"menu-{version}"
+        self.body = json.dumps({"items": items}, ensure_ascii=False, sort_keys=True)
+
+
+def menu_version(db):
+    row = db.execute("SELECT version FROM menu_version WHERE id = 1").fetchone()
+    return row["version"] if row else 0
+
+
+def get_snapshot(db):
+    """The current menu snapshot, rebuilt only if menu_version moved."""
+    global _snapshot
+    version = menu_version(db)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    items = [
+        dict(row) for row in db.execute(
+            """SELECT id, name, price, category, emoji FROM menu_items
+               WHERE available = 1 ORDER BY category, name"""
+        )
+    ]
+    snapshot = MenuSnapshot(version, items)
+    with _lock:
+        if _snapshot is None or _snapshot.version < version:
+            _snapshot = snapshot
+    return snapshot
+
+
+def _bump_version(db):
+    db.execute("UPDATE menu_version SET version = version + 1 WHERE id = 1")
+
+
+def _validate(data, partial):
+    if not isinstance(data, dict):
+        raise InvalidMenuItem("Body must be a JSON object")
+    fields = {}
+    for key in ("name", "price", "category", "emoji"):
+        if key not in data:
+            if not partial and key != "emoji":
+                raise InvalidMenuItem(f"{key} is required")
+            continue
+        value = data[key]
+        if key == "price":
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                raise InvalidMenuItem("price must be a positive integer")
+        elif key == "category":
+            if value not in CATEGORIES:
+                raise InvalidMenuItem(f"category must be one of: {', '.join(CATEGORIES)}")
+        elif not isinstance(value, str) or not value.strip():
+            raise InvalidMenuItem(f"{key} must be a non-empty string")
+        else:
+            value = value.strip()
+        fields[key] = value
+    if not fields:
+        raise InvalidMenuItem("Nothing to update")
+    return fields
+
+
+def get_item(db, item_id):
+    row = db.execute(
+        "SELECT id, name, price, category, emoji, available FROM menu_items WHERE id = ?",
+        (item_id,),
+    ).fetchone()
+    return dict(row, available=bool(row["available"])) if row else None
+
+
+def list_items(db):
+    """Every menu item, unavailable ones included (admin view)."""
+    return [
+        dict(row, available=bool(row["available"])) for row in db.execute(
+            "SELECT id, name, price, category, emoji, available FROM menu_items ORDER BY category, name"
+        )
+    ]
+
+
+def create_item(db, data):
+    """Add a menu item from a request body and commit. Returns the item."""
+    fields = _validate(data, partial=False)
+    columns = ", ".join(fields)
+    cur = db.execute(
+        f"INSERT INTO menu_items ({columns}) VALUES ({', '.join('?' * len(fields))})",
+        list(fields.values()),
+    )
+    _bump_version(db)
+    db.commit()
+    return get_item(db, cur.lastrowid)
+
+
+def update_item(db, item_id, data):
+    """Change some of name/price/category/emoji and commit. None if not found."""
+    fields = _validate(data, partial=True)
+    assignments = ", ".join(f"{key} = ?" for key in fields)
+    cur = db.execute(
+        f"UPDATE menu_items SET {assignments} WHERE id = ?", list(fields.values()) + [item_id]
+    )
+    if not cur.rowcount:
+        return None
+    _bump_version(db)
+    db.commit()
+    return get_item(db, item_id)
+
+
+def set_available(db, item_id, available=None):
+    """Set (or flip, if available is None) an item's availability and commit."""
+    if available is None:
+        cur = db.execute("UPDATE menu_items SET available = 1 - available WHERE id = ?", (item_id,))
+    elif not isinstance(available, bool):
+        raise InvalidMenuItem("available must be true or false")
+    else:
+        cur = db.execute("UPDATE menu_items SET available = ? WHERE id = ?", (int(available), item_id))
+    if not cur.rowcount:
+        return None
+    _bump_version(db)
+    db.commit()
+    return get_item(db, item_id)
@@ -0,0 +1,30 @@
+"""
+CampusChain Backend — Order Loading
+
+Shared by the student order history, the vendor order feed and the soft
+bill. Line items for a whole page of orders are fetched in one query and
+grouped in memory, instead of one order_items query per order.
+"""
+
+
+def load_order_items(db, order_ids):
+    """
+    Line items for the given orders, as {order_id: [item, ...]} with each
+    item {name, emoji, qty, price}. Orders without items map to [].
+    """
+    items = {order_id: [] for order_id in order_ids}
+    if not items:
+        return items
+    rows = db.execute(
+        """SELECT oi.order_id, oi.quantity, oi.price, mi.name, mi.emoji
+           FROM order_items oi
+           JOIN menu_items mi ON oi.menu_item_id = mi.id
+           WHERE oi.order_id IN ({})
+           ORDER BY oi.id""".format(",".join("?" * len(items))),
+        list(items),
+    )
+    for r in rows:
+        items[r["order_id"]].append(
+            {"name": r["name"], "emoji": r["emoji"], "qty": r["quantity"], "price": r["price"]}
+        )
+    return items
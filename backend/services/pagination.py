@@ -0,0 +1,70 @@
+"""
+CampusChain Backend — Keyset (Cursor) Pagination
+
+The student history, canteen order and vendor order feeds are paged
+newest first on (created_at, id). A page ends with an opaque next_cursor
+that encodes the last row's key. The next request passes it back as
+?cursor= and gets the rows strictly before that key:
+
+    WHERE ... AND (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC LIMIT limit + 1
+
+With an index on (owner, created_at) (id rides along as the rowid) this
+is one index seek however deep the page, unlike OFFSET. The extra row
+tells us whether there is a next page. Rows inserted while a client is
+paging never shift or repeat what it has already seen.
+"""
+
+import base64
+import json
+
+from config import FEED_MAX_PAGE_SIZE
+
+# Key sorting after every real row, used when no cursor was given
+FIRST_PAGE = ("9999-12-31 23:59:59", 2 ** 63 - 1)
+
+
+class InvalidPage(ValueError):
+    """Bad ?cursor= or ?limit=."""
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(created_at, str) or not isinstance(row_id, int):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise InvalidPage("Invalid cursor") from None
+    return created_at, row_id
+
+
+def page_args(args, default_limit):
+    """
+    Read ?cursor= and ?limit= from request args.
+    Returns ((created_at, id) to page before, limit), or raises InvalidPage.
+    """
+    cursor = args.get("cursor")
+    after = decode_cursor(cursor) if cursor else FIRST_PAGE
+    try:
+        limit = int(args.get("limit", default_limit))
+    except ValueError:
+        raise InvalidPage("limit must be an integer") from None
+    if not 1 <= limit <= FEED_MAX_PAGE_SIZE:
+        raise InvalidPage(f"limit must be between 1 and {FEED_MAX_PAGE_SIZE}")
+    return after, limit
+
+
+def paginate(rows, limit):
+    """
+    Split a LIMIT limit + 1 result into (page, next_cursor); next_cursor is
+    None on the last page. Rows need created_at and id columns.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1]["created_at"], page[-1]["id"])
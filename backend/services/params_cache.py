@@ -0,0 +1,138 @@
+"""
+CampusChain Backend — Suggested Params Cache
+
+Every write path used to call client.suggested_params() right before
+signing, doubling the algod round trips. This module keeps one copy of
+the node's params and hands out per-call copies whose validity window
+is slid forward by the rounds estimated to have passed since the fetch.
+
+  - Fee / genesis data are refreshed from algod every PARAMS_TTL_SECONDS.
+  - The round estimate uses ALGOD_ROUND_TIME, deliberately slower than
+    the real block time, so first-valid never runs ahead of the chain.
+  - Every transaction gets a random lease (unique()), so two identical
+    transfers built in the same round still have distinct txids.
+  - If a submit is still rejected for an out-of-window round, the cache
+    is refreshed once and the transaction rebuilt and resent.
+  - A send that fails without a 4xx from algod (timeout, 5xx) may still
+    have landed, so it raises TxnOutcomeUnknown carrying the txid(s).
+
+Also importable from the contracts/ scripts (they add backend/ to sys.path).
+"""
+
+import copy
+import os
+import threading
+import time
+
+from algosdk import constants, error
+
+from config import PARAMS_TTL_SECONDS, ALGOD_ROUND_TIME
+from services import txn_validity
+
+class SuggestedParamsCache:
+    """Thread-safe cache of algod suggested params with a sliding window."""
+
+    def __init__(self, ttl=PARAMS_TTL_SECONDS, round_time=ALGOD_ROUND_TIME):
+        self.ttl = ttl
+        self.round_time = round_time
+        self._params = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, client):
+        """Return a fresh copy of suggested params with a valid window."""
+        with self._lock:
+            now = time.monotonic()
+            if self._params is None or now - self._fetched_at >= self.ttl:
+                self._params = client.suggested_params()
+                self._fetched_at = now
+            params = copy.copy(self._params)
+            elapsed = now - self._fetched_at
+
+        rounds_passed = int(elapsed // self.round_time)
+        params.first += rounds_passed
+        params.last += rounds_passed
+        return params
+
+    def invalidate(self):
+        with self._lock:
+            self._params = None
+
+
+_cache = SuggestedParamsCache()
+
+
+def suggested_params(client):
+    """Suggested params from the shared process-wide cache."""
+    return _cache.get(client)
+
+
+def invalidate_params():
+    _cache.invalidate()
+
+
+def unique(txn):
+    """
+    Give an unsigned txn a random lease and return it. The lease is part
+    of the signed bytes, so otherwise identical transfers built from the
+    same params never share a txid.
+    """
+    txn.lease = os.urandom(constants.lease_length)
+    return txn
+
+
+def is_window_error(exc):
+    """True if algod rejected a txn because its valid round window is wrong."""
+    return isinstance(exc, error.AlgodHTTPError) and "txn dead" in str(exc)
+
+
+class TxnOutcomeUnknown(Exception):
+    """
+    A txn was sent but it is not known whether it landed: the submit
+    failed without a 4xx answer from algod, or the confirmation wait
+    failed. Must not be treated as "nothing was charged".
+    txids holds every member for a group (txid is the first).
+    """
+
+    def __init__(self, txid, cause, txids=None):
+        super().__init__(f"Transaction {txid} was sent but its outcome is unknown: {cause}")
+        self.txid = txid
+        self.txids = txids or [txid]
+        self.cause = cause
+
+
+def send_signed(client, signed):
+    """
+    Send one signed txn or a list (atomic group); returns the first txid.
+    Raises TxnOutcomeUnknown if the send failed other than by algod
+    rejecting it (timeout, connection reset, 5xx).
+    """
+    group = list(signed) if isinstance(signed, (list, tuple)) else [signed]
+    txn_validity.record(group)
+    try:
+        if isinstance(signed, (list, tuple)):
+            return client.send_transactions(signed)
+        return client.send_transaction(signed)
+    except (error.AlgodHTTPError, error.AlgodRequestError) as e:
+        if isinstance(e, error.AlgodHTTPError) and e.code is not None and e.code < 500:
+            raise
+        txids = [stxn.get_txid() for stxn in group]
+        raise TxnOutcomeUnknown(txids[0], e, txids) from e
+
+
+def submit_with_params(client, build_signed):
+    """
+    Build, sign and send using cached params.
+
+    build_signed(params) must return a signed txn (or list of signed txns).
+    On an expired-window rejection the cache is refreshed and the txn is
+    rebuilt and sent exactly once more.
+    Returns the txid of the (first) submitted transaction.
+    """
+    try:
+        return send_signed(client, build_signed(suggested_params(client)))
+    except error.AlgodHTTPError as e:
+        if not is_window_error(e):
+            raise
+        invalidate_params()
+        return send_signed(client, build_signed(suggested_params(client)))
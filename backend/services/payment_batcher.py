@@ -0,0 +1,86 @@
+"""
+CampusChain Backend — Student → Vendor Payment Micro-Batcher
+
+At lunch rush many /vendor/pay and /canteen/order requests arrive within
+milliseconds of each other. Instead of one send + one confirmation wait
+each, payments that arrive within PAYMENT_BATCH_WINDOW_MS are packed
+into atomic groups of up to PAYMENT_BATCH_SIZE transfers, signed in
+bulk and confirmed with a single wait per group.
+
+Callers block on their own Future: a rejected group is split and
+retried (see services.txn_groups) so each payment gets its own txid or
+its own error.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config import PAYMENT_BATCH_SIZE, PAYMENT_BATCH_WINDOW_MS, PAYMENT_BATCH_WORKERS
+from services.algod_client import get_algod_client
+from services.txn_groups import submit_in_groups, MAX_GROUP_SIZE
+
+
+class PaymentBatcher:
+    """Collects payment entries for a short window and sends them as groups."""
+
+    def __init__(self, max_size=PAYMENT_BATCH_SIZE, window_ms=PAYMENT_BATCH_WINDOW_MS,
+                 workers=PAYMENT_BATCH_WORKERS):
+        self.max_size = max(1, min(max_size, MAX_GROUP_SIZE))
+        self.window = window_ms / 1000.0
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="payment-batch")
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, make_txn, sk, wait=True):
+        """
+        Queue one transfer. Returns a Future resolving to its txid
+        (after confirmation when wait=True) or raising its error.
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put(((make_txn, sk), wait, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="payment-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._process, batch)
+
+    def _process(self, batch):
+        entries = [entry for entry, _, _ in batch]
+        wait = any(w for _, w, _ in batch)
+        try:
+            results = submit_in_groups(get_algod_client(), entries, wait=wait,
+                                       group_size=self.max_size)
+        except Exception as e:
+            results = [(None, e)] * len(batch)
+
+        for (_, _, future), (tx_id, exc) in zip(batch, results):
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(tx_id)
+
+
+batcher = PaymentBatcher()
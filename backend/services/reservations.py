@@ -0,0 +1,111 @@
+"""
+CampusChain Backend — Per-Student Balance Reservations
+
+/vendor/pay and /canteen/order used to read the balance and then submit
+the transfer. Two terminals charging the same student at the same
+moment could both pass the check, and one of them would then fail
+on-chain after the student had already waited several rounds.
+
+Before submitting, a route now reserves the amount against the student's
+available balance (shadow-ledger balance minus what other in-flight
+payments hold). The check-and-hold is serialized per student behind a
+lock for that student only. Payments for different students never wait
+on each other, and the slow algod submit runs outside the lock.
+
+The hold is released once the payment is committed (the ledger then
+carries the deduction itself) or has failed. Reservations are
+in-process: run a single backend process per database.
+"""
+
+import threading
+
+from services.balance_ledger import get_balance
+
+
+class InsufficientBalance(Exception):
+    """Raised by reserve() when the available balance can't cover a spend."""
+
+    def __init__(self, available, needed):
+        super().__init__(f"Insufficient balance. Has {available}, needs {needed}")
+        self.available = available
+        self.needed = needed
+
+
+class _StudentHolds:
+    __slots__ = ("lock", "held", "users")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.held = 0
+        self.users = 0
+
+
+class Reservation:
+    """An amount held against one student's balance until released."""
+
+    def __init__(self, ledger, address, amount, entry):
+        self.address = address
+        self.amount = amount
+        self._ledger = ledger
+        self._entry = entry
+        self._released = False
+
+    def release(self):
+        """Give the held amount back (safe to call more than once)."""
+        if not self._released:
+            self._released = True
+            self._ledger._release(self)
+
+
+class ReservationLedger:
+    """In-process holds on student balances, one lock per student."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._students = {}
+
+    def reserve(self, db, address, amount):
+        """
+        Hold amount against address's available balance. Returns a
+        Reservation, or raises InsufficientBalance.
+        """
+        entry = self._checkout(address)
+        try:
+            with entry.lock:
+                available = get_balance(db, address) - entry.held
+                if available < amount:
+                    raise InsufficientBalance(available, amount)
+                entry.held += amount
+        except Exception:
+            self._checkin(address, entry)
+            raise
+        return Reservation(self, address, amount, entry)
+
+    def held(self, address):
+        with self._lock:
+            entry = self._students.get(address)
+            return entry.held if entry else 0
+
+    def _release(self, reservation):
+        entry = reservation._entry
+        with entry.lock:
+            entry.held -= reservation.amount
+        self._checkin(reservation.address, entry)
+
+    def _checkout(self, address):
+        with self._lock:
+            entry = self._students.get(address)
+            if entry is None:
+                entry = self._students[address] = _StudentHolds()
+            entry.users += 1
+            return entry
+
+    def _checkin(self, address, entry):
+        # Forget idle students so the map only holds in-flight payers
+        with self._lock:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._students[address]
+
+
+reservations = ReservationLedger()
@@ -0,0 +1,107 @@
+"""
+CampusChain Backend — Daily Rollups for Admin Analytics
+
+Per-day totals kept next to the raw tables, so /admin/analytics can chart
+any date range by reading a few rows per day instead of scanning
+transactions and funding_log:
+
+  daily_category_spend  (day, category)   amount, txns
+  daily_vendor_sales    (day, vendor_id)  amount, txns
+  daily_funding         (day)             amount, fundings
+
+They are maintained at write time, in the caller's DB transaction (no
+commit here), with the same rules as category_spending: a payment counts
+from the moment it is recorded (pending included) and is subtracted again
+if it fails on-chain. Monthly figures are summed from the daily rows at
+query time. Migration 6 backfilled the tables from existing history.
+"""
+
+CATEGORIES = ("food", "events", "stationery")
+
+
+def add_spend(db, category, vendor_id, amount, day=None, count=1):
+    """
+    Add a payment (negative amount/count to take one back) to the rollups
+    for day (YYYY-MM-DD, default today UTC).
+    """
+    db.execute(
+        """INSERT INTO daily_category_spend (day, category, amount, txns)
+           VALUES (COALESCE(?, date('now')), ?, ?, ?)
+           ON CONFLICT(day, category)
+           DO UPDATE SET amount = amount + excluded.amount, txns = txns + excluded.txns""",
+        (day, category, amount, count),
+    )
+    if vendor_id is not None:
+        db.execute(
+            """INSERT INTO daily_vendor_sales (day, vendor_id, amount, txns)
+               VALUES (COALESCE(?, date('now')), ?, ?, ?)
+               ON CONFLICT(day, vendor_id)
+               DO UPDATE SET amount = amount + excluded.amount, txns = txns + excluded.txns""",
+            (day, vendor_id, amount, count),
+        )
+
+
+def add_funding(db, amount, day=None, count=1):
+    """Add parent funding (negative to take it back) to the rollup for day."""
+    db.execute(
+        """INSERT INTO daily_funding (day, amount, fundings)
+           VALUES (COALESCE(?, date('now')), ?, ?)
+           ON CONFLICT(day)
+           DO UPDATE SET amount = amount + excluded.amount, fundings = fundings + excluded.fundings""",
+        (day, amount, count),
+    )
+
+
+def _period(granularity):
+    # Days are stored as YYYY-MM-DD, so a month is its first 7 characters
+    return "day" if granularity == "day" else "substr(day, 1, 7)"
+
+
+def spending_series(db, start, end, granularity="day"):
+    """Per-period spending by category for days start..end (inclusive)."""
+    period = _period(granularity)
+    series = {}
+    for r in db.execute(
+        f"""SELECT {period} AS period, category, SUM(amount) AS amount, SUM(txns) AS txns
+            FROM daily_category_spend WHERE day BETWEEN ? AND ?
+            GROUP BY period, category ORDER BY period""",
+        (start, end),
+    ):
+        point = series.get(r["period"])
+        if point is None:
+            point = series[r["period"]] = {
+                "period": r["period"], **dict.fromkeys(CATEGORIES, 0), "total": 0, "transactions": 0,
+            }
+        point[r["category"]] = r["amount"]
+        point["total"] += r["amount"]
+        point["transactions"] += r["txns"]
+    return list(series.values())
+
+
+def funding_series(db, start, end, granularity="day"):
+    """Per-period parent funding for days start..end (inclusive)."""
+    period = _period(granularity)
+    return [
+        {"period": r["period"], "amount": r["amount"], "fundings": r["fundings"]}
+        for r in db.execute(
+            f"""SELECT {period} AS period, SUM(amount) AS amount, SUM(fundings) AS fundings
+                FROM daily_funding WHERE day BETWEEN ? AND ?
+                GROUP BY period ORDER BY period""",
+            (start, end),
+        )
+    ]
+
+
+def vendor_totals(db, start, end, limit=20):
+    """Top vendors by sales for days start..end (inclusive)."""
+    return [
+        {"vendor_id": r["vendor_id"], "name": r["name"], "amount": r["amount"], "transactions": r["txns"]}
+        for r in db.execute(
+            """SELECT s.vendor_id, v.name, SUM(s.amount) AS amount, SUM(s.txns) AS txns
+               FROM daily_vendor_sales s
+               LEFT JOIN vendors v ON s.vendor_id = v.id
+               WHERE s.day BETWEEN ? AND ?
+               GROUP BY s.vendor_id ORDER BY amount DESC LIMIT ?""",
+            (start, end, limit),
+        )
+    ]
@@ -0,0 +1,52 @@
+"""
+CampusChain Backend — Spending Aggregation
+
+The single place that writes the privacy-preserving category_spending
+table. Called inside the caller's DB transaction (no commit here) when
+a payment is recorded, and again with the opposite sign if that payment
+later fails on-chain.
+"""
+
+from datetime import datetime
+
+from services.stats_counters import bump
+
+
+def record_spend(db, student_id, category, amount, month):
+    """Add amount to the student's (category, month) spending bucket."""
+    db.execute("""
+        INSERT INTO category_spending (student_id, category, month, amount)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(student_id, category, month)
+        DO UPDATE SET amount = amount + ?
+    """, (student_id, category, month, amount, amount))
+    bump(db, **{f"spent_{category}": amount})
+
+
+def reverse_spend(db, student_id, category, amount, month):
+    """Undo a record_spend() for a payment that never made it on-chain."""
+    row = db.execute(
+        "SELECT amount FROM category_spending WHERE student_id = ? AND category = ? AND month = ?",
+        (student_id, category, month),
+    ).fetchone()
+    if row is None:
+        return
+    # The bucket is clamped at 0, so it may drop by less than amount
+    removed = min(amount, row["amount"])
+    db.execute(
+        """UPDATE category_spending SET amount = amount - ?
+           WHERE student_id = ? AND category = ? AND month = ?""",
+        (removed, student_id, category, month),
+    )
+    bump(db, **{f"spent_{category}": -removed})
+
+
+def month_range(month):
+    """
+    Half-open [start, end) created_at bounds for a "YYYY-MM" month, so
+    month filters can use the (student_id, created_at) indexes.
+    Raises ValueError for a malformed month.
+    """
+    start = datetime.strptime(month, "%Y-%m")
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,94 @@
+"""
+CampusChain Backend — Materialized Stats Counters
+
+/admin/stats used to run COUNT(*) and SUM() over users, transactions,
+funding_log and category_spending on every request. Those are now kept
+in the single row of stats_counters. Each write path bumps it inside
+its own DB transaction (no commit here), so the endpoint is a one-row
+read however large the tables get:
+
+  - registration, bulk import      → students, parents
+  - vendor registration            → vendors
+  - parent funding, batch funding  → total_funded
+  - payment, order, chain follower → total_transactions
+  - record_spend / reverse_spend   → spent_<category>
+
+Funding and payments the confirmation tracker later marks failed are
+taken back out (settle_txn), matching the daily rollups.
+
+rebuild() recomputes every counter from the raw tables (after a manual
+DB edit, or to check for drift):
+    python -m services.stats_counters
+"""
+
+CATEGORIES = ("food", "events", "stationery")
+
+COUNTERS = (
+    "students", "parents", "vendors", "total_funded", "total_transactions",
+    "spent_food", "spent_events", "spent_stationery",
+)
+
+REBUILD_SQL = """
+    UPDATE stats_counters SET
+        students = (SELECT COUNT(*) FROM users WHERE role = 'student'),
+        parents = (SELECT COUNT(*) FROM users WHERE role = 'parent'),
+        vendors = (SELECT COUNT(*) FROM vendors),
+        total_funded = (SELECT COALESCE(SUM(amount), 0) FROM funding_log WHERE status != 'failed'),
+        total_transactions = (SELECT COUNT(*) FROM transactions WHERE status != 'failed'),
+        spent_food = (SELECT COALESCE(SUM(amount), 0) FROM category_spending WHERE category = 'food'),
+        spent_events = (SELECT COALESCE(SUM(amount), 0) FROM category_spending WHERE category = 'events'),
+        spent_stationery = (SELECT COALESCE(SUM(amount), 0) FROM category_spending WHERE category = 'stationery'),
+        rebuilt_at = CURRENT_TIMESTAMP
+    WHERE id = 1
+"""
+
+
+def bump(db, **deltas):
+    """Add deltas to counters, e.g. bump(db, students=1). Caller commits."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown counter(s): {', '.join(sorted(unknown))}")
+    assignments = ", ".join(f"{name} = {name} + ?" for name in deltas)
+    db.execute(f"UPDATE stats_counters SET {assignments} WHERE id = 1", list(deltas.values()))
+
+
+def count_user(db, role, count=1):
+    """Registration of `count` users with the given role."""
+    if role == "student":
+        bump(db, students=count)
+    elif role == "parent":
+        bump(db, parents=count)
+
+
+def read(db):
+    """The counters row as a dict."""
+    row = db.execute(f"SELECT {', '.join(COUNTERS)} FROM stats_counters WHERE id = 1").fetchone()
+    return dict(zip(COUNTERS, row)) if row else dict.fromkeys(COUNTERS, 0)
+
+
+def rebuild(db):
+    """Recompute every counter from the raw tables and commit."""
+    db.execute("INSERT OR IGNORE INTO stats_counters (id) VALUES (1)")
+    db.execute(REBUILD_SQL)
+    db.commit()
+    return read(db)
+
+
+if __name__ == "__main__":
+    import sys, os
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from models import connect, init_db
+
+    init_db()
+    conn = connect()
+    try:
+        before = read(conn)
+        after = rebuild(conn)
+    finally:
+        conn.close()
+    for name in COUNTERS:
+        drift = after[name] - before[name]
+        print(f"{name:20} {after[name]:>14}" + (f"  (was {before[name]})" if drift else ""))
@@ -0,0 +1,98 @@
+"""
+CampusChain Backend — Atomic Group Submission
+
+Shared helpers for sending many backend-signed transactions as Algorand
+atomic groups (up to 16 per group) instead of one send + one
+confirmation wait per transfer.
+
+An entry is a (make_txn, private_key) pair, where make_txn(params)
+returns an unsigned Transaction. Each entry still gets its own outcome:
+a group that algod rejects is split in half and retried until the
+failing transfer (or run of entries that must stay together) is isolated.
+"""
+
+import copy
+
+from algosdk import constants, error, transaction
+
+from services.params_cache import TxnOutcomeUnknown, submit_with_params, unique
+
+MAX_GROUP_SIZE = constants.tx_group_limit
+
+
+def submit_atomic(client, entries):
+    """
+    Sign and send entries as one atomic group (no confirmation wait).
+    Returns the txids in entry order. Raises if algod rejects the group.
+    """
+    txids = []
+
+    def build(params):
+        # make_txn may adjust fees on the params it is given
+        txns = [unique(make_txn(copy.copy(params))) for make_txn, _ in entries]
+        if len(txns) > 1:
+            transaction.assign_group_id(txns)
+        txids[:] = [t.get_txid() for t in txns]
+        return [t.sign(sk) for t, (_, sk) in zip(txns, entries)]
+
+    submit_with_params(client, build)
+    return txids
+
+
+def _submit_splitting(client, entries, results, offset, sent, unit=1):
+    try:
+        txids = submit_atomic(client, entries)
+    except TxnOutcomeUnknown as e:
+        # May have landed: splitting and resending would be a second attempt
+        for i, tx_id in enumerate(e.txids):
+            results[offset + i] = (None, TxnOutcomeUnknown(tx_id, e.cause))
+        return
+    except Exception as e:
+        if len(entries) <= unit:
+            for i in range(len(entries)):
+                results[offset + i] = (None, e)
+            return
+        # Split on a unit boundary, so entries that must land together stay together
+        mid = (len(entries) // unit // 2) * unit or unit
+        _submit_splitting(client, entries[:mid], results, offset, sent, unit)
+        _submit_splitting(client, entries[mid:], results, offset + mid, sent, unit)
+        return
+
+    for i, tx_id in enumerate(txids):
+        results[offset + i] = (tx_id, None)
+    sent.append((offset, txids))
+
+
+def submit_in_groups(client, entries, wait=True, group_size=MAX_GROUP_SIZE, unit=1):
+    """
+    Send entries in atomic groups of up to group_size.
+
+    Returns a list aligned with entries of (txid, None) on success or
+    (None, exception) for a transfer algod rejected. The exception is a
+    TxnOutcomeUnknown (with the entry's txid) when the transfer was sent
+    but may or may not have landed. With wait=True every accepted group
+    is waited on once, after all groups have been sent.
+
+    unit > 1 keeps each run of unit consecutive entries in the same group,
+    even when a rejected group is split (they succeed or fail together).
+    """
+    group_size = max(unit, min(group_size, MAX_GROUP_SIZE) // unit * unit)
+    results = [None] * len(entries)
+    sent = []
+
+    for start in range(0, len(entries), group_size):
+        _submit_splitting(client, entries[start:start + group_size], results, start, sent, unit)
+
+    if wait:
+        for offset, txids in sent:
+            try:
+                transaction.wait_for_confirmation(client, txids[0], 4)
+            except error.TransactionRejectedError as e:
+                for i in range(len(txids)):
+                    results[offset + i] = (None, e)
+            except Exception as e:
+                # Timed out (or algod went away): the group may still land
+                for i, tx_id in enumerate(txids):
+                    results[offset + i] = (None, TxnOutcomeUnknown(tx_id, e))
+
+    return results
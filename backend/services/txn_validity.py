@@ -0,0 +1,73 @@
+"""
+CampusChain Backend — Submitted Transaction Validity Windows
+
+Every transaction the backend sends is recorded here with its
+first/last valid rounds, just before it goes to algod. The confirmation
+tracker uses this to tell "dropped" from "confirmed but no longer in the
+node's pending cache": a txn can only be declared failed once the chain
+is past its last valid round and no block in its window contains it.
+
+Rows are purged PURGE_AFTER_SECONDS after they were written (long after
+any validity window has closed), unless the txn is still pending.
+"""
+
+import time
+
+# ~1000-round max txn life at ~3s/round is under an hour
+PURGE_AFTER_SECONDS = 24 * 3600
+PURGE_EVERY_SECONDS = 600
+
+_last_purge = 0.0
+
+# The pending subqueries read the partial status = 'pending' indexes
+PURGE_SQL = """
+    DELETE FROM txn_validity
+    WHERE created_at < datetime('now', ?)
+      AND txn_id NOT IN (
+          SELECT txn_id FROM transactions WHERE status = 'pending' AND txn_id IS NOT NULL
+          UNION SELECT txn_id FROM orders WHERE status = 'pending' AND txn_id IS NOT NULL
+          UNION SELECT txn_id FROM funding_log WHERE status = 'pending' AND txn_id IS NOT NULL
+      )
+"""
+
+
+def record(signed):
+    """Remember the validity window of one signed txn or a group (own connection)."""
+    from models import connect
+
+    signed = signed if isinstance(signed, (list, tuple)) else [signed]
+    rows = [
+        (stxn.get_txid(), stxn.transaction.first_valid_round, stxn.transaction.last_valid_round)
+        for stxn in signed
+    ]
+    try:
+        db = connect()
+        try:
+            db.executemany(
+                "INSERT OR IGNORE INTO txn_validity (txn_id, first_valid, last_valid) VALUES (?, ?, ?)",
+                rows,
+            )
+            db.commit()
+        finally:
+            db.close()
+    except Exception as e:
+        # The tracker falls back to TXN_PENDING_TIMEOUT for unrecorded txns
+        print(f"Warning: could not record validity window: {e}")
+
+
+def lookup(db, txn_id):
+    """(first_valid, last_valid) for a txn we sent, or None if unrecorded."""
+    row = db.execute(
+        "SELECT first_valid, last_valid FROM txn_validity WHERE txn_id = ?", (txn_id,)
+    ).fetchone()
+    return (row["first_valid"], row["last_valid"]) if row else None
+
+
+def purge_old(db):
+    """Drop long-expired windows (at most every PURGE_EVERY_SECONDS). Caller commits."""
+    global _last_purge
+    now = time.time()
+    if now - _last_purge < PURGE_EVERY_SECONDS:
+        return
+    _last_purge = now
+    db.execute(PURGE_SQL, (f"-{PURGE_AFTER_SECONDS} seconds",))
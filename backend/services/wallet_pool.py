@@ -0,0 +1,153 @@
+"""
+CampusChain Backend — Pre-provisioned Wallet Pool
+
+Registration used to create a wallet, fund it with ALGO and opt it into
+CampusToken one confirmed transaction at a time (~8 rounds), leaving a
+half-set-up wallet behind on any failure.
+
+A background filler now keeps wallet_pool stocked with wallets that are
+already funded and opted in. Each wallet's top-up and opt-in go in the
+same atomic group (8 wallets = 16 txns per group), so a wallet is either
+fully ready or not created at all. /auth/register just claims one row.
+
+Pool size is kept between WALLET_POOL_LOW and WALLET_POOL_HIGH.
+"""
+
+import threading
+
+from algosdk import account, transaction
+
+from config import (
+    ASA_ID, WALLET_POOL_LOW, WALLET_POOL_HIGH,
+    WALLET_POOL_CHECK_SECONDS, WALLET_MIN_ALGO,
+)
+from models import connect
+from services.algod_client import get_algod_client
+from services.key_vault import admin_keys, seal_key
+from services.txn_groups import submit_in_groups
+
+
+def provision_wallets(count, microalgos=WALLET_MIN_ALGO):
+    """
+    Create count wallets, each topped up with ALGO and opted into the ASA
+    within one atomic group. Returns [(address, sealed_key)] for the
+    wallets whose setup confirmed.
+    """
+    admin_sk, admin_addr = admin_keys()
+    accounts = [account.generate_account() for _ in range(count)]
+
+    entries = []
+    for sk, addr in accounts:
+        entries.append((
+            lambda sp, addr=addr: transaction.PaymentTxn(
+                sender=admin_addr, sp=sp, receiver=addr, amt=microalgos,
+            ),
+            admin_sk,
+        ))
+        entries.append((
+            lambda sp, addr=addr: transaction.AssetTransferTxn(
+                sender=addr, sp=sp, receiver=addr, amt=0, index=ASA_ID,
+            ),
+            sk,
+        ))
+
+    # unit=2: a rejected group is never split between a wallet's top-up and
+    # its opt-in, so no wallet is funded without also being opted in
+    results = submit_in_groups(get_algod_client(), entries, wait=True, unit=2)
+
+    ready = []
+    for i, (sk, addr) in enumerate(accounts):
+        funded, opted_in = results[2 * i], results[2 * i + 1]
+        if funded[1] is None and opted_in[1] is None:
+            ready.append((addr, seal_key(sk)))
+        else:
+            print(f"Warning: wallet provisioning failed for {addr}: {funded[1] or opted_in[1]}")
+    return ready
+
+
+def pool_depth(db):
+    return db.execute("SELECT COUNT(*) AS c FROM wallet_pool").fetchone()["c"]
+
+
+def claim_wallet(db):
+    """
+    Take one ready wallet out of the pool, inside the caller's transaction
+    (a rollback returns it). Returns (address, sealed_key) or None if empty.
+    """
+    row = db.execute(
+        """DELETE FROM wallet_pool
+           WHERE id = (SELECT MIN(id) FROM wallet_pool)
+           RETURNING algo_address, algo_key_enc"""
+    ).fetchone()
+    if not row:
+        return None
+    return row["algo_address"], row["algo_key_enc"]
+
+
+def return_wallet(db, wallet):
+    """Put a provisioned wallet that ended up unused into the pool (commits)."""
+    db.execute("INSERT INTO wallet_pool (algo_address, algo_key_enc) VALUES (?, ?)", wallet)
+    db.commit()
+
+
+class WalletPoolFiller:
+    """Background thread that tops the pool back up to the high watermark."""
+
+    def __init__(self, low=WALLET_POOL_LOW, high=WALLET_POOL_HIGH,
+                 interval=WALLET_POOL_CHECK_SECONDS):
+        self.low = low
+        self.high = high
+        self.interval = interval
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None and self.high > 0:
+                self._thread = threading.Thread(target=self._run, name="wallet-pool", daemon=True)
+                self._thread.start()
+                self._wake.set()
+
+    def nudge(self):
+        """Called after a claim so the filler re-checks the low watermark."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.refill_if_low()
+            except Exception as e:
+                print(f"Warning: wallet pool refill failed: {e}")
+
+    def refill_if_low(self):
+        db = connect()
+        try:
+            depth = pool_depth(db)
+            if depth >= self.low:
+                return 0
+            added = 0
+            while depth < self.high:
+                # Up to 8 groups in flight per pass, one confirmation wait each
+                wallets = provision_wallets(min(self.high - depth, 64))
+                if not wallets:
+                    break
+                db.executemany(
+                    "INSERT INTO wallet_pool (algo_address, algo_key_enc) VALUES (?, ?)",
+                    wallets,
+                )
+                db.commit()
+                depth += len(wallets)
+                added += len(wallets)
+            return added
+        finally:
+            db.close()
+
+
+filler = WalletPoolFiller()
+
+
+def start_wallet_pool():
+    filler.start()
@@ -0,0 +1,17 @@
+"""
+Shared test setup: backend/ on sys.path (as the routes do) and a throwaway
+environment, set before config is first imported.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="campuschain-test-"), "test.db"))
+os.environ.setdefault("KEY_VAULT_SECRET", "test-vault-secret")
+os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret-at-least-32-bytes-long")
+os.environ.setdefault("CHAIN_FOLLOWER", "false")
+os.environ.setdefault("WALLET_POOL_HIGH", "0")
+os.environ.setdefault("BALANCE_SYNC_SECONDS", "0")
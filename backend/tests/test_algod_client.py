@@ -0,0 +1,84 @@
+"""
+A POST /transactions answered "already in ledger / in pool" only counts
+as sent for a failover resend of a single txn that the error names.
+"""
+
+import base64
+import json
+
+import pytest
+import requests
+from algosdk import account, encoding, error, transaction
+
+from services.algod_client import PooledAlgodClient
+
+
+def signed_transfers(count):
+    sk, sender = account.generate_account()
+    sp = transaction.SuggestedParams(
+        fee=1000, first=1, last=1000, gh=base64.b64encode(b"\0" * 32).decode(), flat_fee=True,
+    )
+    txns = [transaction.PaymentTxn(sender, sp, sender, amt) for amt in range(1, count + 1)]
+    if count > 1:
+        transaction.assign_group_id(txns)
+    return [t.sign(sk) for t in txns]
+
+
+def http_response(status, message):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps({"message": message}).encode()
+    return resp
+
+
+def client_answering(*answers):
+    """Two-node client whose nodes answer in turn (an exception is raised)."""
+    client = PooledAlgodClient("token", ["http://node-a", "http://node-b"], hedge_ms=0)
+    answers = list(answers)
+
+    def request(method, url, **kwargs):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    client.session.request = request
+    return client
+
+
+def test_failover_resend_of_a_landed_txn_counts_as_sent():
+    [stxn] = signed_transfers(1)
+    tx_id = stxn.get_txid()
+    client = client_answering(
+        requests.Timeout("read timed out"),
+        http_response(400, f"transaction already in ledger: {tx_id}"),
+    )
+    assert client.send_transaction(stxn) == tx_id
+
+
+def test_already_in_ledger_without_a_failover_is_an_error():
+    [stxn] = signed_transfers(1)
+    client = client_answering(http_response(400, f"transaction already in ledger: {stxn.get_txid()}"))
+    with pytest.raises(error.AlgodHTTPError):
+        client.send_transaction(stxn)
+
+
+def test_a_group_with_one_duplicate_member_is_not_sent():
+    group = signed_transfers(3)
+    client = client_answering(
+        requests.Timeout("read timed out"),
+        http_response(400, f"transaction already in ledger: {group[0].get_txid()}"),
+    )
+    with pytest.raises(error.AlgodHTTPError):
+        client.send_transactions(group)
+
+
+def test_already_in_ledger_naming_another_txn_is_an_error():
+    [stxn] = signed_transfers(1)
+    [other] = signed_transfers(1)
+    client = client_answering(
+        requests.Timeout("read timed out"),
+        http_response(400, f"transaction already in ledger: {other.get_txid()}"),
+    )
+    with pytest.raises(error.AlgodHTTPError):
+        client.send_transaction(stxn)
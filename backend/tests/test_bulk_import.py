@@ -0,0 +1,70 @@
+"""
+Imported students' plaintext passwords must never be stored: the job
+holds only password hashes, and nothing once it has completed.
+"""
+
+import pytest
+from werkzeug.security import check_password_hash
+
+import models
+from services import bulk_import
+
+CSV = "username,password\nbi_alice,alice-secret-1\nbi_bob,bob-secret-2\n"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    models.init_db()
+    wallets = iter(range(10 ** 6))
+    monkeypatch.setattr(
+        bulk_import, "provision_wallets",
+        lambda n: [(f"BIWALLET{next(wallets)}", "sealed") for _ in range(n)],
+    )
+    conn = models.connect()
+    conn.execute("DELETE FROM users WHERE username LIKE 'bi_%'")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def stored_source(db, job_id):
+    return db.execute("SELECT source FROM import_jobs WHERE id = ?", (job_id,)).fetchone()["source"]
+
+
+def assert_imported(db):
+    users = {
+        r["username"]: r["password_hash"]
+        for r in db.execute("SELECT username, password_hash FROM users WHERE username LIKE 'bi_%'")
+    }
+    assert check_password_hash(users["bi_alice"], "alice-secret-1")
+    assert check_password_hash(users["bi_bob"], "bob-secret-2")
+
+
+def test_job_stores_hashes_and_clears_them_when_done(db):
+    job_id = bulk_import.create_job(db, "students.csv", "csv", CSV)
+    source = stored_source(db, job_id)
+    assert "secret" not in source
+    assert "bi_alice" in source
+
+    job = bulk_import.run_job(job_id)
+
+    assert job["status"] == "completed" and job["imported"] == 2
+    assert stored_source(db, job_id) == ""
+    assert_imported(db)
+
+
+def test_job_created_with_plaintext_is_hashed_when_run(db, monkeypatch):
+    # As stored before passwords were hashed up front
+    cur = db.execute(
+        "INSERT INTO import_jobs (source_name, format, source, total) VALUES ('old.csv', 'csv', ?, 2)",
+        (CSV,),
+    )
+    db.commit()
+    monkeypatch.setattr(bulk_import, "IMPORT_CHUNK_SIZE", 1)
+    seen = []
+
+    bulk_import.run_job(cur.lastrowid, progress=lambda job: seen.append(stored_source(db, job["id"])))
+
+    assert seen and not any("secret" in source for source in seen)
+    assert stored_source(db, cur.lastrowid) == ""
+    assert_imported(db)
@@ -0,0 +1,154 @@
+"""
+Replays two recorded blocks (msgpack, as served by GET /v2/blocks) through
+the chain follower: txids, the rows written, checkpoint resume, and a
+block that is not available yet. Algorand blocks are final (no reorgs),
+so a block is only ever missing or replayed after a crash, never replaced.
+
+The fixtures were recorded from fake_algod.py:
+  round 2: RECORDED_PENDING (student -> vendor, 30 food), MISSING
+           (student -> vendor, 20 events) and an ALGO payment
+  round 3: FAILED_THEN_LANDED (student -> vendor, 15 stationery) and a
+           CampusToken payment from an address that is not our student
+"""
+
+import os
+import sqlite3
+
+import msgpack
+import pytest
+from algosdk import error
+
+from migrations import migrate
+from services import chain_follower
+from services.chain_follower import ChainFollower, block_txids, campus_payments, get_checkpoint, process_block
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ASA = 1001
+STUDENT = "KNEPT6TRDOGGIGMQCQJRLQ72MG3766WGSUMNHS5TU62A4ZIKBJYNLHQPFU"
+VENDOR = "MTUDRQJNFZSRPDJLYB3NRFBN6P36GQ2XS5JCYWHDK4DJ5NPLAPICYAPFTM"
+RECORDED_PENDING = "727HAKQF5ZOGDB4VCDEHFBSZW63G7VA7N4FSB5GTRRZZ6ZLPIEWA"
+MISSING = "QSTJH73QM7OM26NVWFQRZ2CV45CGMCMB4LFVI7MWTFSVJRY5ZOJA"
+ALGO_PAYMENT = "TXNKACJJXPVVVYCCVVO6HAVZUPSEU7SH2RPWPQCCNYDETNQUU6MQ"
+FAILED_THEN_LANDED = "IPO25LL7IYWW2C7UKGKMDDA7CYZN4SK5TYLIV7ZJKZEPZSFQ7IEA"
+OUTSIDER_PAYMENT = "S2UDSLB7PG5K2MLLTY42IO5L4YCZTBG7PE5GRSLFQEBYK327LC3A"
+
+
+def raw_block(rnd):
+    with open(os.path.join(FIXTURES, f"block_{rnd}.msgpack"), "rb") as f:
+        return f.read()
+
+
+def block(rnd):
+    return msgpack.unpackb(raw_block(rnd), raw=False, strict_map_key=False)
+
+
+class RecordedNode:
+    """Serves the fixture blocks that have been 'produced' so far."""
+
+    def __init__(self, rounds):
+        self.rounds = list(rounds)
+        self.fetched = []
+
+    def status(self):
+        return {"last-round": 3}
+
+    def block_info(self, rnd, response_format="json"):
+        self.fetched.append(rnd)
+        if rnd not in self.rounds:
+            raise error.AlgodHTTPError(f"failed to retrieve information from the ledger: round {rnd}", 404)
+        return raw_block(rnd)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "follower.db")
+
+    def connect():
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    conn = connect()
+    migrate(conn)
+    conn.execute("INSERT INTO users (id, username, password_hash, role, algo_address) VALUES (1, 'cf_student', 'x', 'student', ?)", (STUDENT,))
+    conn.execute("INSERT INTO users (id, username, password_hash, role) VALUES (2, 'cf_vendor', 'x', 'vendor')")
+    conn.execute("INSERT INTO vendors (id, user_id, name, category, algo_address) VALUES (1, 2, 'Cafe', 'food', ?)", (VENDOR,))
+    conn.execute(
+        """INSERT INTO transactions (student_id, vendor_id, amount, category, txn_id, status, created_at)
+           VALUES (1, 1, 30, 'food', ?, 'pending', '2026-03-04 10:00:00')""",
+        (RECORDED_PENDING,),
+    )
+    conn.execute(
+        "INSERT INTO category_spending (student_id, category, month, amount) VALUES (1, 'food', '2026-03', 30)"
+    )
+    # Given up on by the tracker (its spending already reversed), but it landed
+    conn.execute(
+        """INSERT INTO transactions (student_id, vendor_id, amount, category, txn_id, status, created_at)
+           VALUES (1, 1, 15, 'stationery', ?, 'failed', '2026-03-04 10:01:00')""",
+        (FAILED_THEN_LANDED,),
+    )
+    conn.commit()
+    monkeypatch.setattr(chain_follower, "connect", connect)
+    yield conn
+    conn.close()
+
+
+def statuses(db):
+    return {r["txn_id"]: r["status"] for r in db.execute("SELECT txn_id, status FROM transactions")}
+
+
+def spending(db):
+    return {r["category"]: r["amount"] for r in db.execute("SELECT category, amount FROM category_spending")}
+
+
+def test_txids_and_payments_match_what_was_sent():
+    assert block_txids(block(2)) == {RECORDED_PENDING, MISSING, ALGO_PAYMENT}
+    assert block_txids(block(3)) == {FAILED_THEN_LANDED, OUTSIDER_PAYMENT}
+
+    payments = list(campus_payments(block(2), ASA))
+    assert [(p[0], p[1], p[2], p[3], p[4]) for p in payments] == [
+        (RECORDED_PENDING, STUDENT, VENDOR, 30, "food"),
+        (MISSING, STUDENT, VENDOR, 20, "events"),
+    ]
+    assert list(campus_payments(block(2), ASA + 1)) == []
+
+
+def test_blocks_settle_insert_and_restore_payments(db):
+    assert process_block(db, 2, block(2), ASA) == 1
+    assert process_block(db, 3, block(3), ASA) == 0
+
+    assert statuses(db) == {
+        RECORDED_PENDING: "confirmed",
+        MISSING: "confirmed",
+        FAILED_THEN_LANDED: "confirmed",
+    }
+    missing = db.execute("SELECT amount, category, vendor_id FROM transactions WHERE txn_id = ?", (MISSING,)).fetchone()
+    assert tuple(missing) == (20, "events", 1)
+    assert spending(db) == {"food": 30, "events": 20, "stationery": 15}
+    assert get_checkpoint(db) == 3
+
+    # Replaying a block (e.g. after a crash before the next one) changes nothing
+    assert process_block(db, 2, block(2), ASA) == 0
+    assert spending(db) == {"food": 30, "events": 20, "stationery": 15}
+
+
+def test_follow_resumes_after_checkpoint_and_waits_for_missing_block(db, monkeypatch):
+    db.execute("INSERT INTO chain_checkpoint (name, round) VALUES ('blocks', 1)")
+    db.commit()
+    node = RecordedNode(rounds=[2])
+    monkeypatch.setattr(chain_follower, "get_algod_client", lambda: node)
+    follower = ChainFollower(prefetch=1, lag=0, asa_id=ASA)
+
+    # Round 3 isn't available: round 2 is applied, the checkpoint stops there
+    with pytest.raises(error.AlgodHTTPError):
+        follower.follow(until=3)
+    assert get_checkpoint(db) == 2
+    assert statuses(db)[MISSING] == "confirmed"
+
+    # Once it is, the follower resumes at round 3 without re-reading round 2
+    node.rounds.append(3)
+    node.fetched.clear()
+    assert follower.follow(until=3) == 4
+    assert node.fetched == [3]
+    assert get_checkpoint(db) == 3
+    assert statuses(db)[FAILED_THEN_LANDED] == "confirmed"
@@ -0,0 +1,68 @@
+"""
+Month-filtered history queries must seek the (student_id, created_at)
+indexes and come back already ordered: no table scan, no temp B-tree.
+"""
+
+import sqlite3
+
+import pytest
+
+from migrations import migrate
+from services.spending import month_range
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def query_plan(db, sql, params):
+    return [row["detail"] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def test_student_history_uses_student_created_index(db):
+    start, end = month_range("2026-03")
+    plan = query_plan(db, """
+        SELECT t.id, t.amount, t.category, t.created_at, v.name as vendor_name
+        FROM transactions t
+        LEFT JOIN vendors v ON t.vendor_id = v.id
+        WHERE t.student_id = ? AND t.created_at >= ? AND t.created_at < ?
+          AND (t.created_at, t.id) < (?, ?)
+        ORDER BY t.created_at DESC, t.id DESC LIMIT ?""",
+        (1, start, end, "9999-12-31 23:59:59", 2 ** 63 - 1, 21),
+    )
+    assert any(
+        "SEARCH t USING INDEX idx_transactions_student_created" in step for step in plan
+    ), plan
+    assert not any("USE TEMP B-TREE" in step for step in plan), plan
+
+
+def test_monthly_funding_total_uses_student_created_index(db):
+    start, end = month_range("2026-03")
+    plan = query_plan(db, """
+        SELECT COALESCE(SUM(amount), 0) as total FROM funding_log
+        WHERE student_id = ? AND created_at >= ? AND created_at < ?""",
+        (1, start, end),
+    )
+    assert any(
+        "SEARCH funding_log USING INDEX idx_funding_log_student_created" in step for step in plan
+    ), plan
+    assert not any("USE TEMP B-TREE" in step for step in plan), plan
+
+
+def test_month_range():
+    assert month_range("2026-03") == ("2026-03-01 00:00:00", "2026-04-01 00:00:00")
+
+
+def test_month_range_december_rolls_over_the_year():
+    assert month_range("2025-12") == ("2025-12-01 00:00:00", "2026-01-01 00:00:00")
+
+
+@pytest.mark.parametrize("month", ["2026-13", "2026-3-1", "March", ""])
+def test_month_range_rejects_malformed_month(month):
+    with pytest.raises(ValueError):
+        month_range(month)
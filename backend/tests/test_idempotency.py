@@ -0,0 +1,131 @@
+"""
+Idempotency-Key handling: replays, concurrent duplicates, body mismatch,
+and when the key is released (nothing sent) or kept (a txn was sent).
+"""
+
+import threading
+import time
+import uuid
+
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+
+import models
+from services.idempotency import idempotent, record_txid
+from services.params_cache import TxnOutcomeUnknown
+
+
+@pytest.fixture(scope="module")
+def app():
+    models.init_db()
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-jwt-secret-at-least-32-bytes-long"
+    JWTManager(app)
+    app.calls = {}
+
+    def count(name):
+        app.calls[name] = app.calls.get(name, 0) + 1
+        return app.calls[name]
+
+    @app.route("/pay", methods=["POST"])
+    @jwt_required()
+    @idempotent
+    def pay():
+        time.sleep(0.2)  # long enough for duplicates to arrive mid-flight
+        return jsonify({"charge": count("pay")}), 201
+
+    @app.route("/flaky", methods=["POST"])
+    @jwt_required()
+    @idempotent
+    def flaky():
+        if count("flaky") == 1:
+            return jsonify({"error": "algod unavailable"}), 503
+        return jsonify({"charge": app.calls["flaky"]}), 201
+
+    @app.route("/unknown", methods=["POST"])
+    @jwt_required()
+    @idempotent
+    def unknown():
+        count("unknown")
+        record_txid("TXUNKNOWN")
+        raise TxnOutcomeUnknown("TXUNKNOWN", "read timed out")
+
+    return app
+
+
+@pytest.fixture
+def post(app):
+    with app.app_context():
+        token = create_access_token(identity="7")
+
+    def post(path, key, body=None):
+        headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": key}
+        return app.test_client().post(path, json=body or {"amount": 10}, headers=headers)
+
+    return post
+
+
+def test_completed_key_is_replayed(app, post):
+    key = str(uuid.uuid4())
+    first = post("/pay", key)
+    again = post("/pay", key)
+
+    assert first.status_code == again.status_code == 201
+    assert again.get_json() == first.get_json()
+    assert again.headers.get("Idempotent-Replayed") == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_concurrent_duplicates_run_once(app, post):
+    key = str(uuid.uuid4())
+    before = app.calls.get("pay", 0)
+    responses = []
+
+    def send():
+        responses.append(post("/pay", key))
+
+    threads = [threading.Thread(target=send) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert app.calls["pay"] == before + 1
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.get_data() for r in responses}) == 1
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == 4
+
+
+def test_key_reused_with_another_body_is_rejected(app, post):
+    key = str(uuid.uuid4())
+    assert post("/pay", key, {"amount": 10}).status_code == 201
+    before = app.calls["pay"]
+
+    resp = post("/pay", key, {"amount": 99})
+
+    assert resp.status_code == 422
+    assert app.calls["pay"] == before
+
+
+def test_key_is_released_after_5xx_before_sending(app, post):
+    key = str(uuid.uuid4())
+    assert post("/flaky", key).status_code == 503
+
+    retry = post("/flaky", key)
+
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
+    assert app.calls["flaky"] == 2
+
+
+def test_key_is_kept_once_the_outcome_is_unknown(app, post):
+    key = str(uuid.uuid4())
+    first = post("/unknown", key)
+    retry = post("/unknown", key)
+
+    assert first.status_code == retry.status_code == 202
+    assert first.get_json()["txn_id"] == "TXUNKNOWN"
+    assert first.get_json()["status"] == "pending"
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+    assert app.calls["unknown"] == 1
@@ -0,0 +1,43 @@
+"""
+The key vault must refuse to start with an empty or publicly known
+secret: custodial keys sealed under it would not be secret.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+
+
+def vault_configured(**env):
+    """Whether key_vault.check_configured() passes in a fresh process with env."""
+    result = subprocess.run(
+        [sys.executable, "-c", "from services import key_vault; key_vault.check_configured()"],
+        cwd=BACKEND,
+        env={**os.environ, "KEY_VAULT_SECRET": "", "SECRET_KEY": "", **env},
+        capture_output=True,
+    )
+    return result.returncode == 0
+
+
+@pytest.mark.parametrize("env", [
+    {},
+    {"KEY_VAULT_SECRET": "   "},
+    {"KEY_VAULT_SECRET": "change-this-vault-secret"},
+    {"KEY_VAULT_SECRET": "change-this-vault-secret", "SECRET_KEY": "a-real-flask-secret"},
+    {"SECRET_KEY": "change-this-in-production"},
+    {"SECRET_KEY": "campuschain-dev-secret-key-change-in-prod"},
+])
+def test_public_or_empty_secrets_are_rejected(env):
+    assert not vault_configured(**env)
+
+
+@pytest.mark.parametrize("env", [
+    {"KEY_VAULT_SECRET": "3f9c0a7e5b1d4c28a6e0f7b9d2c4e8a1"},
+    {"SECRET_KEY": "a-real-flask-secret"},
+])
+def test_real_secrets_are_accepted(env):
+    assert vault_configured(**env)
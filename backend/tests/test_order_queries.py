@@ -0,0 +1,122 @@
+"""
+The order feeds and the soft bill load line items for the whole page in
+one query: the number of SQL statements per request must not grow with
+the number of orders or items.
+"""
+
+import pytest
+from flask import has_request_context
+from flask_jwt_extended import create_access_token
+
+import models
+from app import create_app
+
+ITEMS_PER_ORDER = 3
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = create_app()
+    app.testing = True
+    db = models.connect()
+    db.execute("INSERT INTO users (username, password_hash, role) VALUES ('oq_student', 'x', 'student')")
+    db.execute("INSERT INTO users (username, password_hash, role) VALUES ('oq_vendor', 'x', 'vendor')")
+    db.execute(
+        """INSERT INTO vendors (user_id, name, category, algo_address)
+           SELECT id, 'Order Query Cafe', 'food', 'OQVENDOR' FROM users WHERE username = 'oq_vendor'"""
+    )
+    db.commit()
+    db.close()
+    return app
+
+
+@pytest.fixture
+def ids(app):
+    db = models.connect()
+    student = db.execute("SELECT id FROM users WHERE username = 'oq_student'").fetchone()["id"]
+    vendor_user = db.execute("SELECT id FROM users WHERE username = 'oq_vendor'").fetchone()["id"]
+    vendor = db.execute("SELECT id FROM vendors WHERE user_id = ?", (vendor_user,)).fetchone()["id"]
+    db.close()
+    return {"student": student, "vendor_user": vendor_user, "vendor": vendor}
+
+
+def add_orders(ids, count, items=ITEMS_PER_ORDER):
+    db = models.connect()
+    order_ids = []
+    for _ in range(count):
+        cur = db.execute(
+            "INSERT INTO orders (student_id, vendor_id, total_amount, txn_id, status) VALUES (?, ?, 0, NULL, 'completed')",
+            (ids["student"], ids["vendor"]),
+        )
+        order_ids.append(cur.lastrowid)
+        db.executemany(
+            "INSERT INTO order_items (order_id, menu_item_id, quantity, price) VALUES (?, ?, 1, 10)",
+            [(cur.lastrowid, item) for item in range(1, items + 1)],
+        )
+    db.commit()
+    db.close()
+    return order_ids
+
+
+@pytest.fixture
+def count_queries(monkeypatch):
+    """Returns a list that collects the SELECTs run on request connections."""
+    statements = []
+    connect = models.connect
+
+    def traced_connect():
+        conn = connect()
+        if has_request_context():
+            conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(models, "connect", traced_connect)
+    return lambda: [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def auth(app, user_id, role):
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def selects_for(app, count_queries, url, headers):
+    before = len(count_queries())
+    resp = app.test_client().get(url, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return len(count_queries()) - before, resp.get_json()
+
+
+def test_vendor_orders_query_count_is_constant(app, ids, count_queries):
+    headers = auth(app, ids["vendor_user"], "vendor")
+    add_orders(ids, 1)
+    few, body = selects_for(app, count_queries, "/api/vendor/orders", headers)
+    add_orders(ids, 12)
+    many, body = selects_for(app, count_queries, "/api/vendor/orders", headers)
+
+    assert len(body["orders"]) >= 13
+    assert all(len(o["items"]) == ITEMS_PER_ORDER for o in body["orders"])
+    assert few == many == 3  # vendor, page of orders, their items
+
+
+def test_student_orders_query_count_is_constant(app, ids, count_queries):
+    headers = auth(app, ids["student"], "student")
+    add_orders(ids, 1)
+    few, body = selects_for(app, count_queries, "/api/canteen/orders", headers)
+    add_orders(ids, 12)
+    many, body = selects_for(app, count_queries, "/api/canteen/orders", headers)
+
+    assert len(body["orders"]) >= 13
+    assert all(len(o["items"]) == ITEMS_PER_ORDER for o in body["orders"])
+    assert few == many == 2  # page of orders, their items
+
+
+def test_bill_query_count_is_constant(app, ids, count_queries):
+    headers = auth(app, ids["student"], "student")
+    small, large = add_orders(ids, 1, items=1) + add_orders(ids, 1, items=8)
+    few, body = selects_for(app, count_queries, f"/api/canteen/orders/{small}/bill", headers)
+    assert len(body["bill"]["items"]) == 1
+    many, body = selects_for(app, count_queries, f"/api/canteen/orders/{large}/bill", headers)
+    assert len(body["bill"]["items"]) == 8
+
+    assert few == many == 2  # order, its items
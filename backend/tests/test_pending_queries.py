@@ -0,0 +1,52 @@
+"""
+The confirmation tracker and the balance sync poll in the background:
+their lookups must read only the partial status = 'pending' indexes,
+never scan the transactions, orders or funding_log tables.
+"""
+
+import sqlite3
+
+import pytest
+
+from migrations import migrate
+from services.balance_ledger import STALE_ADDRESSES_SQL
+from services.confirmation_tracker import PENDING_TXIDS_SQL
+from services.txn_validity import PURGE_SQL
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def query_plan(db, sql, params=()):
+    return [row["detail"] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def assert_no_table_scan(plan):
+    for table in ("transactions", "orders", "funding_log", "txn_validity"):
+        assert not any(step.startswith(f"SCAN {table}") for step in plan), plan
+
+
+def test_pending_txids_use_partial_indexes(db):
+    plan = query_plan(db, PENDING_TXIDS_SQL)
+    assert_no_table_scan(plan)
+    for index in ("idx_transactions_pending", "idx_orders_pending", "idx_funding_log_pending"):
+        assert any(index in step for step in plan), plan
+
+
+def test_validity_purge_uses_indexes(db):
+    plan = query_plan(db, PURGE_SQL, ("-86400 seconds",))
+    assert_no_table_scan(plan)
+    assert any("idx_txn_validity_created" in step for step in plan), plan
+
+
+def test_stale_balances_read_in_synced_order_without_scans(db):
+    plan = query_plan(db, STALE_ADDRESSES_SQL, (10,))
+    assert_no_table_scan(plan)
+    assert any("idx_token_balances_synced" in step for step in plan), plan
+    assert not any("TEMP B-TREE FOR ORDER BY" in step for step in plan), plan
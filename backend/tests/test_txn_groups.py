@@ -0,0 +1,53 @@
+"""
+Identical transfers built from the same cached params (same sender,
+receiver, amount and note) must still get distinct txids, within a group
+and across back-to-back groups.
+"""
+
+from algosdk import account, transaction
+
+from services import params_cache
+from services.txn_groups import submit_atomic
+
+
+class RecordingClient:
+    """Stands in for algod: hands out fixed params and keeps what is sent."""
+
+    def __init__(self):
+        self.sent = []
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(
+            fee=1000, first=1000, last=2000, gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=",
+            gen="testnet-v1.0", flat_fee=True,
+        )
+
+    def send_transactions(self, signed):
+        self.sent.append(list(signed))
+        return signed[0].get_txid()
+
+    def send_transaction(self, signed):
+        return self.send_transactions([signed])
+
+
+def test_identical_transfers_never_share_a_txid():
+    sk, sender = account.generate_account()
+    _, receiver = account.generate_account()
+    client = RecordingClient()
+    params_cache.invalidate_params()
+
+    def entry(amount):
+        return (
+            lambda sp: transaction.AssetTransferTxn(
+                sender=sender, sp=sp, receiver=receiver, amt=amount, index=1, note=b"x",
+            ),
+            sk,
+        )
+
+    first = submit_atomic(client, [entry(15), entry(10)])
+    second = submit_atomic(client, [entry(10), entry(25)])
+    third = submit_atomic(client, [entry(10), entry(10), entry(10)])
+
+    txids = first + second + third
+    assert len(set(txids)) == len(txids)
+    assert [stxn.get_txid() for group in client.sent for stxn in group] == txids
@@ -9,10 +9,22 @@ operation.
 Methods:
   - bootstrap(asa_id):       Store ASA ID, opt contract into the ASA
   - fund_student(addr, amt): Transfer tokens from vault → student
+  - fund_many(amt_1..amt_n): Transfer tokens from vault → each account in
+                             the accounts array (accounts[k] gets amt_k),
+                             as one inner group; inner fees are pooled
+                             onto the outer app call
 """
 
+import os
+import sys
+
 from pyteal import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+# Accounts-array limit per app call, shared with the backend, which packs
+# up to 16 such calls into one atomic group for larger disbursements
+from config import VAULT_RECIPIENTS_PER_CALL
+
 
 def approval_program():
     """CampusVault approval program."""
@@ -74,12 +86,42 @@ def approval_program():
         Approve(),
     )
 
+    # --- Fund Many: one inner transfer per recipient in the accounts array ---
+    # application_args = ["fund_many", amt_1, ..., amt_n]
+    # accounts         = [recipient_1, ..., recipient_n]
+    num_recipients = Txn.accounts.length()
+
+    on_fund_many = Seq(
+        # Only admin can fund
+        Assert(Txn.sender() == App.globalGet(admin_key)),
+        Assert(num_recipients > Int(0)),
+        Assert(num_recipients <= Int(VAULT_RECIPIENTS_PER_CALL)),
+        Assert(Txn.application_args.length() == num_recipients + Int(1)),
+        # All transfers go out as one inner group; fees are pooled from
+        # the outer call (fee = (1 + n) * min_fee), so inner fee is 0
+        InnerTxnBuilder.Begin(),
+        For(i.store(Int(1)), i.load() <= num_recipients, i.store(i.load() + Int(1))).Do(Seq(
+            Assert(Btoi(Txn.application_args[i.load()]) > Int(0)),
+            If(i.load() > Int(1)).Then(InnerTxnBuilder.Next()),
+            InnerTxnBuilder.SetFields({
+                TxnField.type_enum: TxnType.AssetTransfer,
+                TxnField.xfer_asset: App.globalGet(asa_id_key),
+                TxnField.asset_receiver: Txn.accounts[i.load()],
+                TxnField.asset_amount: Btoi(Txn.application_args[i.load()]),
+                TxnField.fee: Int(0),
+            }),
+        )),
+        InnerTxnBuilder.Submit(),
+        Approve(),
+    )
+
     # ---------- Router ----------
     method = Txn.application_args[0]
 
     on_call = Cond(
         [method == Bytes("bootstrap"), on_bootstrap],
         [method == Bytes("fund_student"), on_fund_student],
+        [method == Bytes("fund_many"), on_fund_many],
     )
 
     program = Cond(
@@ -103,8 +145,6 @@ def clear_state_program():
 
 if __name__ == "__main__":
     # Compile and write TEAL files
-    import os
-
     output_dir = os.path.join(os.path.dirname(__file__), "build")
     os.makedirs(output_dir, exist_ok=True)
 
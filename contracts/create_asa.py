@@ -8,9 +8,13 @@ from algosdk.v2client import algod
 import json
 from dotenv import load_dotenv
 import os
+import sys
 
 load_dotenv()
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from services.params_cache import suggested_params
+
 # ---------- Configuration ----------
 ALGOD_ADDRESS = os.getenv("ALGOD_ADDRESS", "https://testnet-api.algonode.cloud")
 ALGOD_TOKEN = os.getenv("ALGOD_TOKEN", "")  # algonode.cloud needs no token
@@ -31,7 +35,7 @@ def create_campus_token(client, admin_sk, admin_addr):
     Returns:
         int: The ASA ID of the newly created CampusToken.
     """
-    params = client.suggested_params()
+    params = suggested_params(client)
 
     txn = transaction.AssetConfigTxn(
         sender=admin_addr,
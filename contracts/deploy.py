@@ -14,6 +14,10 @@ from algosdk.v2client import algod
 import base64
 import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from services.params_cache import suggested_params
 
 # ---------- Configuration ----------
 ALGOD_ADDRESS = os.getenv("ALGOD_ADDRESS", "https://testnet-api.algonode.cloud")
@@ -49,7 +53,7 @@ def deploy_vault(client, admin_sk, admin_addr):
     global_schema = transaction.StateSchema(num_uints=1, num_byte_slices=1)
     local_schema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
 
-    params = client.suggested_params()
+    params = suggested_params(client)
 
     txn = transaction.ApplicationCreateTxn(
         sender=admin_addr,
@@ -76,7 +80,7 @@ def deploy_vault(client, admin_sk, admin_addr):
 
 def fund_app_account(client, admin_sk, admin_addr, app_addr, amount=1_000_000):
     """Send ALGO to the application account for inner txn fees."""
-    params = client.suggested_params()
+    params = suggested_params(client)
     txn = transaction.PaymentTxn(
         sender=admin_addr,
         sp=params,
@@ -91,7 +95,7 @@ def fund_app_account(client, admin_sk, admin_addr, app_addr, amount=1_000_000):
 
 def bootstrap_vault(client, admin_sk, admin_addr, app_id, asa_id):
     """Call bootstrap method to store ASA ID and opt contract into ASA."""
-    params = client.suggested_params()
+    params = suggested_params(client)
 
     txn = transaction.ApplicationCallTxn(
         sender=admin_addr,
@@ -110,7 +114,7 @@ def bootstrap_vault(client, admin_sk, admin_addr, app_id, asa_id):
 
 def seed_vault_with_tokens(client, admin_sk, admin_addr, app_addr, asa_id, amount):
     """Transfer CampusTokens from admin to the vault application address."""
-    params = client.suggested_params()
+    params = suggested_params(client)
 
     txn = transaction.AssetTransferTxn(
         sender=admin_addr,
@@ -169,6 +173,7 @@ def main():
     with open(config_path, "w") as f:
         json.dump(config, f, indent=2)
     print(f"Config updated: {config_path}")
+    print(f"Set VAULT_APP_ID={app_id} in .env to fund students through the vault")
     print("Deployment complete!")
 
 